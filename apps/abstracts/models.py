@@ -1,9 +1,10 @@
 import uuid
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import connections, models, router
 from django.db.models.query import QuerySet
 from django.http import Http404
+from django.utils import timezone
 
 
 class AbstractSoftDeleteManager(models.Manager):
@@ -111,3 +112,41 @@ class AbstractModel(models.Model):
         str: A string representation of the object, including its class name and ID.
         """
         return f"<{self.__class__.__name__} {self.id}>"
+
+
+def bulk_set_active(queryset, is_active, returning=("id",)):
+    """
+    Soft delete or restore the objects of a queryset with a single UPDATE.
+
+    Unlike soft_delete and restore, the rows are not loaded, only the is_active and
+    updated columns are written and no signal is sent. The rows that already have the
+    requested state are not modified.
+
+    Parameters:
+    queryset (QuerySet): The objects to update, of a model based on AbstractModel.
+    is_active (bool): The new state of the objects.
+    returning (tuple): The fields of the updated rows to return.
+
+    Returns:
+    list: A tuple with the values of the returning fields of every updated row.
+    """
+    model = queryset.model
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = model._meta
+    subquery = queryset.filter(is_active=not is_active).order_by().values("pk")
+    sql, params = subquery.query.get_compiler(using=using).as_sql()
+    columns = ", ".join(quote(opts.get_field(name).column) for name in returning)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote(opts.db_table)} "
+            f"SET {quote('is_active')} = %s, {quote('updated')} = %s "
+            f"WHERE {quote(opts.pk.column)} IN ({sql}) RETURNING {columns}",
+            [
+                is_active,
+                connection.ops.adapt_datetimefield_value(timezone.now()),
+                *params,
+            ],
+        )
+        return cursor.fetchall()
@@ -0,0 +1,72 @@
+import uuid
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.authentication.revocation import is_revoked
+from apps.authentication.serializers import USER_CLAIMS
+from apps.users.cache import get_active_state
+from apps.users.models import User
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the user from the claims of the token.
+
+    The signed claims of the tokens issued by ClaimsTokenObtainPairSerializer are
+    trusted, so the user row is not read on every request, only its active state is
+    checked, from a cache invalidated when the user changes, see apps.users.cache.
+    The other fields of the user are loaded from the database on first access. The
+    tokens without the claims are authenticated by reading the user.
+
+    A change of the username or of the staff flag is seen when the token is
+    refreshed, a deactivation is seen at once. The revoked tokens are rejected, see
+    apps.authentication.revocation.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken(_("Token is blacklisted"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        """
+        Get the user of a validated token.
+
+        Args:
+        validated_token (Token): The validated access token.
+
+        Returns:
+        User: The user, with the id, the username, the staff flag and the active
+            state loaded.
+
+        Raises:
+        InvalidToken: If the token has no user id.
+        AuthenticationFailed: If the user does not exist or is inactive.
+        """
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        try:
+            user_id = uuid.UUID(str(validated_token[api_settings.USER_ID_CLAIM]))
+        except (KeyError, ValueError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if not get_active_state(user_id):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        values = {
+            "id": user_id,
+            "username": validated_token["username"],
+            "is_staff": validated_token["is_staff"],
+            "is_active": True,
+        }
+        # Loaded like a row with deferred fields, so saving the user only writes the
+        # loaded fields and reading another field queries it
+        fields = [
+            field.attname
+            for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(DEFAULT_DB_ALIAS, fields, [values[name] for name in fields])
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    The PBKDF2 hasher of Django with the iterations of PASSWORD_HASHER_ITERATIONS.
+
+    The algorithm name is the same, so the stored hashes are still verified and
+    they are upgraded, or downgraded, to the configured iterations on the next
+    successful login. The benchmark_login command measures the cost of the
+    iterations against LOGIN_LATENCY_SLO_MS.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHER_ITERATIONS or PBKDF2PasswordHasher.iterations
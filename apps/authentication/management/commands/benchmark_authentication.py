@@ -0,0 +1,168 @@
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.authentication.authentication import ClaimsJWTAuthentication
+from apps.authentication.serializers import ClaimsTokenObtainPairSerializer
+from apps.contacts.api.viewsets import ContactViewSet
+from apps.contacts.models import Contacts
+from apps.contacts.seeds import seed_contacts
+from apps.users.models import User
+
+AUTHENTICATION_CLASSES = {
+    "user_query": JWTAuthentication,
+    "claims": ClaimsJWTAuthentication,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la autenticación JWT que consulta el usuario en cada petición con la "
+        "que confía en los claims del token, en la autenticación sola y en la lectura "
+        "de un contacto, y falla si la segunda consulta la base de datos o es más lenta"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--contacts", type=int, default=100)
+
+    def handle(self, *args, **options):
+        results = {}
+
+        # The dataset is rolled back at the end of the benchmark
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["testserver"], INSTRUMENTATION_SAMPLE_RATE=0
+        ):
+            user = User.objects.create_user(
+                username=uuid.uuid4().hex[:10], email=f"{uuid.uuid4().hex}@bench.local"
+            )
+            # The JWT authentication rejects the inactive users
+            user.is_active = True
+            user.save(update_fields=["is_active"])
+            seed_contacts(user, options["contacts"])
+            contact_ids = list(
+                Contacts.objects.filter(user=user).values_list("id", flat=True)
+            )
+            token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+            authorization = f"Bearer {token}"
+
+            for name, authentication_class in AUTHENTICATION_CLASSES.items():
+                results[name] = {
+                    "authenticate": self.measure_authenticate(
+                        authentication_class, authorization, options["requests"]
+                    ),
+                    "contact_detail": self.measure_detail(
+                        authentication_class,
+                        authorization,
+                        contact_ids,
+                        options["requests"],
+                    ),
+                }
+
+            transaction.set_rollback(True)
+
+        for name, result in results.items():
+            for step, measure in result.items():
+                self.stdout.write(
+                    f"{name:<11} {step:<15} p50={measure['p50_ms']:.3f}ms "
+                    f"p95={measure['p95_ms']:.3f}ms queries={measure['queries']:.2f}"
+                )
+        for step in ("authenticate", "contact_detail"):
+            saved = (
+                results["user_query"][step]["p50_ms"]
+                - results["claims"][step]["p50_ms"]
+            )
+            self.stdout.write(f"ahorro p50 en {step}: {saved:.3f}ms por petición")
+
+        claims = results["claims"]
+        if claims["authenticate"]["queries"] or (
+            claims["contact_detail"]["queries"]
+            >= results["user_query"]["contact_detail"]["queries"]
+        ):
+            raise CommandError("La autenticación por claims consulta al usuario")
+        if (
+            claims["authenticate"]["p50_ms"]
+            > results["user_query"]["authenticate"]["p50_ms"]
+        ):
+            raise CommandError("La autenticación por claims es más lenta")
+        self.stdout.write(self.style.SUCCESS("Autenticación sin consultar al usuario"))
+
+    @staticmethod
+    def summarize(latencies, queries, requests):
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "p50_ms": quantiles[49],
+            "p95_ms": quantiles[94],
+            "queries": queries / requests,
+        }
+
+    def measure_authenticate(self, authentication_class, authorization, requests):
+        """
+        Time the authentication of a request alone.
+
+        Parameters:
+        authentication_class (type): The DRF authentication class.
+        authorization (str): The Authorization header of the requests.
+        requests (int): The number of authentications measured.
+
+        Returns:
+        dict: The latency percentiles in milliseconds and the queries per request,
+            with the cache of the active state already filled.
+        """
+        authentication = authentication_class()
+        request = Request(
+            APIRequestFactory().get("/", HTTP_AUTHORIZATION=authorization)
+        )
+        authentication.authenticate(request)
+        latencies = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                begin = time.perf_counter()
+                authentication.authenticate(request)
+                latencies.append((time.perf_counter() - begin) * 1000)
+        return self.summarize(latencies, len(queries), requests)
+
+    def measure_detail(
+        self, authentication_class, authorization, contact_ids, requests
+    ):
+        """
+        Time the detail of a contact with an authentication class.
+
+        Parameters:
+        authentication_class (type): The DRF authentication class of the view.
+        authorization (str): The Authorization header of the requests.
+        contact_ids (list): The contacts of the user.
+        requests (int): The number of requests measured.
+
+        Returns:
+        dict: The latency percentiles in milliseconds and the queries per request.
+        """
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=authorization)
+        authentication_classes = ContactViewSet.authentication_classes
+        ContactViewSet.authentication_classes = [authentication_class]
+        try:
+            # The first read of every contact fills the cache of the responses
+            for contact_id in contact_ids:
+                client.get(f"/api/contacts/{contact_id}/")
+            latencies = []
+            with CaptureQueriesContext(connection) as queries:
+                for index in range(requests):
+                    contact_id = contact_ids[index % len(contact_ids)]
+                    begin = time.perf_counter()
+                    response = client.get(f"/api/contacts/{contact_id}/")
+                    latencies.append((time.perf_counter() - begin) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f"El detalle respondió {response.status_code}"
+                        )
+        finally:
+            ContactViewSet.authentication_classes = authentication_classes
+        return self.summarize(latencies, len(queries), requests)
@@ -0,0 +1,191 @@
+import statistics
+import time
+import uuid
+
+from allauth.account.models import EmailAddress
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+
+PASSWORD = "Bench-Password-2024"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo del hasher de contraseñas con varias iteraciones y el inicio de "
+        "sesión con las configuradas, recomienda las iteraciones que caben en "
+        "LOGIN_LATENCY_SLO_MS y comprueba que los intentos rechazados por el límite "
+        "de intentos no llegan al hasher"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            default="100000,260000,480000,720000,1000000",
+            help="Iteraciones medidas separadas por comas",
+        )
+        parser.add_argument(
+            "--samples", type=int, default=5, help="Mediciones por caso"
+        )
+        parser.add_argument(
+            "--slo-ms", type=float, help="Por defecto LOGIN_LATENCY_SLO_MS"
+        )
+        parser.add_argument(
+            "--attempts",
+            type=int,
+            default=40,
+            help="Intentos fallidos seguidos de la ráfaga",
+        )
+
+    def handle(self, *args, **options):
+        slo_ms = options["slo_ms"] or settings.LOGIN_LATENCY_SLO_MS
+        hasher = get_hasher()
+        salt = hasher.salt()
+        for iterations in sorted(
+            int(value) for value in options["iterations"].split(",")
+        ):
+            hash_ms = self.time_hash(hasher, salt, iterations, options["samples"])
+            self.stdout.write(f"iteraciones={iterations:<9} hash={hash_ms:.1f}ms")
+
+        hash_ms = self.time_hash(hasher, salt, hasher.iterations, options["samples"])
+        # A new address and username per run, so the counters of an earlier run in
+        # a shared cache do not throttle this one
+        address = f"10.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}.1"
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["testserver"], INSTRUMENTATION_SAMPLE_RATE=0
+        ):
+            user = User.objects.create_user(
+                username=uuid.uuid4().hex[:10],
+                email=f"{uuid.uuid4().hex}@bench.local",
+                password=PASSWORD,
+            )
+            user.is_active = True
+            user.save(update_fields=["is_active"])
+            # The login requires a verified email
+            EmailAddress.objects.create(
+                user=user, email=user.email, verified=True, primary=True
+            )
+            client = APIClient(REMOTE_ADDR=address)
+            login_ms = self.time_login(client, user, options["samples"])
+            burst = self.run_burst(client, user, options["attempts"])
+            transaction.set_rollback(True)
+
+        # The PBKDF2 cost grows linearly with the iterations, the rest of the login
+        # does not depend on them
+        overhead_ms = max(login_ms - hash_ms, 0)
+        budget_ms = slo_ms - overhead_ms
+        recommended = int(budget_ms / hash_ms * hasher.iterations) // 10_000 * 10_000
+        self.stdout.write(
+            f"configuradas={hasher.iterations} hash={hash_ms:.1f}ms "
+            f"inicio de sesión p50={login_ms:.1f}ms resto={overhead_ms:.1f}ms "
+            f"SLO={slo_ms:.0f}ms"
+        )
+        self.stdout.write(f"iteraciones recomendadas: {max(recommended, 0)}")
+        self.stdout.write(
+            f"ráfaga de {options['attempts']} intentos: "
+            f"{len(burst['checked'])} comprobados p50="
+            f"{statistics.median(burst['checked']):.1f}ms, "
+            f"{len(burst['throttled'])} rechazados p50="
+            f"{statistics.median(burst['throttled'] or [0]):.2f}ms, "
+            f"{burst['hashes']} hashes"
+        )
+
+        if login_ms > slo_ms:
+            raise CommandError(
+                f"El inicio de sesión tarda {login_ms:.1f}ms, más que el SLO, usa "
+                f"PASSWORD_HASHER_ITERATIONS={max(recommended, 0)} o menos"
+            )
+        if not burst["throttled"]:
+            raise CommandError("Ningún intento de la ráfaga fue rechazado")
+        if burst["hashes"] > len(burst["checked"]):
+            raise CommandError("Los intentos rechazados llegaron al hasher")
+        self.stdout.write(self.style.SUCCESS("Inicio de sesión dentro del SLO"))
+
+    @staticmethod
+    def time_hash(hasher, salt, iterations, samples):
+        """Get the median milliseconds of a hash with some iterations."""
+        latencies = []
+        for _ in range(samples):
+            begin = time.perf_counter()
+            hasher.encode(PASSWORD, salt, iterations)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        return statistics.median(latencies)
+
+    @staticmethod
+    def time_login(client, user, samples):
+        """
+        Time the successful logins of a user.
+
+        Parameters:
+        client (APIClient): The client of the benchmark.
+        user (User): The user, with the PASSWORD password.
+        samples (int): The number of logins measured.
+
+        Returns:
+        float: The median milliseconds of a login.
+        """
+        latencies = []
+        for _ in range(samples):
+            begin = time.perf_counter()
+            response = client.post(
+                "/api/auth/login/",
+                {"username": user.username, "password": PASSWORD},
+                format="json",
+            )
+            latencies.append((time.perf_counter() - begin) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f"El inicio de sesión respondió {response.status_code}"
+                )
+        return statistics.median(latencies)
+
+    @staticmethod
+    def run_burst(client, user, attempts):
+        """
+        Send a burst of logins with a wrong password, as a credential stuffing would.
+
+        The verifications of the hasher are counted while the burst runs.
+
+        Parameters:
+        client (APIClient): The client of the benchmark.
+        user (User): The attacked user.
+        attempts (int): The number of attempts.
+
+        Returns:
+        dict: The milliseconds of the checked and of the throttled attempts and the
+            number of hashes.
+        """
+        hasher_class = type(get_hasher())
+        verify = hasher_class.verify
+        burst = {"checked": [], "throttled": [], "hashes": 0}
+
+        def counted_verify(self, password, encoded):
+            burst["hashes"] += 1
+            return verify(self, password, encoded)
+
+        hasher_class.verify = counted_verify
+        try:
+            for _ in range(attempts):
+                begin = time.perf_counter()
+                response = client.post(
+                    "/api/auth/login/",
+                    {"username": user.username, "password": "wrong-password"},
+                    format="json",
+                )
+                elapsed = (time.perf_counter() - begin) * 1000
+                if response.status_code == 429:
+                    burst["throttled"].append(elapsed)
+                elif response.status_code == 400:
+                    burst["checked"].append(elapsed)
+                else:
+                    raise CommandError(
+                        f"El intento fallido respondió {response.status_code}"
+                    )
+        finally:
+            hasher_class.verify = verify
+        return burst
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.authentication.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las revocaciones de los tokens que ya expiraron. Pensado para "
+        "ejecutarse periódicamente, por ejemplo desde cron: "
+        "0 4 * * * python manage.py purge_revoked_tokens"
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"revocaciones eliminadas={purge_expired()}")
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.4 on 2026-10-18 03:31
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        db_index=True,
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("jti", models.CharField(max_length=255, unique=True)),
+                ("expires", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["created"], name="revoked_tokens_created_idx"),
+                    models.Index(fields=["expires"], name="revoked_tokens_expires_idx"),
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,26 @@
 from django.db import models
 
-# Create your models here.
+from apps.abstracts.models import AbstractModel
+
+
+class RevokedToken(AbstractModel):
+    """
+    A revoked JWT, rejected until it expires, see apps.authentication.revocation.
+
+    Args:
+        jti ( str ): the unique identifier of the token.
+        expires ( datetime ): the expiration of the token, the row is not needed after it.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Incremental loads of the revocations since the last refresh
+            models.Index(fields=["created"], name="revoked_tokens_created_idx"),
+            models.Index(fields=["expires"], name="revoked_tokens_expires_idx"),
+        ]
+
+    def __str__(self):
+        return self.jti
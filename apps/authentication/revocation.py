@@ -0,0 +1,115 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.authentication.models import RevokedToken
+from utils import metrics
+
+# Revocations created this long before the newest one already loaded are read again,
+# so the rows committed late or written by a host with a skewed clock are not missed
+LOAD_OVERLAP = timedelta(seconds=60)
+
+_lock = threading.Lock()
+_revoked = {}
+_state = {"loaded_until": None, "next_load": 0.0}
+
+
+def load_revocations(force=False):
+    """
+    Load the revocations created since the last load into the set of the process.
+
+    The set is read again every TOKEN_REVOCATION_REFRESH_SECONDS, so a token revoked
+    by another worker is rejected by this one after that delay at most. Only the
+    revocations created since the last load are read, with an index, and the expired
+    ones are dropped from the set.
+
+    Parameters:
+    force (bool): Load even if the refresh interval has not passed.
+
+    Returns:
+    None
+    """
+    if not force and time.monotonic() < _state["next_load"]:
+        return
+    with _lock:
+        # Another thread may have loaded them while this one waited
+        if not force and time.monotonic() < _state["next_load"]:
+            return
+        now = timezone.now()
+        queryset = RevokedToken.objects.filter(expires__gt=now)
+        if _state["loaded_until"] is not None:
+            queryset = queryset.filter(
+                created__gte=_state["loaded_until"] - LOAD_OVERLAP
+            )
+        rows = list(queryset.values_list("jti", "expires", "created"))
+        for jti, expires, _ in rows:
+            _revoked[jti] = expires
+        for jti in [jti for jti, expires in _revoked.items() if expires <= now]:
+            del _revoked[jti]
+        if rows:
+            newest = max(created for _, _, created in rows)
+            if _state["loaded_until"] is None or newest > _state["loaded_until"]:
+                _state["loaded_until"] = newest
+        elif _state["loaded_until"] is None:
+            _state["loaded_until"] = now
+        _state["next_load"] = (
+            time.monotonic() + settings.TOKEN_REVOCATION_REFRESH_SECONDS
+        )
+        metrics.increment("token_revocation_loads")
+
+
+def is_revoked(jti):
+    """
+    Check whether a token is revoked, without a query between two loads.
+
+    The set holds the exact identifiers of the revoked tokens, so a token found in it
+    is revoked without confirming it in the database.
+
+    Parameters:
+    jti (str): The unique identifier of the token.
+
+    Returns:
+    bool: Whether the token is revoked.
+    """
+    load_revocations()
+    return jti in _revoked
+
+
+def revoke_tokens(tokens):
+    """
+    Revoke some tokens in the database and in the set of the process.
+
+    Parameters:
+    tokens (list): The validated tokens.
+
+    Returns:
+    None
+    """
+    revocations = {
+        token["jti"]: datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+        for token in tokens
+    }
+    RevokedToken.objects.bulk_create(
+        [
+            RevokedToken(jti=jti, expires=expires)
+            for jti, expires in revocations.items()
+        ],
+        ignore_conflicts=True,
+    )
+    with _lock:
+        _revoked.update(revocations)
+    metrics.increment("revoked_tokens", len(revocations))
+
+
+def purge_expired():
+    """
+    Delete the revocations of the expired tokens.
+
+    Returns:
+    int: The number of deleted revocations.
+    """
+    return RevokedToken.objects.filter(expires__lte=timezone.now()).delete()[0]
@@ -0,0 +1,57 @@
+from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+from apps.authentication.revocation import is_revoked
+
+# Claims of the user added to the tokens, see ClaimsJWTAuthentication
+USER_CLAIMS = ("username", "is_staff", "is_active")
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair serializer that embeds the claims of the user in the tokens.
+
+    The access tokens created from the refresh token copy its claims, so the refreshed
+    tokens carry them too.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Refresh token that is not valid once revoked, see apps.authentication.revocation."""
+
+    def verify(self):
+        super().verify()
+        if is_revoked(self.payload.get(api_settings.JTI_CLAIM)):
+            raise TokenError(_("Token is blacklisted"))
+
+
+class RevocableTokenRefreshSerializer(CookieTokenRefreshSerializer):
+    """Refresh serializer of dj-rest-auth that rejects the revoked refresh tokens."""
+
+    token_class = RevocableRefreshToken
+
+
+class RevocableTokenVerifySerializer(TokenVerifySerializer):
+    """Verify serializer that reports the revoked tokens as not valid."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        token = UntypedToken(attrs["token"])
+        if is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise ValidationError(_("Token is blacklisted"))
+        return data
@@ -1,3 +1,115 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
 
-# Create your tests here.
+from apps.authentication.throttling import (
+    get_backoff,
+    get_window_wait,
+    record_login_attempt,
+    reserve_login_attempt,
+)
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "contacts": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+
+class WindowWaitTests(SimpleTestCase):
+    def test_attempt_under_the_limit_does_not_wait(self):
+        self.assertEqual(get_window_wait(10, 0, 9, 30, 60), 0)
+
+    def test_previous_window_is_weighted_by_its_share_left(self):
+        # Half of the previous window is left: 10 * 0.5 + 4 = 9 attempts
+        self.assertEqual(get_window_wait(10, 10, 4, 30, 60), 0)
+        # 10 * (1 - 20 / 60) + 5 is over the limit until 10 seconds later
+        self.assertAlmostEqual(get_window_wait(10, 10, 5, 20, 60), 10)
+
+    def test_full_current_window_waits_until_its_end(self):
+        self.assertEqual(get_window_wait(10, 0, 10, 20, 60), 40)
+
+
+@override_settings(
+    LOGIN_BACKOFF_FREE_FAILURES=3,
+    LOGIN_BACKOFF_BASE_SECONDS=1.0,
+    LOGIN_BACKOFF_MAX_SECONDS=60.0,
+)
+class BackoffTests(SimpleTestCase):
+    def test_free_failures_are_not_locked(self):
+        self.assertEqual([get_backoff(failures) for failures in range(4)], [0] * 4)
+
+    def test_backoff_doubles_up_to_the_maximum(self):
+        self.assertEqual(
+            [get_backoff(failures) for failures in range(4, 12)],
+            [1, 2, 4, 8, 16, 32, 60, 60],
+        )
+
+    def test_long_series_of_failures_does_not_overflow(self):
+        self.assertEqual(get_backoff(10_000), 60)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    LOGIN_THROTTLE_WINDOW_SECONDS=60,
+    LOGIN_THROTTLE_IP_LIMIT=100,
+    LOGIN_THROTTLE_USERNAME_LIMIT=3,
+    LOGIN_BACKOFF_FREE_FAILURES=2,
+    LOGIN_BACKOFF_BASE_SECONDS=30.0,
+    LOGIN_BACKOFF_MAX_SECONDS=60.0,
+)
+class ReserveLoginAttemptTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def build_request(self, address="10.0.0.1"):
+        return RequestFactory().post("/api/auth/login/", REMOTE_ADDR=address)
+
+    def test_attempts_over_the_limit_are_rejected_before_the_check(self):
+        # Only reserved, as concurrent attempts would be before their results
+        waits = [
+            reserve_login_attempt(self.build_request(f"10.0.0.{index}"), "eva")
+            for index in range(5)
+        ]
+
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertGreater(waits[3], 0)
+        self.assertGreater(waits[4], 0)
+
+    def test_rejected_attempts_give_their_reservation_back(self):
+        for _ in range(3):
+            reserve_login_attempt(self.build_request(), "eva")
+        for _ in range(5):
+            reserve_login_attempt(self.build_request(), "eva")
+
+        # Another username of the address is still allowed, the rejected attempts
+        # of the first one did not fill the window of the address
+        with self.settings(LOGIN_THROTTLE_IP_LIMIT=4):
+            self.assertEqual(reserve_login_attempt(self.build_request(), "ana"), 0)
+
+    def test_failures_lock_the_username_and_a_success_clears_it(self):
+        request = self.build_request()
+        for _ in range(3):
+            self.assertEqual(reserve_login_attempt(request, "eva"), 0)
+            record_login_attempt(request, "eva", succeeded=False)
+
+        wait = reserve_login_attempt(self.build_request("10.0.0.2"), "Eva ")
+        self.assertGreater(wait, 29)
+        self.assertLessEqual(wait, 30)
+
+        record_login_attempt(request, "eva", succeeded=True)
+        with self.settings(LOGIN_THROTTLE_USERNAME_LIMIT=0):
+            self.assertEqual(
+                reserve_login_attempt(self.build_request("10.0.0.2"), "eva"), 0
+            )
+
+    def test_a_success_does_not_clear_the_address(self):
+        request = self.build_request()
+        for username in ("eva", "ana", "luis"):
+            self.assertEqual(reserve_login_attempt(request, username), 0)
+            record_login_attempt(request, username, succeeded=False)
+
+        # A valid account of the same address does not unlock it
+        record_login_attempt(request, "ana", succeeded=True)
+        self.assertGreater(reserve_login_attempt(request, "ana"), 29)
+        self.assertEqual(
+            reserve_login_attempt(self.build_request("10.0.0.2"), "ana"), 0
+        )
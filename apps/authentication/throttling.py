@@ -0,0 +1,203 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+ATTEMPTS_KEY = "login:attempts:{scope}:{ident}:{window}"
+FAILURES_KEY = "login:failures:{scope}:{ident}"
+LOCK_KEY = "login:lock:{scope}:{ident}"
+
+
+def get_identities(request, username):
+    """
+    Get the identities a login attempt is counted for.
+
+    The address honours the NUM_PROXIES setting of DRF, the username is normalized
+    and hashed, so the keys are short and valid in every cache backend.
+
+    Parameters:
+    request: The request of the attempt.
+    username (str): The username sent in the attempt, it may be empty.
+
+    Returns:
+    dict: The identity of the attempt by scope, ip and username.
+    """
+    identities = {"ip": BaseThrottle().get_ident(request)}
+    username = username.strip().lower()
+    if username:
+        identities["username"] = hashlib.sha256(username.encode()).hexdigest()[:32]
+    return identities
+
+
+def get_limit(scope):
+    """Get the attempts allowed per window in a scope, 0 for no limit."""
+    return {
+        "ip": settings.LOGIN_THROTTLE_IP_LIMIT,
+        "username": settings.LOGIN_THROTTLE_USERNAME_LIMIT,
+    }[scope]
+
+
+def get_window_wait(limit, previous, current, elapsed, window):
+    """
+    Get the seconds until a sliding window counter accepts another attempt.
+
+    The counter weights the attempts of the previous fixed window by the share of it
+    still inside the sliding window, so it needs two counters per identity only.
+
+    Parameters:
+    limit (int): The attempts allowed per window.
+    previous (int): The attempts of the previous fixed window.
+    current (int): The attempts of the current fixed window.
+    elapsed (float): The seconds elapsed in the current fixed window.
+    window (int): The seconds of the window.
+
+    Returns:
+    float: The seconds to wait, 0 when the attempt is allowed.
+    """
+    if previous * (1 - elapsed / window) + current < limit:
+        return 0.0
+    if current >= limit:
+        return window - elapsed
+    return window * (1 - (limit - current) / previous) - elapsed
+
+
+def reserve_login_attempt(request, username):
+    """
+    Reserve a login attempt in the windows of its identities before it is checked.
+
+    The locks of the backoff and the previous windows are read with a single cache
+    call, then the counters of the current windows are incremented, so concurrent
+    attempts see each other before any of them reaches the password hasher. A
+    rejected attempt gives its reservation back and never touches the database nor
+    the hasher, so it is cheap.
+
+    Parameters:
+    request: The request of the attempt.
+    username (str): The username sent in the attempt.
+
+    Returns:
+    float: The seconds to wait, 0 when the attempt is reserved and may be checked.
+    """
+    now = time.time()
+    window = settings.LOGIN_THROTTLE_WINDOW_SECONDS
+    index, elapsed = divmod(now, window)
+    keys = {}
+    for scope, ident in get_identities(request, username).items():
+        keys[scope] = (
+            LOCK_KEY.format(scope=scope, ident=ident),
+            ATTEMPTS_KEY.format(scope=scope, ident=ident, window=int(index) - 1),
+            ATTEMPTS_KEY.format(scope=scope, ident=ident, window=int(index)),
+        )
+    values = cache.get_many(
+        [
+            key
+            for lock_key, previous_key, _ in keys.values()
+            for key in (lock_key, previous_key)
+        ]
+    )
+    wait = max(values.get(lock_key, now) - now for lock_key, _, _ in keys.values())
+    if wait > 0:
+        return wait
+
+    reserved = []
+    for scope, (_, previous_key, current_key) in keys.items():
+        limit = get_limit(scope)
+        if not limit:
+            continue
+        # The counter is read as the previous window during the next one
+        current = increment(current_key, timeout=2 * window)
+        reserved.append(current_key)
+        # The attempt itself is already counted, the ones before it have to leave
+        # room for it
+        wait = max(
+            wait,
+            get_window_wait(
+                limit, values.get(previous_key, 0), current - 1, elapsed, window
+            ),
+        )
+    if wait > 0:
+        for key in reserved:
+            try:
+                cache.decr(key)
+            except ValueError:
+                pass
+    return wait
+
+
+def increment(key, timeout):
+    """Increment a counter of the cache, created with a timeout when missing."""
+    cache.add(key, 0, timeout=timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The counter expired between the two calls
+        cache.set(key, 1, timeout=timeout)
+        return 1
+
+
+def get_backoff(failures):
+    """
+    Get the seconds an identity is locked after some consecutive failures.
+
+    Parameters:
+    failures (int): The consecutive failed attempts of the identity.
+
+    Returns:
+    float: The seconds of the lock, doubled on every failure after the first
+        LOGIN_BACKOFF_FREE_FAILURES ones and capped at LOGIN_BACKOFF_MAX_SECONDS.
+    """
+    exceeded = failures - settings.LOGIN_BACKOFF_FREE_FAILURES
+    if exceeded <= 0:
+        return 0.0
+    # The exponent is capped so a long series of failures does not overflow
+    return min(
+        settings.LOGIN_BACKOFF_BASE_SECONDS * 2 ** min(exceeded - 1, 32),
+        settings.LOGIN_BACKOFF_MAX_SECONDS,
+    )
+
+
+def record_login_attempt(request, username, succeeded):
+    """
+    Record the result of a checked login attempt, already counted in the windows by
+    reserve_login_attempt.
+
+    A failure extends the consecutive failures of the address and of the username
+    and locks them with an exponential backoff. A success clears the username only,
+    so a valid account of an attacker does not reset the address, whose failures are
+    forgotten after LOGIN_BACKOFF_MAX_SECONDS without another one.
+
+    Parameters:
+    request: The request of the attempt.
+    username (str): The username sent in the attempt.
+    succeeded (bool): Whether the credentials were valid.
+
+    Returns:
+    None
+    """
+    now = time.time()
+    identities = get_identities(request, username)
+    if succeeded:
+        if "username" in identities:
+            cache.delete_many(
+                [
+                    key.format(scope="username", ident=identities["username"])
+                    for key in (FAILURES_KEY, LOCK_KEY)
+                ]
+            )
+        return
+
+    timeout = math.ceil(settings.LOGIN_BACKOFF_MAX_SECONDS)
+    for scope, ident in identities.items():
+        failures_key = FAILURES_KEY.format(scope=scope, ident=ident)
+        failures = increment(failures_key, timeout=timeout)
+        cache.touch(failures_key, timeout=timeout)
+        backoff = get_backoff(failures)
+        if backoff:
+            cache.set(
+                LOCK_KEY.format(scope=scope, ident=ident),
+                now + backoff,
+                timeout=math.ceil(backoff),
+            )
@@ -1,31 +1,28 @@
 # authentication/urls.py
 
-from dj_rest_auth.jwt_auth import get_refresh_view
 from dj_rest_auth.registration.views import (
     RegisterView,
     ResendEmailVerificationView,
     VerifyEmailView,
 )
-from dj_rest_auth.views import (
-    LoginView,
-    LogoutView,
-    PasswordResetConfirmView,
-    PasswordResetView,
-)
+from dj_rest_auth.views import PasswordResetConfirmView, PasswordResetView
 from django.urls import path
 from rest_framework_simplejwt.views import TokenVerifyView
 
 from apps.authentication.views import (
+    Login,
+    Logout,
+    RefreshView,
     email_confirm_redirect,
     password_reset_confirm_redirect,
 )
 
 urlpatterns = [
     path("register/", RegisterView.as_view(), name="rest_register"),
-    path("login/", LoginView.as_view(), name="rest_login"),
-    path("logout/", LogoutView.as_view(), name="rest_logout"),
+    path("login/", Login.as_view(), name="rest_login"),
+    path("logout/", Logout.as_view(), name="rest_logout"),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
-    path("token/refresh/", get_refresh_view().as_view(), name="token_refresh"),
+    path("token/refresh/", RefreshView.as_view(), name="token_refresh"),
     path("register/verify-email/", VerifyEmailView.as_view(), name="rest_verify_email"),
     path(
         "register/resend-email/",
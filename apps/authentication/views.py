@@ -1,7 +1,25 @@
 # authentication/views.py
 
+import math
+
+from dj_rest_auth.jwt_auth import get_refresh_view
+from dj_rest_auth.views import LoginView
 from django.conf import settings
 from django.http import HttpResponseRedirect
+from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.authentication.revocation import revoke_tokens
+from apps.authentication.serializers import RevocableTokenRefreshSerializer
+from apps.authentication.throttling import (
+    record_login_attempt,
+    reserve_login_attempt,
+)
+from utils import metrics
 
 
 def email_confirm_redirect(request, key):
@@ -12,3 +30,118 @@ def password_reset_confirm_redirect(request, uidb64, token):
     return HttpResponseRedirect(
         f"{settings.PASSWORD_RESET_CONFIRM_REDIRECT_BASE_URL}{uidb64}/{token}/"
     )
+
+
+class Login(LoginView):
+    """
+    Login view of dj-rest-auth throttled by address and by username.
+
+    The attempts over the sliding window limits or during the backoff of a failed
+    one are rejected before the credentials are checked, so they never reach the
+    password hasher, see apps.authentication.throttling.
+    """
+
+    def post(self, request, *args, **kwargs):
+        """
+        Log in unless the address or the username has to wait.
+
+        Args:
+        self: The Login instance.
+        request: The request object, with the credentials in the body.
+
+        Returns:
+        Response: The tokens of the user, or a 429 response with the Retry-After
+            header when the attempt is throttled.
+
+        Raises:
+        ValidationError: If the credentials are invalid.
+        """
+        username = str(request.data.get("username") or request.data.get("email") or "")
+        wait = reserve_login_attempt(request, username)
+        if wait > 0:
+            metrics.increment("login_attempts", result="throttled")
+            response = Response(
+                {
+                    "message": "Demasiados intentos de inicio de sesión, intenta de "
+                    "nuevo más tarde"
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+            response["Retry-After"] = str(math.ceil(wait))
+            return response
+        try:
+            response = super().post(request, *args, **kwargs)
+        except ValidationError:
+            metrics.increment("login_attempts", result="failed")
+            record_login_attempt(request, username, succeeded=False)
+            raise
+        metrics.increment("login_attempts", result="succeeded")
+        record_login_attempt(request, username, succeeded=True)
+        return response
+
+
+class RefreshView(get_refresh_view()):
+    """Refresh view of dj-rest-auth that rejects the revoked refresh tokens."""
+
+    serializer_class = RevocableTokenRefreshSerializer
+
+
+class Logout(APIView):
+    """
+    Log out by revoking the access token of the request and the refresh token.
+
+    The tokens are revoked in the database and rejected by every worker within
+    TOKEN_REVOCATION_REFRESH_SECONDS, see apps.authentication.revocation. The request
+    is not authenticated and an expired or invalid token is skipped, so an expired or
+    already revoked access token does not prevent revoking the refresh token.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        """
+        Revoke the tokens of the session.
+
+        Args:
+        self: The Logout instance.
+        request: The request object, with the access token in the Authorization
+            header and the refresh token in the refresh field of the body.
+
+        Returns:
+        Response: A response indicating the status of the logout.
+
+        Raises:
+        N/A
+        """
+        tokens = []
+        received = False
+        scheme, _, access = request.headers.get("Authorization", "").partition(" ")
+        candidates = [
+            (AccessToken, access if scheme.lower() == "bearer" else ""),
+            (RefreshToken, request.data.get("refresh", "")),
+        ]
+        for token_class, raw_token in candidates:
+            if not raw_token:
+                continue
+            received = True
+            try:
+                tokens.append(token_class(raw_token))
+            except TokenError:
+                # An expired or invalid token needs no revocation, the other one
+                # is still revoked
+                continue
+        if not tokens:
+            if received:
+                return Response(
+                    {"message": "El token no es válido o ya expiró"},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+            return Response(
+                {"message": "No se recibió ningún token"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        revoke_tokens(tokens)
+        return Response(
+            {"message": "Sesión cerrada correctamente!"}, status=status.HTTP_200_OK
+        )
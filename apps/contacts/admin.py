@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from apps.contacts.models import Contacts
+from apps.contacts.models import ContactImport, Contacts
 
 
 class ContactAdmin(admin.ModelAdmin):
@@ -23,3 +23,20 @@ class ContactAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Contacts, ContactAdmin)
+
+
+class ContactImportAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "user",
+        "file_format",
+        "status",
+        "processed",
+        "created_contacts",
+        "failed",
+        "created",
+    )
+    list_filter = ("status",)
+
+
+admin.site.register(ContactImport, ContactImportAdmin)
@@ -0,0 +1,32 @@
+from apps.contacts.api.serializers import ContactListSerializer
+from apps.contacts.api.viewsets import ContactViewSet
+from apps.contacts.models import CONTACT_RELATIONS, Contacts
+from utils.views import AsyncReadOnlyView
+
+
+class AsyncContactView(AsyncReadOnlyView):
+    """Async list and detail of the contacts, with the filters of ContactViewSet."""
+
+    serializer_class = ContactListSerializer
+    list_serializer_class = ContactListSerializer
+    filter_backends = ContactViewSet.filter_backends
+    filterset_class = ContactViewSet.filterset_class
+    search_fields = ContactViewSet.search_fields
+    ordering_fields = ContactViewSet.ordering_fields
+    keyset_ordering = ContactViewSet.keyset_ordering
+
+    def get_queryset(self):
+        """
+        Get the active contacts of the authenticated user.
+
+        The relations are prefetched by aiterator and aget with one query per relation.
+
+        Returns:
+        queryset: The contacts of the user ordered by name, last name and id.
+        """
+        return (
+            Contacts.objects.filter(user=self.request.user, is_active=True)
+            .defer("search_document", "search_vector")
+            .prefetch_related(*CONTACT_RELATIONS)
+            .order_by("name", "last_name", "id")
+        )
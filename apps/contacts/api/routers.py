@@ -1,7 +1,18 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from apps.contacts.api.viewsets import ContactViewSet
+from apps.contacts.api.async_views import AsyncContactView
+from apps.contacts.api.viewsets import ContactImportViewSet, ContactViewSet
 
 router = DefaultRouter()
+# Registered before the contacts, so imports is not read as the id of a contact
+router.register(r"contacts/imports", ContactImportViewSet, basename="contact-imports")
 router.register(r"contacts", ContactViewSet, basename="contacts")
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/contacts/", AsyncContactView.as_view(), name="contacts-async-list"),
+    path(
+        "async/contacts/<str:pk>/",
+        AsyncContactView.as_view(),
+        name="contacts-async-detail",
+    ),
+]
@@ -1,8 +1,18 @@
+import os
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
 from apps.address.api.serializers import AddressSerializer
 from apps.address.models import Address
-from apps.contacts.models import Contacts
+from apps.contacts.export import RELATION_FIELDS
+from apps.contacts.models import (
+    IMPORT_FORMAT_CHOICES,
+    ContactImport,
+    ContactImportError,
+    Contacts,
+)
 from apps.emails.api.serializers import EmailSerializer
 from apps.emails.models import Emails
 from apps.important_dates.api.serializers import ImportantDateSerializer
@@ -12,7 +22,8 @@ from apps.phones.models import Phones
 from apps.related_persons.api.serializers import RelatedPersonSerializer
 from apps.related_persons.models import RelatedPersons
 from apps.tags.api.serializers import TagSerializer
-from apps.tags.models import Tags
+from apps.tags.cache import resolve_tags
+from utils.serializers import BulkStateSerializer
 
 
 class ContactSerializer(serializers.ModelSerializer):
@@ -114,6 +125,20 @@ class ContactUpdateSerializer(serializers.ModelSerializer):
             "is_active",
         )
 
+    def validate(self, data):
+        if "phones" in data and not data["phones"]:
+            raise serializers.ValidationError("Debe registrar por lo menos un telefono")
+        for relation, fields in RELATION_FIELDS.items():
+            if any(fields[0] not in item for item in data.get(relation, [])):
+                raise serializers.ValidationError(
+                    {relation: f"Falta el campo {fields[0]}"}
+                )
+        return data
+
+
+class ContactBulkStateSerializer(BulkStateSerializer):
+    cascade = serializers.BooleanField(default=False)
+
 
 class ContactsRegisterSerializer(serializers.ModelSerializer):
     phones = PhonesSerializer(many=True)
@@ -147,6 +172,7 @@ class ContactsRegisterSerializer(serializers.ModelSerializer):
             )
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         """
         Create a new contact instance and associated related objects.
@@ -212,10 +238,58 @@ class ContactsRegisterSerializer(serializers.ModelSerializer):
             # Add related person to contact
             contact.related_persons.add(related_person)
 
-        for tag_data in tags_data:
-            # Create each tag object related to the contact
-            tag = Tags.objects.create(**tag_data)
-            # Add tag to contact
-            contact.tags.add(tag)
+        # Add the canonical tags to contact
+        contact.tags.add(*resolve_tags(tags_data))
 
         return contact
+
+
+# Format of the imported documents by the extension of their name
+IMPORT_EXTENSIONS = {".vcf": "vcard", ".vcard": "vcard", ".csv": "csv"}
+
+
+class ContactImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContactImport
+        fields = (
+            "id",
+            "file_format",
+            "status",
+            "processed",
+            "created_contacts",
+            "failed",
+            "error",
+            "created",
+            "updated",
+            "finished",
+        )
+
+
+class ContactImportUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(
+        choices=list(IMPORT_FORMAT_CHOICES.items()), required=False
+    )
+
+    def validate(self, data):
+        if data["file"].size > settings.CONTACT_IMPORT_MAX_FILE_SIZE:
+            raise serializers.ValidationError(
+                {
+                    "file": "El archivo excede el tamaño máximo de "
+                    f"{settings.CONTACT_IMPORT_MAX_FILE_SIZE} bytes"
+                }
+            )
+        if "file_format" not in data:
+            extension = os.path.splitext(data["file"].name)[1].lower()
+            if extension not in IMPORT_EXTENSIONS:
+                raise serializers.ValidationError(
+                    {"file_format": "Indique el formato del archivo, vcard o csv"}
+                )
+            data["file_format"] = IMPORT_EXTENSIONS[extension]
+        return data
+
+
+class ContactImportErrorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContactImportError
+        fields = ("record", "errors")
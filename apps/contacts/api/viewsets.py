@@ -1,36 +1,94 @@
+from datetime import timedelta
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters import rest_framework
-from drf_spectacular.utils import OpenApiExample, extend_schema
-from rest_framework import filters, status, viewsets
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
+from rest_framework import filters, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 
 from apps.contacts.api.serializers import (
+    ContactBulkStateSerializer,
+    ContactImportErrorSerializer,
+    ContactImportSerializer,
+    ContactImportUploadSerializer,
     ContactListSerializer,
     ContactSerializer,
     ContactsRegisterSerializer,
     ContactUpdateSerializer,
 )
-from apps.contacts.models import Contacts
+from apps.contacts.bulk import (
+    build_contact,
+    bulk_create_contacts,
+    set_contacts_active,
+)
+from apps.contacts.cache import cached_response
+from apps.contacts.conditional import (
+    conditional_response,
+    get_contact_validators,
+    get_list_validators,
+)
+from apps.contacts.export import EXPORT_FORMATS
+from apps.contacts.imports import start_import
+from apps.contacts.models import CONTACT_RELATIONS, ContactImport, Contacts
+from apps.contacts.sync import (
+    SYNC_MAX_PAGE_SIZE,
+    SYNC_PAGE_SIZE,
+    InvalidSyncToken,
+    get_changes,
+)
+from apps.contacts.updates import update_contact
+from apps.important_dates.api.serializers import UpcomingDatesQuerySerializer
+from apps.important_dates.upcoming import get_upcoming_dates
 from apps.users.api.permissions import CreateUserPermission
-from utils.filters import ContactFilterSet
-from utils.pagination import ExtendedPagination
+from utils import metrics
+from utils.filters import ContactFilterSet, ContactFullTextSearchFilter
+from utils.pagination import ExtendedPagination, SelectablePagination
+from utils.views import BulkStateMixin, ReplicaReadMixin
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(ReplicaReadMixin, BulkStateMixin, viewsets.ModelViewSet):
     serializer_class = ContactSerializer
     register_serializer_class = ContactsRegisterSerializer
+    update_serializer_class = ContactUpdateSerializer
     list_serializer_class = ContactListSerializer
+    bulk_state_serializer_class = ContactBulkStateSerializer
     filter_backends = [
         rest_framework.DjangoFilterBackend,
         filters.SearchFilter,
+        ContactFullTextSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_class = ContactFilterSet
     search_fields = ("name", "last_name", "phones", "user")
     ordering_fields = ("name", "last_name", "phones", "user")
-    pagination_class = ExtendedPagination
+    pagination_class = SelectablePagination
+    keyset_ordering = ("name", "last_name", "id")
     permission_classes = [CreateUserPermission]
     queryset = Contacts.objects.filter(is_active=True)
+    bulk_max_contacts = 5000
+
+    def get_queryset(self):
+        """
+        Get the active contacts of the authenticated user.
+
+        The many to many relations are loaded with one batched query per relation,
+        so the number of queries does not depend on the size of the page.
+
+        Returns:
+        queryset: The contacts of the user ordered by name, last name and id.
+        """
+        if getattr(self, "swagger_fake_view", False):
+            return Contacts.objects.none()
+        return (
+            Contacts.objects.filter(user=self.request.user, is_active=True)
+            .defer("search_document", "search_vector")
+            .prefetch_related(*CONTACT_RELATIONS)
+            .order_by("name", "last_name", "id")
+        )
 
     @extend_schema(
         request=ContactsRegisterSerializer,
@@ -92,6 +150,252 @@ class ContactViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @extend_schema(
+        description="Registra varios contactos en una sola petición",
+        summary="Contacts",
+        request=ContactsRegisterSerializer(many=True),
+        responses={201: None, 400: None},
+    )
+    @action(methods=["post"], detail=False, url_path="bulk")
+    def bulk_create(self, request):
+        """
+        Create many contacts in a single request.
+
+        Every contact is validated on its own, so the invalid rows are reported with
+        their position in the request and the valid rows are still created. The valid
+        rows are written with bulk inserts inside a single transaction.
+
+        Args:
+        self: The ContactViewSet instance.
+        request: The request object containing a list of contacts.
+
+        Returns:
+        Response: A response with the number of created contacts and the errors per row.
+
+        Raises:
+        N/A
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"message": "Debe enviar una lista de contactos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > self.bulk_max_contacts:
+            return Response(
+                {
+                    "message": "Demasiados contactos en una sola petición, "
+                    f"el máximo es {self.bulk_max_contacts}"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        entries = []
+        errors = []
+        for index, contact_data in enumerate(request.data):
+            serializer = self.register_serializer_class(data=contact_data)
+            if serializer.is_valid():
+                entries.append(build_contact(request.user, serializer.validated_data))
+            else:
+                errors.append({"index": index, "error": serializer.errors})
+
+        created = bulk_create_contacts(entries)
+
+        return Response(
+            {
+                "message": "Registro masivo terminado",
+                "created": len(created),
+                "ids": [contact.id for contact in created],
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @extend_schema(
+        description="Exporta todos los contactos activos en formato NDJSON o CSV",
+        summary="Contacts",
+        parameters=[
+            OpenApiParameter(
+                "export_format", str, enum=list(EXPORT_FORMATS), default="ndjson"
+            )
+        ],
+        responses={200: None},
+    )
+    @action(methods=["get"], detail=False)
+    def export(self, request):
+        """
+        Export the whole address book of the user as a stream.
+
+        The contacts are read with a server side cursor and written to the response
+        while they are read, so the memory used does not depend on the number of contacts.
+
+        Args:
+        self: The ContactViewSet instance.
+        request: The request object.
+
+        Returns:
+        StreamingHttpResponse: A response streaming the contacts in the requested format.
+
+        Raises:
+        N/A
+        """
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"message": f"Formato no soportado: {export_format}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        exporter, content_type = EXPORT_FORMATS[export_format]
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(exporter(queryset), content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="contacts.{export_format}"'
+        )
+        return response
+
+    @extend_schema(
+        description="Obtiene los contactos creados, actualizados o eliminados desde "
+        "la última sincronización",
+        summary="Contacts",
+        parameters=[
+            OpenApiParameter("sync_token", str),
+            OpenApiParameter("page_size", int, default=SYNC_PAGE_SIZE),
+        ],
+        responses={200: None, 400: None},
+    )
+    @action(methods=["get"], detail=False)
+    def changes(self, request):
+        """
+        Get the changes of the address book of the user since the last sync.
+
+        Without a sync token every active contact is returned as created. The
+        deactivated contacts are returned as tombstones with their id and date, so the
+        client can remove them. While has_more is true the client must request the next
+        page with the new token.
+
+        Args:
+        self: The ContactViewSet instance.
+        request: The request object.
+
+        Returns:
+        Response: A response containing the created, updated and deleted contacts and
+            the new sync token.
+
+        Raises:
+        N/A
+        """
+        try:
+            page_size = int(request.query_params.get("page_size", SYNC_PAGE_SIZE))
+        except ValueError:
+            page_size = 0
+        if not 0 < page_size <= SYNC_MAX_PAGE_SIZE:
+            return Response(
+                {
+                    "message": "El tamaño de página debe estar entre 1 y "
+                    f"{SYNC_MAX_PAGE_SIZE}"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            changes = get_changes(
+                request.user, request.query_params.get("sync_token"), page_size
+            )
+        except InvalidSyncToken:
+            return Response(
+                {"message": "Token de sincronización inválido o expirado"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "created": self.list_serializer_class(
+                    changes["created"], many=True
+                ).data,
+                "updated": self.list_serializer_class(
+                    changes["updated"], many=True
+                ).data,
+                "deleted": [
+                    {"id": contact.id, "updated": contact.updated}
+                    for contact in changes["deleted"]
+                ],
+                "sync_token": changes["sync_token"],
+                "has_more": changes["has_more"],
+            }
+        )
+
+    @extend_schema(
+        description="Obtiene los cumpleaños, aniversarios y otras fechas importantes "
+        "de los contactos en los próximos días",
+        summary="Contacts",
+        parameters=[UpcomingDatesQuerySerializer],
+        responses={200: None, 400: None},
+    )
+    @action(methods=["get"], detail=False, url_path="upcoming-dates")
+    def upcoming_dates(self, request):
+        """
+        Get the important dates of the contacts of the user in the next days.
+
+        The dates are matched by their month and day with an index, so the query does
+        not read every date of the user, and the windows that cross the end of the
+        year are supported. The dates are ordered by their next anniversary.
+
+        Args:
+        self: The ContactViewSet instance.
+        request: The request object.
+
+        Returns:
+        Response: A response containing the upcoming dates with their contact, the
+            date of the next anniversary and the days until it.
+
+        Raises:
+        N/A
+        """
+        serializer = UpcomingDatesQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(
+                {"message": "Hay errores en la petición!", "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+        start = data.get("start") or timezone.localdate()
+        upcoming, has_more = get_upcoming_dates(
+            request.user, start, data["days"], data.get("type"), data["page_size"]
+        )
+        return Response(
+            {
+                "start": start,
+                "end": start + timedelta(days=data["days"] - 1),
+                "results": upcoming,
+                "has_more": has_more,
+            }
+        )
+
+    @extend_schema(
+        description="Obtiene los aciertos y fallos de la caché de contactos",
+        summary="Contacts",
+        responses={200: None},
+    )
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="cache-stats",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def cache_stats(self, request):
+        """
+        Get the hits and misses of the contacts cache of this process.
+
+        Args:
+        self: The ContactViewSet instance.
+        request: The request object.
+
+        Returns:
+        Response: A response containing the counters of the cache by action and result.
+
+        Raises:
+        N/A
+        """
+        return Response(metrics.snapshot().get("contacts_cache_requests", []))
+
     @extend_schema(
         description="Obtiene una colección de contactos",
         summary="Contacts",
@@ -106,35 +410,27 @@ class ContactViewSet(viewsets.ModelViewSet):
         self: The ContactViewSet instance.
         request: The request object.
 
+        The response is cached per user, query and ETag until the address book of
+        the user changes, and a 304 response is returned when the ETag or the date sent
+        in If-None-Match or If-Modified-Since are still valid.
+
         Returns:
         Response: A response containing a collection of contacts.
 
         Raises:
         N/A
         """
-        queryset = Contacts.objects.filter(user=request.user, is_active=True)
-        serializer = self.list_serializer_class(queryset, many=True)
-        data = serializer.data
-
-        for item in data:
-            phones_data = item.pop("phones", [])
-            item["phone"] = [phone["phone"] for phone in phones_data]
-            emails_data = item.pop("emails", [])
-            item["email"] = [email["email"] for email in emails_data]
-            addresses_data = item.pop("address", [])
-            item["address"] = [address["address"] for address in addresses_data]
-            important_dates_data = item.pop("important_dates", [])
-            item["important_date"] = [
-                important_date["important_date"]
-                for important_date in important_dates_data
-            ]
-            related_persons_data = item.pop("related_persons", [])
-            item["related_person"] = [
-                related_person["related_person"]
-                for related_person in related_persons_data
-            ]
-            tags_data = item.pop("tags", [])
-            item["tag"] = [tag["tag"] for tag in tags_data]
+        validators = get_list_validators(request)
+        return conditional_response(
+            request,
+            validators,
+            lambda: cached_response(
+                request, "list", self.build_list_response, etag=validators[0]
+            ),
+        )
+
+    def build_list_response(self):
+        queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -158,13 +454,29 @@ class ContactViewSet(viewsets.ModelViewSet):
         request: The request object.
         pk (int): The primary key of the contact to retrieve.
 
+        The response is cached per user and ETag until the contact changes, and a 304 response is returned when the contact was not modified.
+
         Returns:
         Response: A response containing the details of the contact.
 
         Raises:
         N/A
         """
-        queryset = Contacts.objects.filter(user=request.user, is_active=True)
+        validators = get_contact_validators(request, pk)
+        return conditional_response(
+            request,
+            validators,
+            lambda: cached_response(
+                request,
+                "retrieve",
+                lambda: self.build_retrieve_response(pk),
+                pk=pk,
+                etag=validators[0],
+            ),
+        )
+
+    def build_retrieve_response(self, pk):
+        queryset = Contacts.objects.filter(user=self.request.user, is_active=True)
         contact = get_object_or_404(queryset, pk=pk)
         resource_serializer = self.get_serializer(contact)
 
@@ -196,6 +508,24 @@ class ContactViewSet(viewsets.ModelViewSet):
             {"message": "Contacto eliminado correctamente!"}, status=status.HTTP_200_OK
         )
 
+    def get_bulk_state_queryset(self):
+        return Contacts.objects.filter(user=self.request.user)
+
+    def set_active(self, queryset, is_active, validated_data):
+        """
+        Soft delete or restore the selected contacts of the user.
+
+        Args:
+        queryset (QuerySet): The selected contacts.
+        is_active (bool): The new state of the contacts.
+        validated_data (dict): The validated data of a ContactBulkStateSerializer.
+
+        Returns:
+        dict: The number of updated contacts and, when cascade is requested, the
+            number of updated child objects per relation.
+        """
+        return set_contacts_active(queryset, is_active, validated_data["cascade"])
+
     @extend_schema(
         description="Actualiza un contacto",
         summary="Contacts",
@@ -206,72 +536,119 @@ class ContactViewSet(viewsets.ModelViewSet):
         """
         Partially update a contact.
 
+        The submitted relations replace the current children of the contact, only the
+        differences are written, in bulk and inside a single transaction.
+
         Args:
         self: The ContactUpdateViewSet instance.
         request: The request object containing the partially updated contact data.
         pk (int): The primary key of the contact to be partially updated.
 
         Returns:
-        Response: A response indicating the status of the partial update operation.
+        Response: A response indicating the status of the partial update operation and
+            the changes applied.
 
         Raises:
         N/A
         """
         queryset = Contacts.objects.filter(user=request.user, is_active=True)
         contact = get_object_or_404(queryset, pk=pk)
-        serializer = self.get_serializer(contact, data=request.data, partial=True)
+        serializer = self.update_serializer_class(
+            contact, data=request.data, partial=True
+        )
         serializer.is_valid(raise_exception=True)
 
-        # Associates the phones to created contact
-        phones_data = request.data.get("phones", [])
-        for phone_data in phones_data:
-            phone_number = phone_data["phone"]["number"]
-            phone_type = phone_data["phone_type"]
-            contact.phones.create(phone=phone_number, phone_type=phone_type)
-
-        # Associates the emails to created contact
-        emails_data = request.data.get("emails", [])
-        for email_data in emails_data:
-            email = email_data["email"]
-            email_type = email_data["email_type"]
-            contact.emails.create(email=email, email_type=email_type)
-
-        # Associates the address to created contact
-        addresses_data = request.data.get("address", [])
-        for address_data in addresses_data:
-            address = address_data["address"]
-            address_type = address_data["address_type"]
-            contact.address.create(address=address, address_type=address_type)
-
-        # Associates the important_dates to created contact
-        important_dates_data = request.data.get("important_dates", [])
-        for important_date_data in important_dates_data:
-            important_date = important_date_data["important_date"]
-            important_date_type = important_date_data["important_date_type"]
-            contact.important_dates.create(
-                important_date=important_date, important_date_type=important_date_type
-            )
+        changes = update_contact(contact, serializer.validated_data)
 
-        # Associates the related_persons to created contact
-        related_persons_data = request.data.get("related_persons", [])
-        for related_person_data in related_persons_data:
-            name = related_person_data["name"]
-            related_person_type = related_person_data["related_person_type"]
-            contact.related_persons.create(
-                name=name, related_person_type=related_person_type
-            )
+        return Response(
+            {"message": "El contacto se actualizó correctamente.", "changes": changes},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ContactImportViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    serializer_class = ContactImportSerializer
+    upload_serializer_class = ContactImportUploadSerializer
+    pagination_class = ExtendedPagination
+    parser_classes = [MultiPartParser]
 
-        serializer.save()
-        # Associates the tags to created contact
-        tags_data = request.data.get("tags", [])
-        for tag_data in tags_data:
-            tag = phone_data["tag"]
-            contact.tags.create(tag=tag)
+    def get_queryset(self):
+        """
+        Get the imports of the authenticated user, the newest first.
+
+        Returns:
+        queryset: The imports of the user.
+        """
+        if getattr(self, "swagger_fake_view", False):
+            return ContactImport.objects.none()
+        return ContactImport.objects.filter(user=self.request.user).order_by("-created")
+
+    @extend_schema(
+        description="Importa contactos desde un archivo vCard 3/4 o CSV",
+        summary="Contacts",
+        request=ContactImportUploadSerializer,
+        responses={202: ContactImportSerializer, 400: None},
+    )
+    def create(self, request):
+        """
+        Upload a vCard or CSV document and start the import of its contacts.
 
-        headers = self.get_success_headers(serializer.data)
+        The document is saved and imported after the response, the progress and the
+        errors of every record are returned by the detail of the import and by its
+        errors while it runs. The CSV documents use the columns of the CSV export.
 
+        Args:
+        self: The ContactImportViewSet instance.
+        request: The request object with the file and, optionally, its format.
+
+        Returns:
+        Response: A response containing the pending import.
+
+        Raises:
+        N/A
+        """
+        serializer = self.upload_serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"message": "Hay errores en la petición!", "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        contact_import = ContactImport.objects.create(
+            user=request.user, **serializer.validated_data
+        )
+        start_import(contact_import)
         return Response(
-            {"message": "El contacto se actualizó correctamente."},
-            status=status.HTTP_200_OK,
-            headers=headers,
+            self.get_serializer(contact_import).data, status=status.HTTP_202_ACCEPTED
         )
+
+    @extend_schema(
+        description="Obtiene los errores de los registros rechazados de una "
+        "importación",
+        summary="Contacts",
+        responses=ContactImportErrorSerializer(many=True),
+    )
+    @action(methods=["get"], detail=True)
+    def errors(self, request, pk=None):
+        """
+        Get the errors of the records rejected by an import, in document order.
+
+        Args:
+        self: The ContactImportViewSet instance.
+        request: The request object.
+        pk (str): The primary key of the import.
+
+        Returns:
+        Response: A page of the errors with the position of their record.
+
+        Raises:
+        N/A
+        """
+        contact_import = self.get_object()
+        page = self.paginate_queryset(contact_import.errors.order_by("record", "id"))
+        serializer = ContactImportErrorSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ContactsConfig(AppConfig):
     name = "apps.contacts"
+
+    def ready(self):
+        from apps.contacts import signals  # noqa: F401
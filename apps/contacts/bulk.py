@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.utils import timezone
+
+from apps.abstracts.models import bulk_set_active
+from apps.contacts.cache import schedule_version_bump
+from apps.contacts.models import CONTACT_RELATIONS, SHARED_RELATIONS, Contacts
+from apps.contacts.search import refresh_search_documents
+from apps.tags.cache import resolve_tags
+
+# Contacts per UPDATE of the child objects when the state change is cascaded
+CASCADE_CHUNK_SIZE = 10_000
+
+
+def build_contact(user, validated_data):
+    """
+    Build an unsaved contact and its unsaved child objects from validated data.
+
+    Parameters:
+    user (User): The owner of the contact.
+    validated_data (dict): The validated data of a ContactsRegisterSerializer.
+
+    Returns:
+    tuple: The unsaved contact and a dictionary with the name of the relation as key
+        and a list of unsaved child objects as value.
+    """
+    data = dict(validated_data)
+    children = {}
+    for relation in CONTACT_RELATIONS:
+        model = Contacts._meta.get_field(relation).related_model
+        children[relation] = [model(**item) for item in data.pop(relation, [])]
+    children["tags"] = resolve_tags(children["tags"])
+    return Contacts(user=user, **data), children
+
+
+def bulk_create_contacts(entries, batch_size=1000):
+    """
+    Insert contacts and their child objects with a fixed number of queries.
+
+    Every table, including the many to many tables, is written with one bulk_create
+    per batch inside a single transaction, instead of one insert per child row. The
+    search documents of the new contacts are computed before the commit and the
+    cached responses of their owners are invalidated after it.
+
+    Parameters:
+    entries (list): A list of (contact, children) tuples as returned by build_contact.
+    batch_size (int): The maximum number of rows per insert.
+
+    Returns:
+    list: The created contacts.
+    """
+    contacts = [contact for contact, _ in entries]
+    with transaction.atomic():
+        Contacts.objects.bulk_create(contacts, batch_size=batch_size)
+        for relation in CONTACT_RELATIONS:
+            field = Contacts._meta.get_field(relation)
+            objects = [obj for _, children in entries for obj in children[relation]]
+            if not objects:
+                continue
+            # The canonical tags are already saved, only the links are inserted
+            new_objects = [obj for obj in objects if obj._state.adding]
+            field.related_model.objects.bulk_create(new_objects, batch_size=batch_size)
+            through = getattr(Contacts, relation).through
+            through.objects.bulk_create(
+                [
+                    through(
+                        **{
+                            field.m2m_field_name(): contact,
+                            field.m2m_reverse_field_name(): obj,
+                        }
+                    )
+                    for contact, children in entries
+                    for obj in children[relation]
+                ],
+                batch_size=batch_size,
+            )
+        refresh_search_documents(contact.id for contact in contacts)
+        schedule_version_bump(contact.user_id for contact in contacts)
+    return contacts
+
+
+def set_children_active(contact_ids, is_active):
+    """
+    Soft delete or restore the child objects of some contacts.
+
+    A child object is only soft deleted when no active contact has it, so the
+    children shared with other contacts are kept, the canonical tags are never
+    modified. Every relation is written with one UPDATE per chunk of contacts.
+
+    Parameters:
+    contact_ids (list): The ids of the contacts whose state changed.
+    is_active (bool): The new state of the contacts.
+
+    Returns:
+    dict: The number of updated child objects of every relation.
+    """
+    now = timezone.now()
+    relations = [r for r in CONTACT_RELATIONS if r not in SHARED_RELATIONS]
+    counts = dict.fromkeys(relations, 0)
+    for start in range(0, len(contact_ids), CASCADE_CHUNK_SIZE):
+        chunk = contact_ids[start : start + CASCADE_CHUNK_SIZE]
+        for relation in relations:
+            field = Contacts._meta.get_field(relation)
+            query_name = field.related_query_name()
+            children = field.related_model.objects.filter(
+                **{f"{query_name}__in": chunk}, is_active=not is_active
+            )
+            if not is_active:
+                children = children.exclude(**{f"{query_name}__is_active": True})
+            counts[relation] += children.update(is_active=is_active, updated=now)
+    return counts
+
+
+def set_contacts_active(queryset, is_active, cascade=False):
+    """
+    Soft delete or restore contacts with a single UPDATE ... RETURNING.
+
+    The updated date of the contacts is set, so the delta sync sends them, and the
+    cached responses of their owners are invalidated after the commit. The signals of
+    the contacts are not sent.
+
+    Parameters:
+    queryset (QuerySet): The contacts to update.
+    is_active (bool): The new state of the contacts.
+    cascade (bool): Whether to change the state of the child objects too.
+
+    Returns:
+    dict: The number of updated contacts and of updated child objects per relation.
+    """
+    with transaction.atomic():
+        rows = bulk_set_active(queryset, is_active, returning=("id", "user"))
+        children = {}
+        if cascade and rows:
+            children = set_children_active([row[0] for row in rows], is_active)
+        schedule_version_bump(user_id for _, user_id in rows)
+    return {"contacts": len(rows), "children": children}
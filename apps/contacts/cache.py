@@ -0,0 +1,153 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from rest_framework.response import Response
+
+from apps.contacts.models import Contacts
+from utils import metrics
+
+VERSION_KEY = "contacts:version:{user_id}"
+
+
+def get_cache():
+    return caches[settings.CONTACTS_CACHE_ALIAS]
+
+
+def is_enabled():
+    """
+    Check whether the responses are cached, they are not with the dummy backend.
+
+    A cache per process is consistent too: the responses are also keyed by their
+    ETag, which every worker reads from the database, so a write bumps the version
+    of the worker that served it only but changes the key on all of them.
+    """
+    return not isinstance(get_cache(), DummyCache)
+
+
+def get_version(user_id):
+    """
+    Get the version of the address book of a user.
+
+    A missing version (never set or evicted) is initialized with the current time,
+    so the responses cached with an older version can never be served again.
+
+    Parameters:
+    user_id (UUID): The id of the user.
+
+    Returns:
+    int: The current version of the address book.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(user_ids):
+    """
+    Increment the version of the address book of some users.
+
+    Parameters:
+    user_ids (iterable): The ids of the users.
+
+    Returns:
+    None
+    """
+    cache = get_cache()
+    for user_id in set(user_ids):
+        key = VERSION_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def schedule_version_bump(user_ids):
+    """
+    Increment the version of the address book of some users after the commit.
+
+    Bumping after the commit avoids caching the old data with the new version while
+    the transaction is still open.
+    """
+    user_ids = set(user_ids)
+    if user_ids and is_enabled():
+        transaction.on_commit(lambda: bump_versions(user_ids))
+
+
+def schedule_version_bump_for_contacts(contact_ids):
+    """Increment the version of the address book of the owners of some contacts."""
+    contact_ids = list(contact_ids)
+    if contact_ids and is_enabled():
+        schedule_version_bump(
+            Contacts.objects.filter(id__in=contact_ids)
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+
+
+def get_cache_key(request, action, pk=None, etag=None):
+    """
+    Build the cache key of a response from the user, the version, the ETag and the
+    query.
+
+    Parameters:
+    request: The request object.
+    action (str): The action of the view.
+    pk (str): The primary key of the contact, if any.
+    etag (str): The ETag of the current state of the resource, if any.
+
+    Returns:
+    str: The cache key.
+    """
+    user_id = request.user.id
+    query = "&".join(
+        f"{key}={value}"
+        for key, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    version = get_version(user_id)
+    return f"contacts:{action}:{user_id}:{version}:{pk}:{etag}:{digest}"
+
+
+def cached_response(request, action, build, pk=None, etag=None):
+    """
+    Get a response from the cache or build it and cache its data.
+
+    Only the responses with status 200 are cached. The X-Cache header tells whether
+    the response was found in the cache, the response is built without it when the
+    cache is disabled.
+
+    Parameters:
+    request: The request object.
+    action (str): The action of the view.
+    build (callable): A function that returns the response when it is not cached.
+    pk (str): The primary key of the contact, if any.
+    etag (str): The ETag of the current state of the resource, if any.
+
+    Returns:
+    Response: The cached or the built response.
+    """
+    if not is_enabled():
+        return build()
+
+    cache = get_cache()
+    key = get_cache_key(request, action, pk, etag)
+    data = cache.get(key)
+    if data is not None:
+        metrics.increment("contacts_cache_requests", result="hit", action=action)
+        return Response(data, headers={"X-Cache": "HIT"})
+
+    metrics.increment("contacts_cache_requests", result="miss", action=action)
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=settings.CONTACTS_CACHE_TIMEOUT)
+    response["X-Cache"] = "MISS"
+    return response
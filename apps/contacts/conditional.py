@@ -0,0 +1,142 @@
+import hashlib
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from apps.contacts.models import CONTACT_RELATIONS, Contacts
+
+
+def relation_subqueries(relation, contact_lookup, group_by):
+    """
+    Build the subqueries of the last update and the number of links of a relation.
+
+    Parameters:
+    relation (str): The name of the many to many field of the contacts.
+    contact_lookup (dict): The filter of the many to many rows by contact.
+    group_by (str): The field used to aggregate the many to many rows.
+
+    Returns:
+    dict: A subquery with the last update of the child rows and a subquery with the
+        number of rows of the many to many table.
+    """
+    field = Contacts._meta.get_field(relation)
+    rows = (
+        field.remote_field.through.objects.filter(**contact_lookup)
+        .order_by()
+        .values(group_by)
+    )
+    target = field.m2m_reverse_field_name()
+    return {
+        f"{relation}_updated": Subquery(
+            rows.annotate(value=Max(f"{target}__updated")).values("value")
+        ),
+        f"{relation}_count": Subquery(
+            rows.annotate(value=Count("id")).values("value"),
+            output_field=IntegerField(),
+        ),
+    }
+
+
+def get_validators(values, *extra):
+    """
+    Build the ETag and the last modification date from the aggregated values.
+
+    Parameters:
+    values (dict): The dates and counters of the resource.
+    *extra (str): Other values that identify the representation, like the query.
+
+    Returns:
+    tuple: The strong ETag and the last modification timestamp, or None if there is
+        no date.
+    """
+    digest = hashlib.md5(
+        repr((sorted(values.items()), extra)).encode(), usedforsecurity=False
+    ).hexdigest()
+    dates = [value for value in values.values() if isinstance(value, datetime)]
+    last_modified = int(max(dates).timestamp()) if dates else None
+    return f'"{digest}"', last_modified
+
+
+def get_list_validators(request):
+    """
+    Get the ETag and the last modification of the address book of the user.
+
+    The last update and the number of active contacts are aggregated on the contacts
+    only, served by the (user, updated) index. A change of a child row or of a link
+    touches the updated date of its contacts, and a soft deletion changes the number
+    of active contacts.
+
+    Parameters:
+    request: The request object.
+
+    Returns:
+    tuple: The ETag and the last modification timestamp.
+    """
+    values = Contacts.objects.filter(user=request.user).aggregate(
+        contacts_updated=Max("updated"),
+        contacts_count=Count("id", filter=Q(is_active=True)),
+    )
+    query = sorted(request.query_params.lists())
+    return get_validators(values, request.user.pk, query)
+
+
+def get_contact_validators(request, pk):
+    """
+    Get the ETag and the last modification of a contact of the user.
+
+    Parameters:
+    request: The request object.
+    pk (str): The primary key of the contact.
+
+    Returns:
+    tuple: The ETag and the last modification timestamp, or (None, None) if the
+        contact does not exist.
+    """
+    subqueries = {}
+    for relation in CONTACT_RELATIONS:
+        subqueries.update(
+            relation_subqueries(relation, {"contacts": OuterRef("pk")}, "contacts")
+        )
+    try:
+        values = (
+            Contacts.objects.filter(pk=pk, user=request.user, is_active=True)
+            .values("updated", **subqueries)
+            .first()
+        )
+    except ValidationError:
+        values = None
+    if values is None:
+        return None, None
+    return get_validators(values, pk)
+
+
+def conditional_response(request, validators, build):
+    """
+    Answer 304 when the validators of the request match, otherwise build the response.
+
+    Parameters:
+    request: The request object.
+    validators (tuple): The ETag and the last modification timestamp.
+    build (callable): A function that returns the full response.
+
+    Returns:
+    HttpResponse: The 304 response or the full response with the ETag and
+        Last-Modified headers.
+    """
+    etag, last_modified = validators
+    if etag is None:
+        return build()
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        return not_modified
+    response = build()
+    if response.status_code == 200:
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+    return response
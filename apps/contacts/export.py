@@ -0,0 +1,143 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from phonenumber_field.phonenumber import PhoneNumber
+
+from apps.contacts.models import Contacts
+
+# Fields of the relations exported in every row, the first one is the value
+RELATION_FIELDS = {
+    "phones": ("phone", "phone_type"),
+    "emails": ("email", "email_type"),
+    "address": ("address", "address_type"),
+    "important_dates": ("important_date", "important_date_type"),
+    "related_persons": ("name", "related_person_type"),
+    "tags": ("tag",),
+}
+
+CONTACT_FIELDS = ("id", "name", "last_name", "company", "website", "sip", "notes")
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """An object that implements just the write method of the file-like interface."""
+
+    def write(self, value):
+        return value
+
+
+def export_value(value):
+    """Convert the phone numbers to their E.164 string, other values are kept."""
+    if isinstance(value, PhoneNumber):
+        return value.as_e164
+    return value
+
+
+def attach_relations(rows):
+    """
+    Add the values of the relations to a chunk of contacts.
+
+    Every relation is read with a single query over its many to many table that
+    returns plain tuples, so no model instances are built for the child rows.
+
+    Parameters:
+    rows (list): The dictionaries of the contacts of the chunk.
+
+    Returns:
+    list: The same dictionaries with a list of dictionaries per relation.
+    """
+    by_id = {row["id"]: row for row in rows}
+    for relation, fields in RELATION_FIELDS.items():
+        for row in rows:
+            row[relation] = []
+        field = Contacts._meta.get_field(relation)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        values = (
+            field.remote_field.through.objects.filter(**{f"{source}_id__in": by_id})
+            .values_list(f"{source}_id", *(f"{target}__{name}" for name in fields))
+            .order_by(f"{target}__created")
+        )
+        for contact_id, *child in values:
+            by_id[contact_id][relation].append(
+                dict(zip(fields, (export_value(value) for value in child)))
+            )
+    return rows
+
+
+def iter_contacts(queryset):
+    """
+    Iterate the contacts as dictionaries with a server side cursor.
+
+    The relations are loaded once per chunk of EXPORT_CHUNK_SIZE contacts, so the
+    memory used does not depend on the number of contacts.
+
+    Parameters:
+    queryset (QuerySet): The contacts to export.
+
+    Yields:
+    dict: The fields of the contact and a list of dictionaries per relation.
+    """
+    rows = (
+        queryset.prefetch_related(None)
+        .values(*CONTACT_FIELDS)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield from attach_relations(chunk)
+            chunk = []
+    if chunk:
+        yield from attach_relations(chunk)
+
+
+def export_ndjson(queryset):
+    """
+    Yield one JSON document per contact, separated by new lines.
+
+    Parameters:
+    queryset (QuerySet): The contacts to export.
+
+    Yields:
+    str: A line of the NDJSON document.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for contact in iter_contacts(queryset):
+        yield encoder.encode(contact) + "\n"
+
+
+def export_csv(queryset):
+    """
+    Yield the contacts as CSV rows.
+
+    The relations are flattened in a single column each, with the values separated by
+    "; " and the type of every value after a ":".
+
+    Parameters:
+    queryset (QuerySet): The contacts to export.
+
+    Yields:
+    str: A line of the CSV document.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CONTACT_FIELDS + tuple(RELATION_FIELDS))
+    for row in iter_contacts(queryset):
+        yield writer.writerow(
+            [row[field] for field in CONTACT_FIELDS]
+            + [
+                "; ".join(
+                    ":".join(str(value) for value in item.values())
+                    for item in row[relation]
+                )
+                for relation in RELATION_FIELDS
+            ]
+        )
+
+
+EXPORT_FORMATS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv"),
+}
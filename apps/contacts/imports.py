@@ -0,0 +1,618 @@
+import csv
+import io
+import logging
+import threading
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from phonenumber_field.phonenumber import to_python
+
+from apps.address.models import ADDRESS_TYPE_CHOICES, Address
+from apps.contacts.bulk import bulk_create_contacts
+from apps.contacts.export import CONTACT_FIELDS, RELATION_FIELDS
+from apps.contacts.models import ContactImport, ContactImportError, Contacts
+from apps.emails.models import EMAIL_TYPE_CHOICES, Emails
+from apps.important_dates.models import IMPORTANT_DATE_TYPE_CHOICES, ImportantDates
+from apps.phones.models import PHONE_TYPE_CHOICES, Phones
+from apps.related_persons.models import RELATED_PERSON_TYPE_CHOICES, RelatedPersons
+from apps.tags.cache import get_tag
+from apps.tags.models import TAG_CHOICES
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Longest unfolded vCard line that is kept, the rest of a longer line is dropped
+VCARD_MAX_LINE = 64 * 1024
+
+# Properties with binary data that are skipped without unfolding them
+VCARD_SKIPPED_PROPERTIES = ("PHOTO", "LOGO", "SOUND", "KEY")
+
+# Types of the choices of every relation, by the field of the type
+RELATION_TYPES = {
+    "phones": PHONE_TYPE_CHOICES,
+    "emails": EMAIL_TYPE_CHOICES,
+    "address": ADDRESS_TYPE_CHOICES,
+    "important_dates": IMPORTANT_DATE_TYPE_CHOICES,
+    "related_persons": RELATED_PERSON_TYPE_CHOICES,
+}
+
+RELATED_TYPES = {
+    "friend": "FR",
+    "spouse": "SP",
+    "sweetheart": "CO",
+    "child": "SO",
+    "parent": "FA",
+    "sibling": "BR",
+    "kin": "FY",
+    "co-worker": "PA",
+    "colleague": "PA",
+    "agent": "AS",
+}
+
+TAG_CODES = {
+    **{code.lower(): code for code in TAG_CHOICES},
+    **{label.lower(): code for code, label in TAG_CHOICES.items()},
+}
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def empty_record():
+    return {
+        "name": "",
+        "last_name": "",
+        "company": None,
+        "website": None,
+        "sip": None,
+        "notes": None,
+        **{relation: [] for relation in RELATION_FIELDS},
+    }
+
+
+def split_escaped(value, separator):
+    """Split a vCard value on the separators that are not escaped with a backslash."""
+    parts = [""]
+    escaped = False
+    for character in value:
+        if escaped:
+            parts[-1] += "\\" + character
+            escaped = False
+        elif character == "\\":
+            escaped = True
+        elif character == separator:
+            parts.append("")
+        else:
+            parts[-1] += character
+    return parts
+
+
+def unescape(value):
+    """Decode the escaped characters of a vCard text value."""
+    result = []
+    characters = iter(value)
+    for character in characters:
+        if character == "\\":
+            character = next(characters, "")
+            character = "\n" if character in ("n", "N") else character
+        result.append(character)
+    return "".join(result).strip()
+
+
+def unfold_lines(lines):
+    """
+    Join the folded lines of a vCard document.
+
+    The lines of the properties with binary data are skipped while they are read and
+    the other lines are truncated at VCARD_MAX_LINE, so a record never holds more than
+    a bounded amount of text.
+
+    Parameters:
+    lines (iterable): The lines of the document.
+
+    Yields:
+    str: The unfolded lines.
+    """
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if current is not None and len(current) < VCARD_MAX_LINE:
+                current += line[1:]
+            continue
+        if current is not None:
+            yield current[:VCARD_MAX_LINE]
+        name = line.split(":", 1)[0].split(";", 1)[0].rsplit(".", 1)[-1].upper()
+        current = None if name in VCARD_SKIPPED_PROPERTIES else line
+    if current is not None:
+        yield current[:VCARD_MAX_LINE]
+
+
+def parse_property(line):
+    """
+    Split a vCard line in its name, its parameters and its value.
+
+    Parameters:
+    line (str): An unfolded line, e.g. item1.TEL;TYPE="work,voice":+525512345678.
+
+    Returns:
+    tuple: The name without group in upper case, a dictionary of sets with the values
+        of every parameter in lower case, and the raw value.
+    """
+    quoted = False
+    for position, character in enumerate(line):
+        if character == '"':
+            quoted = not quoted
+        elif character == ":" and not quoted:
+            break
+    else:
+        return None, {}, ""
+    head, value = line[:position], line[position + 1 :]
+    name, *parameters = head.split(";")
+    params = {}
+    for parameter in parameters:
+        key, separator, values = parameter.partition("=")
+        if not separator:
+            # vCard 2.1 types are written without TYPE=
+            key, values = "TYPE", key
+        params.setdefault(key.upper(), set()).update(
+            item.strip('"').lower() for item in values.split(",")
+        )
+    return name.rsplit(".", 1)[-1].upper(), params, value
+
+
+def get_phone_type(types):
+    if "fax" in types:
+        return "HF" if "home" in types else "WF"
+    if "pager" in types:
+        return "LO"
+    if "cell" in types or "mobile" in types or "iphone" in types:
+        return "MO"
+    if "work" in types:
+        return "WO"
+    if "home" in types:
+        return "HO"
+    if "main" in types:
+        return "MA"
+    return "MO"
+
+
+def vcard_to_record(properties):
+    """
+    Map the properties of a vCard 3 or 4 onto the fields of a contact.
+
+    Parameters:
+    properties (list): The (name, parameters, value) tuples of the card.
+
+    Returns:
+    dict: The raw record, see empty_record.
+    """
+    record = empty_record()
+    full_name = ""
+    for name, params, value in properties:
+        types = params.get("TYPE", set())
+        if name == "N":
+            parts = [unescape(part) for part in split_escaped(value, ";")] + [""] * 5
+            record["last_name"] = parts[0].replace(",", " ").strip()
+            record["name"] = " ".join(part for part in parts[1:3] if part).strip()
+        elif name == "FN":
+            full_name = unescape(value)
+        elif name == "ORG":
+            record["company"] = unescape(split_escaped(value, ";")[0]) or None
+        elif name == "TEL":
+            number = unescape(value)
+            number = number[4:] if number.lower().startswith("tel:") else number
+            record["phones"].append((number, get_phone_type(types)))
+        elif name == "EMAIL":
+            email_type = "WO" if "work" in types else "MA"
+            record["emails"].append((unescape(value), email_type))
+        elif name == "ADR":
+            parts = (unescape(part) for part in split_escaped(value, ";"))
+            address_type = "WO" if "work" in types else "MA"
+            record["address"].append(
+                (", ".join(part for part in parts if part), address_type)
+            )
+        elif name == "BDAY":
+            record["important_dates"].append((value.strip(), "BI"))
+        elif name in ("ANNIVERSARY", "X-ANNIVERSARY"):
+            record["important_dates"].append((value.strip(), "AN"))
+        elif name == "URL" and not record["website"]:
+            record["website"] = unescape(value) or None
+        elif name == "NOTE":
+            record["notes"] = unescape(value) or None
+        elif name in ("IMPP", "X-SIP") and not record["sip"]:
+            sip = unescape(value)
+            if name == "X-SIP" or sip.lower().startswith("sip:"):
+                record["sip"] = sip[4:] if sip.lower().startswith("sip:") else sip
+        elif name == "CATEGORIES":
+            for category in split_escaped(value, ","):
+                code = TAG_CODES.get(unescape(category).lower())
+                if code and code not in record["tags"]:
+                    record["tags"].append(code)
+        elif name == "RELATED":
+            related_type = next(
+                (RELATED_TYPES[kind] for kind in types if kind in RELATED_TYPES), "OT"
+            )
+            record["related_persons"].append((unescape(value), related_type))
+    if not (record["name"] or record["last_name"]) and full_name:
+        record["name"], _, record["last_name"] = full_name.partition(" ")
+    return record
+
+
+def iter_vcard_records(lines):
+    """
+    Read the cards of a vCard document one by one.
+
+    Parameters:
+    lines (iterable): The lines of the document.
+
+    Yields:
+    dict: The raw record of every card.
+
+    Raises:
+    ImportFormatError: If the document has no card.
+    """
+    properties = None
+    found = False
+    for line in unfold_lines(lines):
+        name, params, value = parse_property(line)
+        if name == "BEGIN" and value.strip().upper() == "VCARD":
+            properties = []
+            found = True
+        elif name == "END" and value.strip().upper() == "VCARD":
+            if properties is not None:
+                yield vcard_to_record(properties)
+            properties = None
+        elif properties is not None and name:
+            properties.append((name, params, value))
+    if not found:
+        raise ImportFormatError("El documento no contiene ninguna vCard")
+
+
+def split_typed_values(relation, value):
+    """
+    Split a column of a relation written by the CSV export, e.g. "+5255...:MO; ...".
+
+    Parameters:
+    relation (str): The name of the relation.
+    value (str): The content of the column.
+
+    Returns:
+    list: The (value, type) tuples, the codes of the tags for the tags.
+    """
+    items = [item.strip() for item in (value or "").split(";") if item.strip()]
+    if relation == "tags":
+        return [TAG_CODES.get(item.lower(), item) for item in items]
+    typed = []
+    for item in items:
+        text, separator, kind = item.rpartition(":")
+        if separator and kind in RELATION_TYPES[relation]:
+            typed.append((text.strip(), kind))
+        else:
+            typed.append((item, None))
+    return typed
+
+
+def iter_csv_records(lines):
+    """
+    Read the rows of a CSV document in the format of the CSV export one by one.
+
+    Parameters:
+    lines (iterable): The lines of the document.
+
+    Yields:
+    dict: The raw record of every row.
+
+    Raises:
+    ImportFormatError: If a required column is missing.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"name", "last_name", "phones"} - set(reader.fieldnames or ())
+    if missing:
+        raise ImportFormatError(f"Faltan las columnas: {', '.join(sorted(missing))}")
+    for row in reader:
+        record = empty_record()
+        for field in CONTACT_FIELDS[1:]:
+            value = (row.get(field) or "").strip()
+            record[field] = value if field in ("name", "last_name") else value or None
+        for relation in RELATION_FIELDS:
+            record[relation] = split_typed_values(relation, row.get(relation))
+        yield record
+
+
+IMPORT_PARSERS = {
+    "vcard": iter_vcard_records,
+    "csv": iter_csv_records,
+}
+
+
+def validate_phones(records):
+    """
+    Parse the phone numbers of a chunk of records at once.
+
+    Every distinct number is parsed once with phonenumber_field, so the numbers
+    repeated in the chunk are not parsed again.
+
+    Parameters:
+    records (list): The raw records of the chunk.
+
+    Returns:
+    dict: The valid PhoneNumber of every raw number, None for the invalid ones.
+    """
+    numbers = {number for record in records for number, _ in record["phones"]}
+    parsed = {}
+    for number in numbers:
+        phone = to_python(number, region=settings.PHONENUMBER_DEFAULT_REGION)
+        parsed[number] = phone if phone and phone.is_valid() else None
+    metrics.increment("import_phones_parsed", len(numbers))
+    return parsed
+
+
+def parse_date(value):
+    """Parse the dates of the vCard and ISO formats, 1990-01-31 or 19900131."""
+    value = value.split("T", 1)[0].strip()
+    for date_format in ("%Y-%m-%d", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def check_length(errors, field, value, model, model_field=None):
+    max_length = model._meta.get_field(model_field or field).max_length
+    if value and len(value) > max_length:
+        errors.setdefault(field, []).append(
+            f"Asegúrese de que este campo no tenga más de {max_length} caracteres."
+        )
+
+
+def build_import_entry(user, record, phones):
+    """
+    Validate a raw record and build its unsaved contact and child objects.
+
+    Parameters:
+    user (User): The owner of the contact.
+    record (dict): The raw record, see empty_record.
+    phones (dict): The parsed phone numbers of the chunk, see validate_phones.
+
+    Returns:
+    tuple: The (contact, children) entry for bulk_create_contacts, or None, and the
+        errors of the record by field.
+    """
+    errors = {}
+    for field in ("name", "last_name"):
+        if not record[field]:
+            errors.setdefault(field, []).append("Este campo es requerido.")
+    for field in ("name", "last_name", "company", "sip", "notes", "website"):
+        check_length(errors, field, record[field], Contacts)
+    if record["website"]:
+        try:
+            URLValidator()(record["website"])
+        except ValidationError:
+            errors.setdefault("website", []).append("Introduzca una URL válida.")
+
+    def add_error(relation, message):
+        errors.setdefault(relation, []).append(message)
+
+    children = {relation: [] for relation in RELATION_FIELDS}
+    for number, phone_type in record["phones"]:
+        phone = phones.get(number)
+        if phone is None:
+            add_error("phones", f"Número de teléfono no válido: {number}")
+        else:
+            children["phones"].append(
+                Phones(phone=phone, phone_type=phone_type or "MO")
+            )
+    if not record["phones"]:
+        add_error("phones", "Debe registrar por lo menos un telefono")
+    for email, email_type in record["emails"]:
+        try:
+            validate_email(email)
+        except ValidationError:
+            add_error("emails", f"Correo no válido: {email}")
+            continue
+        check_length(errors, "emails", email, Emails, "email")
+        children["emails"].append(Emails(email=email, email_type=email_type or "MA"))
+    for address, address_type in record["address"]:
+        check_length(errors, "address", address, Address)
+        children["address"].append(
+            Address(address=address, address_type=address_type or "MA")
+        )
+    for value, date_type in record["important_dates"]:
+        important_date = parse_date(value)
+        if important_date is None:
+            add_error("important_dates", f"Fecha no válida: {value}")
+            continue
+        children["important_dates"].append(
+            ImportantDates(
+                important_date=important_date, important_date_type=date_type or "BI"
+            )
+        )
+    for name, related_type in record["related_persons"]:
+        check_length(errors, "related_persons", name, RelatedPersons, "name")
+        children["related_persons"].append(
+            RelatedPersons(name=name, related_person_type=related_type or "FR")
+        )
+    for code in record["tags"]:
+        if code not in TAG_CHOICES:
+            add_error("tags", f"Etiqueta no válida: {code}")
+            continue
+        children["tags"].append(get_tag(code))
+
+    if errors:
+        return None, errors
+    fields = {field: record[field] for field in CONTACT_FIELDS[1:]}
+    return (Contacts(user=user, **fields), children), {}
+
+
+def save_chunk(contact_import, records, first):
+    """
+    Validate and write a chunk of records, and advance the progress of the import.
+
+    The contacts, the errors and the progress are written in the same transaction, so
+    an interrupted import resumes after the last chunk saved.
+
+    Parameters:
+    contact_import (ContactImport): The running import.
+    records (list): The raw records of the chunk.
+    first (int): The position of the first record of the chunk in the document.
+
+    Returns:
+    None
+    """
+    phones = validate_phones(records)
+    entries = []
+    errors = []
+    for position, record in enumerate(records, start=first):
+        entry, record_errors = build_import_entry(contact_import.user, record, phones)
+        if entry is not None:
+            entries.append(entry)
+        else:
+            errors.append(
+                ContactImportError(
+                    contact_import=contact_import,
+                    record=position,
+                    errors=record_errors,
+                )
+            )
+
+    stored = max(settings.CONTACT_IMPORT_MAX_ERRORS - contact_import.failed, 0)
+    with transaction.atomic():
+        if entries:
+            bulk_create_contacts(entries, batch_size=len(entries))
+        ContactImportError.objects.bulk_create(errors[:stored])
+        ContactImport.objects.filter(pk=contact_import.pk).update(
+            processed=F("processed") + len(records),
+            created_contacts=F("created_contacts") + len(entries),
+            failed=F("failed") + len(errors),
+            updated=timezone.now(),
+        )
+    contact_import.processed += len(records)
+    contact_import.created_contacts += len(entries)
+    contact_import.failed += len(errors)
+    metrics.increment("import_records", len(entries), result="created")
+    metrics.increment("import_records", len(errors), result="failed")
+
+
+def claim_import(pk, stale_before=None):
+    """
+    Mark an import as running, unless another process is running it.
+
+    Parameters:
+    pk (UUID): The id of the import.
+    stale_before (datetime): The running imports without progress since this date
+        are claimed too, their process is assumed dead.
+
+    Returns:
+    bool: Whether the import was claimed.
+    """
+    condition = Q(status="PE")
+    if stale_before is not None:
+        condition |= Q(status="RU", updated__lt=stale_before)
+    return bool(
+        ContactImport.objects.filter(condition, pk=pk).update(
+            status="RU", updated=timezone.now()
+        )
+    )
+
+
+def run_import(pk, stale_before=None):
+    """
+    Import the contacts of an uploaded document.
+
+    The document is read as a stream and its records are validated and written in
+    chunks of CONTACT_IMPORT_CHUNK_SIZE, so the memory used does not depend on the
+    size of the document. The progress and the errors of every record can be read
+    while the import runs. The records already processed by a previous run of the
+    same import are skipped.
+
+    Parameters:
+    pk (UUID): The id of the import.
+    stale_before (datetime): See claim_import.
+
+    Returns:
+    ContactImport: The import, or None if it was not claimed.
+    """
+    if not claim_import(pk, stale_before):
+        return None
+    contact_import = ContactImport.objects.select_related("user").get(pk=pk)
+    chunk_size = settings.CONTACT_IMPORT_CHUNK_SIZE
+    try:
+        with contact_import.file.open("rb") as upload:
+            lines = io.TextIOWrapper(
+                upload, encoding="utf-8-sig", errors="replace", newline=""
+            )
+            records = IMPORT_PARSERS[contact_import.file_format](lines)
+            first = contact_import.processed + 1
+            records = islice(records, contact_import.processed, None)
+            while chunk := list(islice(records, chunk_size)):
+                save_chunk(contact_import, chunk, first)
+                first += len(chunk)
+        contact_import.status = "DO"
+    except (ImportFormatError, csv.Error, OSError) as error:
+        contact_import.status = "FA"
+        contact_import.error = str(error)[:250]
+    except Exception:
+        logger.exception("The import %s failed", pk)
+        contact_import.status = "FA"
+        contact_import.error = "Error inesperado durante la importación"
+    contact_import.finished = timezone.now()
+    ContactImport.objects.filter(pk=pk).update(
+        status=contact_import.status,
+        error=contact_import.error,
+        finished=contact_import.finished,
+        updated=contact_import.finished,
+    )
+    if contact_import.status == "DO":
+        contact_import.file.delete(save=False)
+        ContactImport.objects.filter(pk=pk).update(file="")
+    logger.info(
+        "Import %s: %s records, %s created, %s failed",
+        pk,
+        contact_import.processed,
+        contact_import.created_contacts,
+        contact_import.failed,
+    )
+    return contact_import
+
+
+def run_import_in_thread(pk):
+    try:
+        run_import(pk)
+    finally:
+        connections.close_all()
+
+
+def start_import(contact_import):
+    """
+    Start an import after the commit of the transaction that created it.
+
+    The import runs in a thread of the process when CONTACT_IMPORT_IN_BACKGROUND is
+    set, an import stopped by the end of the process is resumed by the
+    run_contact_imports command.
+
+    Parameters:
+    contact_import (ContactImport): The pending import.
+
+    Returns:
+    None
+    """
+    pk = contact_import.pk
+
+    def start():
+        if settings.CONTACT_IMPORT_IN_BACKGROUND:
+            threading.Thread(
+                target=run_import_in_thread, args=(pk,), daemon=True
+            ).start()
+        else:
+            run_import(pk)
+
+    transaction.on_commit(start)
@@ -0,0 +1,348 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.authentication.serializers import ClaimsTokenObtainPairSerializer
+from apps.contacts.models import Contacts
+from apps.contacts.seeds import build_varied_children, seed_users
+
+PASSWORD = "Bench-Password-2024"
+
+DUMMY_CACHE = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+
+# Endpoints of the contacts, users and authentication routes: the name, the method,
+# the path and the body. The {contact}, {user} and {search} fields of the path are
+# replaced by values of the user of the request
+ENDPOINTS = (
+    ("contacts-list", "get", "/api/contacts/?page_size=25", None),
+    ("contacts-search", "get", "/api/contacts/?q={search}&page_size=25", None),
+    ("contacts-detail", "get", "/api/contacts/{contact}/", None),
+    ("contacts-create", "post", "/api/contacts/", "contact"),
+    ("contacts-update", "patch", "/api/contacts/{contact}/", "notes"),
+    ("contacts-upcoming-dates", "get", "/api/contacts/upcoming-dates/?days=30", None),
+    ("contacts-async-list", "get", "/api/async/contacts/?page_size=25", None),
+    ("contacts-async-detail", "get", "/api/async/contacts/{contact}/", None),
+    ("users-list", "get", "/api/users/?page_size=25", None),
+    ("users-detail", "get", "/api/users/{user}/", None),
+    ("users-async-detail", "get", "/api/async/users/{user}/", None),
+    ("auth-login", "post", "/api/auth/login/", "login"),
+    ("auth-token-verify", "post", "/api/auth/token/verify/", "verify"),
+    ("auth-token-refresh", "post", "/api/auth/token/refresh/", "refresh"),
+)
+
+
+def build_contact_payload(index, rng):
+    """Build the body of a new contact with the distributions of the seeded ones."""
+    children = build_varied_children(index, rng)
+    return {
+        "name": f"Nuevo {index:07d}",
+        "last_name": f"Apellido {rng.randrange(1000):03d}",
+        "phones": [
+            {"phone": str(phone.phone), "phone_type": phone.phone_type}
+            for phone in children["phones"]
+        ],
+        "emails": [
+            {"email": email.email, "email_type": email.email_type}
+            for email in children["emails"]
+        ],
+        "address": [
+            {"address": address.address, "address_type": address.address_type}
+            for address in children["address"]
+        ],
+        "important_dates": [
+            {
+                "important_date": important_date.important_date.isoformat(),
+                "important_date_type": important_date.important_date_type,
+            }
+            for important_date in children["important_dates"]
+        ],
+        "related_persons": [
+            {"name": person.name, "related_person_type": person.related_person_type}
+            for person in children["related_persons"]
+        ],
+        "tags": [{"tag": tag.tag} for tag in children["tags"]],
+    }
+
+
+def get_percentile(values, percentile):
+    """Get a percentile of some values with the inclusive method."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percentile - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra un conjunto de datos determinista y mide las rutas de contactos, "
+        "usuarios y autenticación: peticiones por segundo, latencia p50/p95/p99, "
+        "consultas SQL y memoria asignada. Guarda los resultados en JSON y falla si "
+        "alguna ruta empeora más del umbral respecto a una corrida anterior"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument(
+            "--contacts", type=int, default=200, help="Contactos por usuario"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Peticiones medidas por ruta"
+        )
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument(
+            "--profiled",
+            type=int,
+            default=5,
+            help="Peticiones por ruta en las que se cuentan consultas y memoria",
+        )
+        parser.add_argument(
+            "--endpoints", help="Rutas medidas separadas por comas, todas por defecto"
+        )
+        parser.add_argument("--label", default="", help="Etiqueta de la corrida")
+        parser.add_argument("--output", help="Archivo JSON con los resultados")
+        parser.add_argument("--baseline", help="Archivo JSON de una corrida anterior")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Aumento relativo máximo de la latencia p95 y de la memoria",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = ENDPOINTS
+        if options["endpoints"]:
+            names = options["endpoints"].split(",")
+            unknown = set(names) - {endpoint[0] for endpoint in ENDPOINTS}
+            if unknown:
+                raise CommandError(f"Rutas desconocidas: {', '.join(sorted(unknown))}")
+            endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in names]
+
+        results = {}
+        # The dataset is rolled back at the end of the benchmark, the requests only
+        # sample the profiled requests of the instrumentation middleware and the
+        # logins of one address are not throttled. The responses are not cached, the
+        # repeated requests would be hits that hide the queries of the serialization
+        caches = {**settings.CACHES, settings.CONTACTS_CACHE_ALIAS: DUMMY_CACHE}
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            CACHES=caches,
+            INSTRUMENTATION_SAMPLE_RATE=0,
+            LOGIN_THROTTLE_IP_LIMIT=0,
+            LOGIN_THROTTLE_USERNAME_LIMIT=0,
+        ):
+            begin = time.perf_counter()
+            users = seed_users(
+                options["users"],
+                options["contacts"],
+                seed=options["seed"],
+                password=make_password(PASSWORD),
+            )
+            self.stdout.write(f"datos sembrados en {time.perf_counter() - begin:.1f}s")
+            self.prepare(users)
+
+            for name, method, path, body in endpoints:
+                # Every endpoint draws its requests from its own generator, so the
+                # requests do not depend on the endpoints measured before
+                rng = random.Random(f"{options['seed']}:{name}")
+                results[name] = self.measure(users, rng, method, path, body, options)
+                result = results[name]
+                self.stdout.write(
+                    f"{name:<24} rps={result['rps']:<8.1f} "
+                    f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms "
+                    f"p99={result['p99_ms']:.1f}ms queries={result['queries']:<3} "
+                    f"memoria={result['alloc_peak_kib']:.0f}KiB"
+                )
+
+            transaction.set_rollback(True)
+
+        report = {
+            "label": options["label"],
+            "dataset": {
+                "users": options["users"],
+                "contacts": options["contacts"],
+                "seed": options["seed"],
+            },
+            "requests": options["requests"],
+            "endpoints": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline:
+                regressions = self.compare(
+                    json.load(baseline), report, options["threshold"]
+                )
+            if regressions:
+                raise CommandError("Regresiones:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Sin regresiones"))
+
+    def prepare(self, users):
+        """
+        Attach the tokens and the contacts used by the requests to every user.
+
+        Parameters:
+        users (list): The seeded users.
+
+        Returns:
+        None
+        """
+        contacts = {}
+        for contact_id, user_id, name in Contacts.objects.filter(
+            user__in=users
+        ).values_list("id", "user_id", "name"):
+            contacts.setdefault(user_id, []).append((name, str(contact_id)))
+        for user in users:
+            refresh = ClaimsTokenObtainPairSerializer.get_token(user)
+            user.refresh_token = str(refresh)
+            user.access_token = str(refresh.access_token)
+            # Sorted by the seeded names, unlike the random ids they are the same on
+            # every run, so the same contacts are picked
+            user.contact_ids = [
+                contact_id for _, contact_id in sorted(contacts[user.pk])
+            ]
+
+    def request(self, client, user, rng, method, path, body, index):
+        """
+        Send one request of an endpoint as a random user.
+
+        Parameters:
+        client (APIClient): The client of the benchmark.
+        user (User): The user of the request.
+        rng (random.Random): The random generator of the endpoint.
+        method (str): The HTTP method.
+        path (str): The path of the endpoint.
+        body (str): The kind of body of the request, None without body.
+        index (int): The position of the request.
+
+        Returns:
+        Response: The response of the request.
+        """
+        path = path.format(
+            contact=rng.choice(user.contact_ids),
+            user=user.pk,
+            search=f"Apellido {rng.randrange(1000):03d}",
+        )
+        data = None
+        if body == "contact":
+            data = build_contact_payload(index, rng)
+        elif body == "notes":
+            data = {"notes": f"Nota {rng.randrange(10_000)}"}
+        elif body == "login":
+            data = {"username": user.username, "password": PASSWORD}
+        elif body == "verify":
+            data = {"token": user.access_token}
+        elif body == "refresh":
+            data = {"refresh": user.refresh_token}
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {user.access_token}")
+        response = getattr(client, method)(path, data, format="json")
+        if not 200 <= response.status_code < 300:
+            raise CommandError(
+                f"{method.upper()} {path} respondió {response.status_code}: "
+                f"{response.content[:500]!r}"
+            )
+        return response
+
+    def measure(self, users, rng, method, path, body, options):
+        """
+        Measure an endpoint with requests of random users.
+
+        The latencies are measured without any instrumentation, the queries and the
+        memory are measured on some additional requests.
+
+        Parameters:
+        users (list): The seeded users.
+        rng (random.Random): The random generator of the endpoint.
+        method (str): The HTTP method.
+        path (str): The path of the endpoint.
+        body (str): The kind of body of the requests.
+        options (dict): The options of the command.
+
+        Returns:
+        dict: The throughput, the latency percentiles in milliseconds, the queries and
+            the peak of allocated memory per request.
+        """
+        client = APIClient()
+        index = 0
+        for _ in range(options["warmup"]):
+            self.request(client, rng.choice(users), rng, method, path, body, index)
+            index += 1
+
+        latencies = []
+        for _ in range(options["requests"]):
+            user = rng.choice(users)
+            begin = time.perf_counter()
+            self.request(client, user, rng, method, path, body, index)
+            latencies.append((time.perf_counter() - begin) * 1000)
+            index += 1
+
+        queries = []
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(options["profiled"]):
+                user = rng.choice(users)
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                with CaptureQueriesContext(connection) as captured:
+                    self.request(client, user, rng, method, path, body, index)
+                peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+                queries.append(len(captured))
+                index += 1
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "rps": len(latencies) / (sum(latencies) / 1000),
+            "p50_ms": get_percentile(latencies, 50),
+            "p95_ms": get_percentile(latencies, 95),
+            "p99_ms": get_percentile(latencies, 99),
+            "queries": max(queries, default=0),
+            "alloc_peak_kib": statistics.median(peaks) if peaks else 0,
+        }
+
+    @staticmethod
+    def compare(baseline, report, threshold):
+        """
+        Compare a run with a previous one.
+
+        Parameters:
+        baseline (dict): The report of the previous run.
+        report (dict): The report of this run.
+        threshold (float): The maximum relative increase of the p95 latency and of
+            the memory.
+
+        Returns:
+        list: The description of every regression.
+        """
+        if baseline["dataset"] != report["dataset"]:
+            raise CommandError(
+                f"La corrida anterior usó otros datos: {baseline['dataset']}"
+            )
+        regressions = []
+        for name, result in report["endpoints"].items():
+            previous = baseline["endpoints"].get(name)
+            if previous is None:
+                continue
+            if result["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} consultas, antes "
+                    f"{previous['queries']}"
+                )
+            for metric in ("p95_ms", "alloc_peak_kib"):
+                if result[metric] > previous[metric] * (1 + threshold):
+                    regressions.append(
+                        f"{name}: {metric} {result[metric]:.1f}, antes "
+                        f"{previous[metric]:.1f}"
+                    )
+        return regressions
@@ -0,0 +1,248 @@
+import asyncio
+import io
+import random
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.contacts.models import CONTACT_RELATIONS, Contacts
+from apps.contacts.seeds import seed_contacts
+from apps.contacts.signals import muted_child_signals
+from apps.users.models import User
+
+# Routes requested by every client, the {id} is replaced by a random contact
+ROUTES = {
+    "wsgi": (
+        "/api/contacts/?pagination=cursor&skip_count=true&page_size=25",
+        "/api/contacts/{id}/",
+        "/api/users/?pagination=cursor&skip_count=true&page_size=25",
+    ),
+    "asgi": (
+        "/api/async/contacts/?skip_count=true&page_size=25",
+        "/api/async/contacts/{id}/",
+        "/api/async/users/?skip_count=true&page_size=25",
+    ),
+}
+
+
+def split_route(route):
+    path, _, query = route.partition("?")
+    return path, query
+
+
+def call_wsgi(application, route, authorization):
+    """Send a GET request to the WSGI application and return its status code."""
+    path, query = split_route(route)
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "testserver",
+        "HTTP_AUTHORIZATION": authorization,
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    result = {}
+
+    def start_response(status, headers, exc_info=None):
+        result["status"] = int(status.split()[0])
+
+    body = application(environ, start_response)
+    try:
+        for _ in body:
+            pass
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    return result["status"]
+
+
+async def call_asgi(application, route, authorization):
+    """Send a GET request to the ASGI application and return its status code."""
+    path, query = split_route(route)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", authorization.encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    disconnected = asyncio.Event()
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    result = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        disconnected.set()
+    return result["status"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara las peticiones por segundo y la latencia p99 de las rutas de lectura "
+        "síncronas (WSGI) y asíncronas (ASGI) con varias conexiones concurrentes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="100,1000,5000")
+        parser.add_argument("--requests-per-client", type=int, default=3)
+        parser.add_argument("--contacts", type=int, default=1000)
+        parser.add_argument(
+            "--wsgi-threads",
+            type=int,
+            default=32,
+            help="Hilos de trabajo del servidor WSGI simulado",
+        )
+        parser.add_argument("--modes", default="wsgi,asgi")
+
+    def handle(self, *args, **options):
+        from diary.asgi import application as asgi_application
+        from diary.wsgi import application as wsgi_application
+
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        per_client = options["requests_per_client"]
+
+        # The requests run in other threads and connections, so the dataset is
+        # committed and deleted at the end instead of rolled back
+        user = User.objects.create_user(
+            username=uuid.uuid4().hex[:10],
+            email=f"{uuid.uuid4().hex}@bench.local",
+        )
+        # The JWT authentication rejects the inactive users
+        user.is_active = True
+        user.save(update_fields=["is_active"])
+        try:
+            seed_contacts(user, options["contacts"])
+            contact_ids = [
+                str(contact_id)
+                for contact_id in Contacts.objects.filter(user=user).values_list(
+                    "id", flat=True
+                )
+            ]
+            authorization = f"Bearer {AccessToken.for_user(user)}"
+
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                for mode in options["modes"].split(","):
+                    for level in levels:
+                        if mode == "wsgi":
+                            run = self.run_wsgi(
+                                wsgi_application,
+                                level,
+                                per_client,
+                                contact_ids,
+                                authorization,
+                                options["wsgi_threads"],
+                            )
+                        else:
+                            run = self.run_asgi(
+                                asgi_application,
+                                level,
+                                per_client,
+                                contact_ids,
+                                authorization,
+                            )
+                        self.report(mode, level, *asyncio.run(run))
+        finally:
+            with muted_child_signals():
+                for relation in CONTACT_RELATIONS:
+                    model = Contacts._meta.get_field(relation).related_model
+                    model.objects.filter(contacts__user=user).delete()
+            user.delete()
+
+    def get_routes(self, mode, per_client, contact_ids, rng):
+        return [
+            ROUTES[mode][index % len(ROUTES[mode])].format(id=rng.choice(contact_ids))
+            for index in range(per_client)
+        ]
+
+    async def run_wsgi(
+        self, application, level, per_client, ids, authorization, threads
+    ):
+        loop = asyncio.get_running_loop()
+        latencies = []
+        errors = 0
+
+        async def client(number, executor):
+            nonlocal errors
+            rng = random.Random(number)
+            for route in self.get_routes("wsgi", per_client, ids, rng):
+                start = time.perf_counter()
+                try:
+                    status = await loop.run_in_executor(
+                        executor, call_wsgi, application, route, authorization
+                    )
+                except Exception:
+                    status = None
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = time.perf_counter()
+            await asyncio.gather(*(client(n, executor) for n in range(level)))
+            elapsed = time.perf_counter() - start
+        return latencies, errors, elapsed
+
+    async def run_asgi(self, application, level, per_client, ids, authorization):
+        latencies = []
+        errors = 0
+
+        async def client(number):
+            nonlocal errors
+            rng = random.Random(number)
+            for route in self.get_routes("asgi", per_client, ids, rng):
+                start = time.perf_counter()
+                try:
+                    status = await call_asgi(application, route, authorization)
+                except Exception:
+                    status = None
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(n) for n in range(level)))
+        elapsed = time.perf_counter() - start
+        return latencies, errors, elapsed
+
+    def report(self, mode, level, latencies, errors, elapsed):
+        latencies = sorted(latencies)
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        self.stdout.write(
+            f"mode={mode:<5} concurrency={level:<6} requests={len(latencies):<7} "
+            f"req/s={len(latencies) / elapsed:,.0f} "
+            f"p50={quantiles[49] * 1000:.1f}ms p99={quantiles[98] * 1000:.1f}ms "
+            f"errors={errors}"
+        )
@@ -0,0 +1,83 @@
+import resource
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.contacts.seeds import seed_contacts
+from apps.users.models import User
+
+
+def current_rss():
+    """
+    Return the resident memory of the process in bytes.
+
+    It reads /proc/self/statm when it is available and falls back to the peak resident
+    memory reported by getrusage on other systems.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la memoria residente máxima y las filas por segundo de la exportación "
+        "de contactos para varios tamaños de agenda"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000,1000000")
+        parser.add_argument("--formats", default="ndjson,csv")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["sizes"].split(","))
+        formats = options["formats"].split(",")
+
+        # The dataset is rolled back at the end of the benchmark
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            user = User.objects.create_user(
+                username=uuid.uuid4().hex[:10], email=f"{uuid.uuid4().hex}@bench.local"
+            )
+            client = APIClient()
+            client.force_authenticate(user=user)
+            url = reverse("contacts-export")
+
+            seeded = 0
+            for size in sizes:
+                seed_contacts(user, size - seeded, seed=seeded)
+                seeded = size
+
+                for export_format in formats:
+                    baseline = current_rss()
+                    peak = baseline
+                    rows = 0
+                    start = time.perf_counter()
+                    response = client.get(url, {"export_format": export_format})
+                    if response.status_code != 200:
+                        raise CommandError(
+                            f"La exportación respondió {response.status_code}"
+                        )
+                    for chunk in response.streaming_content:
+                        rows += 1
+                        if rows % 1000 == 0:
+                            peak = max(peak, current_rss())
+                    elapsed = time.perf_counter() - start
+                    peak = max(peak, current_rss())
+                    if export_format == "csv":
+                        rows -= 1  # Header row
+
+                    self.stdout.write(
+                        f"contacts={size:<8} format={export_format:<6} rows={rows:<8} "
+                        f"rows/s={rows / elapsed:,.0f} "
+                        f"peak_rss={peak / 2**20:.1f}MiB "
+                        f"rss_growth={(peak - baseline) / 2**20:.1f}MiB"
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,60 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.contacts.seeds import seed_contacts
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las consultas SQL del listado de contactos por tamaño de página y "
+        "falla si el número de consultas crece con el tamaño de la página"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--contacts", type=int, default=200)
+        parser.add_argument("--page-sizes", default="1,5,25,100")
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options["page_sizes"].split(",")]
+        results = {}
+
+        # The dataset is rolled back at the end of the benchmark
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            user = User.objects.create_user(
+                username=uuid.uuid4().hex[:10], email=f"{uuid.uuid4().hex}@bench.local"
+            )
+            seed_contacts(user, options["contacts"])
+
+            client = APIClient()
+            client.force_authenticate(user=user)
+            url = reverse("contacts-list")
+
+            for page_size in page_sizes:
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get(url, {"page_size": page_size})
+                    elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise CommandError(
+                        f"El listado respondió {response.status_code} con page_size={page_size}"
+                    )
+                results[page_size] = len(queries)
+                self.stdout.write(
+                    f"page_size={page_size:<5} queries={len(queries):<4} "
+                    f"time={elapsed * 1000:.1f}ms"
+                )
+
+            transaction.set_rollback(True)
+
+        if len(set(results.values())) > 1:
+            raise CommandError(
+                f"El número de consultas crece con el tamaño de la página: {results}"
+            )
+        self.stdout.write(self.style.SUCCESS("Número de consultas constante"))
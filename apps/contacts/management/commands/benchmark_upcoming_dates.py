@@ -0,0 +1,198 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.contacts.models import Contacts
+from apps.important_dates.models import ImportantDates
+from apps.important_dates.upcoming import get_upcoming_dates, get_upcoming_queryset
+from apps.users.models import User
+
+INDEX_NAME = "important_dates_month_day_idx"
+
+# Contacts and dates of the benchmark, one date per contact. The ids are derived from
+# the position of the row, so the dataset is the same on every run and the links can
+# be inserted without reading the rows back
+SEED_SQL = """
+INSERT INTO {contacts} (
+    id, created, updated, is_active, name, last_name, user_id, search_document
+)
+SELECT
+    md5('contact' || i)::uuid, now(), now(), (i / %(tenants)s) %% 10 <> 0,
+    'Nombre ' || lpad(i::text, 7, '0'), 'Apellido', (%(users)s)[1 + i %% %(tenants)s],
+    ''
+FROM generate_series(%(first)s, %(last)s) AS i;
+
+INSERT INTO {dates} (
+    id, created, updated, is_active, important_date, important_date_type
+)
+SELECT
+    md5('date' || i)::uuid, now(), now(), true,
+    date '1950-01-01' + (i::bigint * 7919 %% 25000)::int,
+    (ARRAY['BI', 'AN', 'OT'])[1 + i %% 3]
+FROM generate_series(%(first)s, %(last)s) AS i;
+
+INSERT INTO {through} (contacts_id, importantdates_id)
+SELECT md5('contact' || i)::uuid, md5('date' || i)::uuid
+FROM generate_series(%(first)s, %(last)s) AS i;
+"""
+
+
+def get_index_scans(plan):
+    """Get the indexes read by a node of a plan in the JSON format and its children."""
+    indexes = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        indexes.extend(get_index_scans(child))
+    return indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la consulta de las fechas importantes próximas sobre millones de fechas, "
+        "con y sin el índice del mes y día, y falla si la consulta de todos los "
+        "usuarios no usa el índice"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dates", type=int, default=2_000_000)
+        parser.add_argument("--tenants", type=int, default=1000)
+        parser.add_argument("--windows", default="1,7,30")
+        parser.add_argument(
+            "--samples", type=int, default=20, help="Usuarios medidos por ventana"
+        )
+        parser.add_argument("--start", type=date.fromisoformat, default="2025-12-28")
+        parser.add_argument("--output", help="Archivo JSON con los resultados")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Este comando requiere PostgreSQL")
+
+        windows = [int(days) for days in options["windows"].split(",")]
+        results = {}
+
+        # The dataset is rolled back at the end of the benchmark, dropping the index
+        # inside the transaction locks the table of the dates until then
+        with transaction.atomic():
+            users = self.seed(options["dates"], options["tenants"])
+            sample = users[: options["samples"]]
+
+            results["indexed"] = self.measure(options["start"], windows, sample)
+            plan = self.explain(options["start"], windows[0])
+
+            sid = transaction.savepoint()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(INDEX_NAME)}")
+            results["without_index"] = self.measure(options["start"], windows, sample)
+            transaction.savepoint_rollback(sid)
+
+            transaction.set_rollback(True)
+
+        for window in windows:
+            indexed = results["indexed"][window]
+            scanned = results["without_index"][window]
+            self.stdout.write(
+                f"days={window:<4} dates={indexed['dates']:<8} "
+                f"all_users={indexed['all_users_ms']:.1f}ms "
+                f"(sin índice {scanned['all_users_ms']:.1f}ms) "
+                f"user_p50={indexed['user_p50_ms']:.2f}ms "
+                f"user_p95={indexed['user_p95_ms']:.2f}ms "
+                f"(sin índice p50={scanned['user_p50_ms']:.2f}ms)"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+
+        if INDEX_NAME not in get_index_scans(plan["Plan"]):
+            raise CommandError(
+                f"La consulta de todos los usuarios no usa {INDEX_NAME}: {plan}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"La consulta usa {INDEX_NAME}"))
+
+    def seed(self, dates, tenants):
+        """
+        Seed the users, their contacts and one date per contact with SQL.
+
+        Parameters:
+        dates (int): The number of dates, a tenth of them belong to soft deleted
+            contacts.
+        tenants (int): The number of users that own the contacts.
+
+        Returns:
+        list: The users.
+        """
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=uuid.uuid4().hex[:10],
+                    email=f"{uuid.uuid4().hex}@bench.local",
+                    is_active=True,
+                )
+                for _ in range(tenants)
+            ],
+            batch_size=1000,
+        )
+        quote = connection.ops.quote_name
+        sql = SEED_SQL.format(
+            contacts=quote(Contacts._meta.db_table),
+            dates=quote(ImportantDates._meta.db_table),
+            through=quote(Contacts.important_dates.through._meta.db_table),
+        )
+        with connection.cursor() as cursor:
+            for first in range(0, dates, 100_000):
+                for statement in filter(str.strip, sql.split(";")):
+                    cursor.execute(
+                        statement,
+                        {
+                            "users": [user.pk for user in users],
+                            "tenants": tenants,
+                            "first": first,
+                            "last": min(first + 100_000, dates) - 1,
+                        },
+                    )
+            for model in (Contacts, ImportantDates, Contacts.important_dates.through):
+                cursor.execute(f"ANALYZE {quote(model._meta.db_table)}")
+        return users
+
+    def measure(self, start, windows, users):
+        """
+        Time the query of the dates of all the users and of a sample of users.
+
+        Parameters:
+        start (date): The first day of the windows.
+        windows (list): The number of days of every window.
+        users (list): The users whose upcoming dates are requested.
+
+        Returns:
+        dict: The number of dates and the timings in milliseconds by window.
+        """
+        results = {}
+        for days in windows:
+            begin = time.perf_counter()
+            count = get_upcoming_queryset(start, days).count()
+            all_users = time.perf_counter() - begin
+
+            latencies = []
+            for user in users:
+                begin = time.perf_counter()
+                get_upcoming_dates(user, start, days)
+                latencies.append((time.perf_counter() - begin) * 1000)
+            quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            results[days] = {
+                "dates": count,
+                "all_users_ms": all_users * 1000,
+                "user_p50_ms": quantiles[49],
+                "user_p95_ms": quantiles[94],
+            }
+        return results
+
+    def explain(self, start, days):
+        """Get the execution plan of the query of the dates of all the users."""
+        sql, params = get_upcoming_queryset(start, days).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+            result = cursor.fetchone()[0]
+        return (json.loads(result) if isinstance(result, str) else result)[0]
@@ -0,0 +1,199 @@
+import json
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.contacts.models import Contacts
+from apps.contacts.seeds import seed_contacts
+from apps.users.models import User
+
+DUMMY_CACHE = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+
+
+def get_project_tables():
+    """Get the tables of the models of the project, including the through tables."""
+    return {
+        model._meta.db_table
+        for model in apps.get_models(include_auto_created=True)
+        if model.__module__.startswith("apps.")
+        or model._meta.auto_created
+        and model._meta.auto_created.__module__.startswith("apps.")
+    }
+
+
+def get_seq_scans(plan):
+    """
+    Get the tables read with a sequential scan in an execution plan.
+
+    Parameters:
+    plan (dict): A node of a plan in the JSON format of EXPLAIN.
+
+    Returns:
+    list: The names of the tables scanned sequentially by the node and its children.
+    """
+    tables = []
+    if plan["Node Type"] == "Seq Scan":
+        tables.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        tables.extend(get_seq_scans(child))
+    return tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN ANALYZE sobre las consultas de las rutas principales de la "
+        "API con un conjunto de datos sembrado y falla si alguna recorre "
+        "secuencialmente una tabla del proyecto"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--contacts", type=int, default=1000, help="Contactos de cada usuario"
+        )
+        parser.add_argument(
+            "--tenants",
+            type=int,
+            default=5,
+            help="Usuarios con contactos, el usuario medido tiene solo una parte de las filas",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1000,
+            help="Usuarios adicionales sin contactos, activos e inactivos",
+        )
+        parser.add_argument("--verbose-plans", action="store_true")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Este comando requiere PostgreSQL")
+
+        tables = get_project_tables()
+        failures = []
+
+        # The dataset is rolled back at the end of the command, and the responses are
+        # not cached so every request runs its queries
+        caches = {**settings.CACHES, settings.CONTACTS_CACHE_ALIAS: DUMMY_CACHE}
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["testserver"], CACHES=caches
+        ):
+            user = self.seed(options["contacts"], options["tenants"], options["users"])
+            with connection.cursor() as cursor:
+                for table in sorted(tables):
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
+                # On a dataset small enough for CI the planner rightly prefers to scan
+                # small tables, with the sequential scans disabled it still uses one
+                # only when no index can serve the query
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for route, sql in self.capture_queries(user):
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+                    result = cursor.fetchone()[0]
+                plan = (json.loads(result) if isinstance(result, str) else result)[0]
+                scans = [
+                    table for table in get_seq_scans(plan["Plan"]) if table in tables
+                ]
+                status = self.style.ERROR("SEQ SCAN") if scans else "ok"
+                self.stdout.write(
+                    f"{route:<40} {plan['Execution Time']:>8.2f}ms {status} "
+                    f"{', '.join(scans)}"
+                )
+                if options["verbose_plans"] or scans:
+                    self.stdout.write(f"    {sql}")
+                if scans:
+                    failures.append((route, scans))
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} consultas recorren tablas secuencialmente: {failures}"
+            )
+        self.stdout.write(self.style.SUCCESS("Todas las consultas usan índices"))
+
+    def seed(self, contacts, tenants, users):
+        """
+        Seed the contacts of several users and a table of users.
+
+        Parameters:
+        contacts (int): The number of contacts of every user with contacts.
+        tenants (int): The number of users with contacts.
+        users (int): The number of users without contacts, one in ten is inactive.
+
+        Returns:
+        User: The user whose routes are measured.
+        """
+        User.objects.bulk_create(
+            [
+                User(
+                    username=uuid.uuid4().hex[:10],
+                    email=f"{uuid.uuid4().hex}@bench.local",
+                    is_active=bool(index % 10),
+                )
+                for index in range(users)
+            ],
+            batch_size=1000,
+        )
+        for tenant in range(max(tenants, 1)):
+            user = User.objects.create_user(
+                username=uuid.uuid4().hex[:10], email=f"{uuid.uuid4().hex}@bench.local"
+            )
+            seed_contacts(user, contacts, seed=tenant)
+            # A tenth of the contacts are soft deleted
+            Contacts.objects.filter(user=user, name__endswith="0").update(
+                is_active=False
+            )
+        return user
+
+    def capture_queries(self, user):
+        """
+        Request the read routes of the API and capture their SELECT queries.
+
+        Parameters:
+        user (User): The owner of the seeded contacts.
+
+        Returns:
+        list: The route and the SQL of every SELECT query.
+        """
+        client = APIClient()
+        client.force_authenticate(user=user)
+        contacts = reverse("contacts-list")
+        users = reverse("users-list")
+        cursor = {"pagination": "cursor", "skip_count": "true", "page_size": 25}
+
+        first = client.get(contacts, cursor).json()
+        contact_id = first["results"][0]["id"]
+        sync_token = client.get(reverse("contacts-changes")).json()["sync_token"]
+        routes = [
+            ("contacts page", contacts, {"page_size": 25}),
+            ("contacts cursor", contacts, cursor),
+            ("contacts next cursor", first["next_link"], None),
+            ("contacts detail", reverse("contacts-detail", args=[contact_id]), None),
+            ("contacts changes", reverse("contacts-changes"), None),
+            (
+                "contacts changes token",
+                reverse("contacts-changes"),
+                {"sync_token": sync_token},
+            ),
+            ("users cursor", users, cursor),
+        ]
+
+        captured = []
+        for name, url, params in routes:
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url, params)
+            if response.status_code != 200:
+                raise CommandError(f"La ruta {name} respondió {response.status_code}")
+            captured.extend(
+                (name, query["sql"])
+                for query in queries
+                if query["sql"].lstrip().upper().startswith("SELECT")
+            )
+        return captured
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from apps.contacts.purge import run_purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina físicamente los contactos dados de baja hace más del periodo de "
+        "retención y los registros hijos que ya no pertenecen a ningún contacto, en "
+        "lotes cortos que se pueden interrumpir y reanudar. Pensado para ejecutarse "
+        "periódicamente, por ejemplo desde cron: "
+        "0 3 * * * python manage.py purge_deleted --time-limit 1800"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retention-days", type=int)
+        parser.add_argument("--grace-hours", type=int)
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--time-limit",
+            type=float,
+            help="Segundos después de los cuales no se inicia otro lote",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Segundos de espera entre lotes, para no saturar las réplicas",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        results = run_purge(
+            retention_days=options["retention_days"],
+            grace_hours=options["grace_hours"],
+            batch_size=options["batch_size"],
+            time_limit=options["time_limit"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+        )
+        verb = "por eliminar" if options["dry_run"] else "eliminados"
+        for table, count in results.items():
+            self.stdout.write(f"{table:<16} {verb}={count}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.contacts.models import Contacts
+from apps.contacts.search import SEARCH_CHUNK_SIZE, refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Recalcula el documento de búsqueda de los contactos por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Solo los contactos que todavía no tienen documento de búsqueda",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Contacts.objects.order_by("id")
+        if options["missing"]:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        total = 0
+        chunk = []
+        for contact_id in queryset.values_list("id", flat=True).iterator(
+            chunk_size=SEARCH_CHUNK_SIZE
+        ):
+            chunk.append(contact_id)
+            if len(chunk) == SEARCH_CHUNK_SIZE:
+                refresh_search_documents(chunk)
+                total += len(chunk)
+                chunk = []
+        refresh_search_documents(chunk)
+        total += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} contactos actualizados"))
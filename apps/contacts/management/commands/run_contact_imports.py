@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.contacts.imports import run_import
+from apps.contacts.models import ContactImport
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta las importaciones de contactos pendientes y reanuda las que quedaron "
+        "en proceso sin avanzar, por ejemplo porque el proceso web terminó. Pensado "
+        "para ejecutarse periódicamente, por ejemplo desde cron: "
+        "*/10 * * * * python manage.py run_contact_imports"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=10,
+            help="Minutos sin avance después de los cuales se reanuda una importación",
+        )
+
+    def handle(self, *args, **options):
+        stale_before = timezone.now() - timedelta(minutes=options["stale_minutes"])
+        pending = ContactImport.objects.filter(
+            Q(status="PE") | Q(status="RU", updated__lt=stale_before)
+        ).values_list("pk", flat=True)
+        for pk in list(pending):
+            contact_import = run_import(pk, stale_before)
+            if contact_import is None:
+                continue
+            self.stdout.write(
+                f"{pk} status={contact_import.status} "
+                f"processed={contact_import.processed} "
+                f"created={contact_import.created_contacts} "
+                f"failed={contact_import.failed}"
+            )
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0001_initial'),
+        ('contacts', '0002_initial'),
+        ('emails', '0001_initial'),
+        ('important_dates', '0001_initial'),
+        ('phones', '0001_initial'),
+        ('related_persons', '0001_initial'),
+        ('tags', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contacts',
+            index=models.Index(fields=['user', 'name', 'last_name', 'id'], name='contacts_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contacts',
+            index=models.Index(fields=['user', 'created', 'id'], name='contacts_user_created_idx'),
+        ),
+    ]
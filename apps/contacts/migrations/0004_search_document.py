@@ -0,0 +1,43 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('address', '0001_initial'),
+        ('contacts', '0003_keyset_indexes'),
+        ('emails', '0001_initial'),
+        ('important_dates', '0001_initial'),
+        ('phones', '0001_initial'),
+        ('related_persons', '0001_initial'),
+        ('tags', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name='contacts',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='contacts',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='contacts',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='contacts_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contacts',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='contacts_search_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
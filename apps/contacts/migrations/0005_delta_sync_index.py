@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("address", "0001_initial"),
+        ("contacts", "0004_search_document"),
+        ("emails", "0001_initial"),
+        ("important_dates", "0001_initial"),
+        ("phones", "0002_phone_lookup_digits"),
+        ("related_persons", "0001_initial"),
+        ("tags", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contacts",
+            index=models.Index(
+                fields=["user", "updated", "id"], name="contacts_user_updated_idx"
+            ),
+        ),
+    ]
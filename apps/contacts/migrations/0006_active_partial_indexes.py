@@ -0,0 +1,99 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:37
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+RELATIONS = (
+    "phones",
+    "emails",
+    "address",
+    "important_dates",
+    "related_persons",
+    "tags",
+)
+
+
+def get_through_indexes(apps):
+    """Get the table, columns and name of the reverse index of every through table."""
+    Contacts = apps.get_model("contacts", "Contacts")
+    for relation in RELATIONS:
+        field = Contacts._meta.get_field(relation)
+        through = field.remote_field.through._meta
+        contact_column = through.get_field(field.m2m_field_name()).column
+        child_column = through.get_field(field.m2m_reverse_field_name()).column
+        yield through.db_table, child_column, contact_column
+
+
+def create_through_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, child_column, contact_column in get_through_indexes(apps):
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(table + '_reverse_idx')} "
+            f"ON {quote(table)} ({quote(child_column)}, {quote(contact_column)})"
+        )
+
+
+def drop_through_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, _, _ in get_through_indexes(apps):
+        schema_editor.execute(
+            f"DROP INDEX CONCURRENTLY IF EXISTS {quote(table + '_reverse_idx')}"
+        )
+
+
+class Migration(migrations.Migration):
+    # The indexes are built without locking the writes of the tables
+    atomic = False
+
+    dependencies = [
+        ("address", "0001_initial"),
+        ("contacts", "0005_delta_sync_index"),
+        ("emails", "0001_initial"),
+        ("important_dates", "0001_initial"),
+        ("phones", "0002_phone_lookup_digits"),
+        ("related_persons", "0001_initial"),
+        ("tags", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contacts",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "name", "last_name", "id"],
+                name="contacts_active_name_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="contacts",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "created", "id"],
+                name="contacts_active_created_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="contacts",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "updated"],
+                name="contacts_active_updated_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="contacts",
+            name="contacts_user_name_idx",
+        ),
+        RemoveIndexConcurrently(
+            model_name="contacts",
+            name="contacts_user_created_idx",
+        ),
+        # The through tables have no is_active column, the reverse index covers the
+        # lookups of the contacts of a child, so they are answered from the index
+        migrations.RunPython(create_through_indexes, drop_through_indexes),
+    ]
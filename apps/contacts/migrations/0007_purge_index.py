@@ -0,0 +1,31 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:48
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("address", "0001_initial"),
+        ("contacts", "0006_active_partial_indexes"),
+        ("emails", "0001_initial"),
+        ("important_dates", "0001_initial"),
+        ("phones", "0002_phone_lookup_digits"),
+        ("related_persons", "0001_initial"),
+        ("tags", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contacts",
+            index=models.Index(
+                condition=models.Q(("is_active", False)),
+                fields=["updated", "id"],
+                name="contacts_inactive_updated_idx",
+            ),
+        ),
+    ]
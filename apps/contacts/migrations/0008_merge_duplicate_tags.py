@@ -0,0 +1,73 @@
+from django.db import migrations, transaction
+
+# Duplicate tags merged per transaction
+BATCH_SIZE = 5000
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """
+    Merge the tags with the same code into a canonical row.
+
+    The oldest row of every code is kept, the links of the contacts to the other rows
+    are moved to it, or deleted when the contact already has the canonical tag, and
+    the other rows are deleted. Every batch runs in its own transaction, so the locks
+    are short and an interrupted migration continues where it stopped.
+    """
+    Contacts = apps.get_model("contacts", "Contacts")
+    Tags = apps.get_model("tags", "Tags")
+    Through = Contacts.tags.through
+    using = schema_editor.connection.alias
+
+    codes = Tags.objects.using(using).values_list("tag", flat=True).distinct()
+    for code in list(codes):
+        tags = Tags.objects.using(using).filter(tag=code)
+        canonical = tags.order_by("created", "id").first()
+        if not canonical.is_active:
+            tags.filter(id=canonical.id).update(is_active=True)
+        duplicates = tags.exclude(id=canonical.id).order_by("id")
+
+        while True:
+            with transaction.atomic(using=using):
+                ids = list(duplicates.values_list("id", flat=True)[:BATCH_SIZE])
+                if not ids:
+                    break
+                links = list(
+                    Through.objects.using(using)
+                    .filter(tags_id__in=ids)
+                    .values_list("id", "contacts_id")
+                )
+                linked = set(
+                    Through.objects.using(using)
+                    .filter(
+                        tags_id=canonical.id,
+                        contacts_id__in={contact_id for _, contact_id in links},
+                    )
+                    .values_list("contacts_id", flat=True)
+                )
+                moved = []
+                repeated = []
+                for link_id, contact_id in links:
+                    if contact_id in linked:
+                        repeated.append(link_id)
+                    else:
+                        linked.add(contact_id)
+                        moved.append(link_id)
+                Through.objects.using(using).filter(id__in=repeated).delete()
+                Through.objects.using(using).filter(id__in=moved).update(
+                    tags_id=canonical.id
+                )
+                Tags.objects.using(using).filter(id__in=ids).delete()
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0007_purge_index"),
+        ("tags", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
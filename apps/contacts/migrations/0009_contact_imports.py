@@ -0,0 +1,110 @@
+# Generated by Django 5.0.4 on 2026-10-18 03:14
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0008_merge_duplicate_tags"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContactImport",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        db_index=True,
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("file", models.FileField(upload_to="imports/%Y/%m/")),
+                (
+                    "file_format",
+                    models.CharField(
+                        choices=[("vcard", "vCard"), ("csv", "CSV")], max_length=5
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PE", "Pendiente"),
+                            ("RU", "En proceso"),
+                            ("DO", "Terminada"),
+                            ("FA", "Fallida"),
+                        ],
+                        default="PE",
+                        max_length=2,
+                    ),
+                ),
+                ("processed", models.PositiveIntegerField(default=0)),
+                ("created_contacts", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("error", models.CharField(blank=True, default="", max_length=250)),
+                ("finished", models.DateTimeField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ContactImportError",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        db_index=True,
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("is_active", models.BooleanField(default=True)),
+                ("record", models.PositiveIntegerField()),
+                ("errors", models.JSONField()),
+                (
+                    "contact_import",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="errors",
+                        to="contacts.contactimport",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="contactimport",
+            index=models.Index(
+                fields=["user", "created"], name="contact_imports_user_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="contactimporterror",
+            index=models.Index(
+                fields=["contact_import", "record"], name="contact_import_errors_idx"
+            ),
+        ),
+    ]
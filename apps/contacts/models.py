@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from apps.abstracts.models import AbstractModel
@@ -11,6 +13,20 @@ from apps.users.models import User
 
 # Create your models here.
 
+# Many to many relations of a contact, in the order they are serialized
+CONTACT_RELATIONS = (
+    "phones",
+    "emails",
+    "address",
+    "important_dates",
+    "related_persons",
+    "tags",
+)
+
+# Relations whose child rows are canonical and shared by all the contacts, they are
+# linked and unlinked but never created, modified or deleted with a contact
+SHARED_RELATIONS = ("tags",)
+
 
 class Contacts(AbstractModel):
     name = models.CharField(max_length=50, blank=False, null=False)
@@ -26,3 +42,108 @@ class Contacts(AbstractModel):
     sip = models.CharField(max_length=50, blank=True, null=True)
     notes = models.CharField(max_length=250, blank=True, null=True)
     tags = models.ManyToManyField(Tags, blank=True)
+    # Denormalized text of the contact and its relations, see apps.contacts.search
+    search_document = models.TextField(blank=True, default="", editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the active contacts of a user, the soft deleted
+            # contacts are left out of the indexes of the active access paths
+            models.Index(
+                fields=["user", "name", "last_name", "id"],
+                name="contacts_active_name_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["user", "created", "id"],
+                name="contacts_active_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["user", "updated"],
+                name="contacts_active_updated_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Purge of the soft deleted contacts past the retention period
+            models.Index(
+                fields=["updated", "id"],
+                name="contacts_inactive_updated_idx",
+                condition=models.Q(is_active=False),
+            ),
+            # Delta sync of the changes of a user, including the soft deleted contacts
+            models.Index(
+                fields=["user", "updated", "id"], name="contacts_user_updated_idx"
+            ),
+            # Full text and trigram search
+            GinIndex(fields=["search_vector"], name="contacts_search_vector_idx"),
+            GinIndex(
+                fields=["search_document"],
+                name="contacts_search_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
+
+IMPORT_FORMAT_CHOICES = {
+    "vcard": "vCard",
+    "csv": "CSV",
+}
+
+IMPORT_STATUS_CHOICES = {
+    "PE": "Pendiente",
+    "RU": "En proceso",
+    "DO": "Terminada",
+    "FA": "Fallida",
+}
+
+
+class ContactImport(AbstractModel):
+    """
+    An upload of contacts in vCard or CSV format and the progress of its import.
+
+    Args:
+        file ( file ): the uploaded document, deleted when the import ends.
+        processed ( int ): records read, the import resumes after them.
+        created_contacts ( int ): contacts created.
+        failed ( int ): records rejected, see ContactImportError.
+        error ( str ): the reason of a failed import.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    file = models.FileField(upload_to="imports/%Y/%m/")
+    file_format = models.CharField(max_length=5, choices=IMPORT_FORMAT_CHOICES)
+    status = models.CharField(max_length=2, choices=IMPORT_STATUS_CHOICES, default="PE")
+    processed = models.PositiveIntegerField(default=0)
+    created_contacts = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.CharField(max_length=250, blank=True, default="")
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created"], name="contact_imports_user_idx"),
+        ]
+
+
+class ContactImportError(AbstractModel):
+    """
+    The errors of a record rejected by an import.
+
+    Args:
+        record ( int ): the position of the record in the document, from 1.
+        errors ( json ): the errors by field.
+    """
+
+    contact_import = models.ForeignKey(
+        ContactImport, on_delete=models.CASCADE, related_name="errors"
+    )
+    record = models.PositiveIntegerField()
+    errors = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["contact_import", "record"], name="contact_import_errors_idx"
+            ),
+        ]
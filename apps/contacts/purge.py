@@ -0,0 +1,163 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.contacts.models import CONTACT_RELATIONS, SHARED_RELATIONS, Contacts
+from apps.contacts.signals import muted_child_signals
+from apps.jobs.checkpoints import get_checkpoint, save_checkpoint
+from apps.jobs.deadlines import Deadline
+from utils import metrics
+
+CHECKPOINT_NAME = "purge:orphans:{table}"
+
+
+def purge_contacts(cutoff, batch_size, deadline, pause=0, dry_run=False):
+    """
+    Hard delete the contacts soft deleted before a date.
+
+    The contacts are read in (updated, id) order with the contacts_inactive_updated_idx
+    index and deleted in batches, every batch in its own short transaction, so the
+    rows are locked only while their batch is deleted. The deleted rows do not match
+    the query any more, so an interrupted run resumes where it stopped. The rows of
+    the many to many tables are deleted with the contacts, their child rows become
+    orphans and are deleted by collect_orphans.
+
+    Parameters:
+    cutoff (datetime): The contacts deactivated before this date are deleted.
+    batch_size (int): The maximum number of contacts deleted per transaction.
+    deadline (Deadline): The end of the run.
+    pause (float): Seconds to wait between batches.
+    dry_run (bool): Count the contacts without deleting them.
+
+    Returns:
+    int: The number of contacts deleted, or that would be deleted.
+    """
+    queryset = Contacts.objects.filter(is_active=False, updated__lt=cutoff)
+    if dry_run:
+        return queryset.count()
+
+    deleted = 0
+    while not deadline.passed():
+        with transaction.atomic():
+            ids = list(
+                queryset.order_by("updated", "id").values_list("id", flat=True)[
+                    :batch_size
+                ]
+            )
+            if ids:
+                # The inactive contacts are not part of any cached response
+                Contacts.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        metrics.increment("purge_deleted_rows", len(ids), table="contacts")
+        if len(ids) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
+
+
+def collect_orphans(relation, grace, batch_size, deadline, pause=0, dry_run=False):
+    """
+    Delete the child rows of a relation that no contact has.
+
+    The table is walked in primary key order from the checkpoint saved by the previous
+    run, every batch reads batch_size keys and deletes the orphans among them with the
+    (child, contact) index of the many to many table, so a batch never scans the whole
+    table. The checkpoint goes back to the start when the end of the table is reached.
+
+    Parameters:
+    relation (str): The name of the many to many field of the contacts.
+    grace (datetime): Only the rows created before this date are deleted, a row
+        created by a transaction that did not link it yet is not an orphan.
+    batch_size (int): The maximum number of rows read per batch.
+    deadline (Deadline): The end of the run.
+    pause (float): Seconds to wait between batches.
+    dry_run (bool): Count the orphans without deleting them, the checkpoint is not
+        read nor saved.
+
+    Returns:
+    int: The number of rows deleted, or that would be deleted.
+    """
+    field = Contacts._meta.get_field(relation)
+    model = field.related_model
+    orphan_filter = {
+        f"{field.related_query_name()}__isnull": True,
+        "created__lt": grace,
+    }
+    if dry_run:
+        return model.objects.filter(**orphan_filter).count()
+
+    checkpoint = CHECKPOINT_NAME.format(table=model._meta.db_table)
+    last_id = get_checkpoint(checkpoint)
+    deleted = 0
+    while not deadline.passed():
+        keys = model.objects.order_by("id")
+        if last_id is not None:
+            keys = keys.filter(id__gt=last_id)
+        ids = list(keys.values_list("id", flat=True)[:batch_size])
+        # None starts the next run from the beginning of the table
+        last_id = ids[-1] if len(ids) == batch_size else None
+        with transaction.atomic(), muted_child_signals():
+            count, _ = model.objects.filter(id__in=ids, **orphan_filter).delete()
+            save_checkpoint(checkpoint, last_id and str(last_id))
+        deleted += count
+        metrics.increment("purge_deleted_rows", count, table=model._meta.db_table)
+        if last_id is None:
+            break
+        time.sleep(pause)
+    return deleted
+
+
+def run_purge(
+    retention_days=None,
+    grace_hours=None,
+    batch_size=None,
+    time_limit=None,
+    pause=0,
+    dry_run=False,
+):
+    """
+    Hard delete the soft deleted contacts past the retention period and the orphans.
+
+    This is the entry point of the scheduled job, see the purge_deleted command. The
+    defaults come from the PURGE_* settings.
+
+    Parameters:
+    retention_days (int): Days a soft deleted contact is kept.
+    grace_hours (int): Hours a child row without a contact is kept.
+    batch_size (int): The maximum number of rows per batch.
+    time_limit (float): Seconds after which no new batch is started.
+    pause (float): Seconds to wait between batches.
+    dry_run (bool): Count the rows without deleting them.
+
+    Returns:
+    dict: The number of deleted rows of the contacts and of every relation.
+    """
+    if retention_days is None:
+        retention_days = settings.PURGE_RETENTION_DAYS
+    if grace_hours is None:
+        grace_hours = settings.PURGE_ORPHAN_GRACE_HOURS
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    now = timezone.now()
+    deadline = Deadline(time_limit)
+
+    results = {
+        "contacts": purge_contacts(
+            now - timedelta(days=retention_days), batch_size, deadline, pause, dry_run
+        )
+    }
+    # The canonical tags are kept even when no contact has them
+    for relation in CONTACT_RELATIONS:
+        if relation in SHARED_RELATIONS:
+            continue
+        results[relation] = collect_orphans(
+            relation,
+            now - timedelta(hours=grace_hours),
+            batch_size,
+            deadline,
+            pause,
+            dry_run,
+        )
+    return results
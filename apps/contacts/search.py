@@ -0,0 +1,143 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db.models import Q
+from phonenumber_field.phonenumber import PhoneNumber
+
+from apps.contacts.export import attach_relations
+from apps.contacts.models import Contacts
+from utils.db.transactions import on_commit_batch
+
+SEARCH_CONFIG = "simple"
+
+SEARCH_CHUNK_SIZE = 1000
+
+
+def phone_digits(phone):
+    """
+    Get the digits of a phone number with and without the country code.
+
+    Parameters:
+    phone (str): The phone number in E.164 format.
+
+    Returns:
+    list: The international and the national digits of the phone number.
+    """
+    number = PhoneNumber.from_string(phone)
+    return [phone.lstrip("+"), str(number.national_number)]
+
+
+def build_search_document(row):
+    """
+    Build the searchable text of a contact.
+
+    Parameters:
+    row (dict): The values of the contact with its relations, as returned by
+        apps.contacts.export.attach_relations.
+
+    Returns:
+    str: The names, company, notes, emails, phone digits, addresses and related persons
+        of the contact separated by spaces.
+    """
+    parts = [row["name"], row["last_name"], row["company"], row["notes"]]
+    parts += [email["email"] for email in row["emails"]]
+    for phone in row["phones"]:
+        parts += phone_digits(phone["phone"])
+    parts += [address["address"] for address in row["address"]]
+    parts += [person["name"] for person in row["related_persons"]]
+    return " ".join(part for part in parts if part)
+
+
+def refresh_search_documents(contact_ids):
+    """
+    Recompute the search document and search vector of some contacts.
+
+    The contacts are processed in chunks and every chunk is written with two UPDATE
+    queries, the updated column of the contacts is not modified.
+
+    Parameters:
+    contact_ids (iterable): The ids of the contacts to refresh.
+
+    Returns:
+    None
+    """
+    contact_ids = list(contact_ids)
+    for start in range(0, len(contact_ids), SEARCH_CHUNK_SIZE):
+        chunk = contact_ids[start : start + SEARCH_CHUNK_SIZE]
+        rows = attach_relations(
+            list(
+                Contacts.objects.filter(id__in=chunk).values(
+                    "id", "name", "last_name", "company", "notes"
+                )
+            )
+        )
+        if not rows:
+            continue
+        Contacts.objects.bulk_update(
+            [
+                Contacts(id=row["id"], search_document=build_search_document(row))
+                for row in rows
+            ],
+            ["search_document"],
+        )
+        Contacts.objects.filter(id__in=chunk).update(
+            search_vector=(
+                SearchVector("name", "last_name", weight="A", config=SEARCH_CONFIG)
+                + SearchVector("search_document", weight="B", config=SEARCH_CONFIG)
+            )
+        )
+
+
+def schedule_search_refresh(contact_ids):
+    """
+    Refresh the search documents of some contacts when the transaction is committed.
+
+    The ids are accumulated until the commit, so the many signals sent while a contact
+    and its relations are saved in a transaction refresh the contact only once.
+
+    Parameters:
+    contact_ids (iterable): The ids of the contacts to refresh.
+
+    Returns:
+    None
+    """
+    on_commit_batch("search_refresh", contact_ids, refresh_search_documents)
+
+
+def search_contacts(queryset, text):
+    """
+    Filter and rank the contacts that match a text.
+
+    Every word of the text is searched as a prefix in the search vector, and the
+    whole text is compared with the search document by trigram word similarity, so
+    misspelled words also match.
+
+    Parameters:
+    queryset (QuerySet): The contacts to search.
+    text (str): The text to search.
+
+    Returns:
+    QuerySet: The matching contacts ordered by rank.
+    """
+    words = re.findall(r"[^\W_]+", text)
+    if not words:
+        return queryset
+    query = SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    text = " ".join(words)
+    return (
+        queryset.annotate(
+            rank=SearchRank("search_vector", query)
+            + TrigramWordSimilarity(text, "search_document")
+        )
+        .filter(Q(search_vector=query) | Q(search_document__trigram_word_similar=text))
+        .order_by("-rank", "id")
+    )
@@ -0,0 +1,232 @@
+import random
+from datetime import date, timedelta
+
+from allauth.account.models import EmailAddress
+
+from apps.address.models import ADDRESS_TYPE_CHOICES, Address
+from apps.contacts.bulk import bulk_create_contacts
+from apps.contacts.models import Contacts
+from apps.emails.models import EMAIL_TYPE_CHOICES, Emails
+from apps.important_dates.models import IMPORTANT_DATE_TYPE_CHOICES, ImportantDates
+from apps.phones.models import PHONE_TYPE_CHOICES, Phones
+from apps.related_persons.models import RELATED_PERSON_TYPE_CHOICES, RelatedPersons
+from apps.tags.cache import get_tag
+from apps.tags.models import TAG_CHOICES
+from apps.users.models import User
+
+# Weights of the number of child objects of a contact, by relation: most contacts
+# have one phone, half of them an email and a few of them an address
+CHILD_COUNT_WEIGHTS = {
+    "phones": (0, 70, 22, 8),
+    "emails": (35, 55, 10),
+    "address": (70, 25, 5),
+    "important_dates": (40, 45, 15),
+    "related_persons": (75, 20, 5),
+    "tags": (50, 40, 10),
+}
+
+
+def build_children(index, rng):
+    """
+    Build the unsaved child objects of a seeded contact.
+
+    Parameters:
+    index (int): The position of the contact in the seeded dataset.
+    rng (random.Random): The random generator used to pick the values.
+
+    Returns:
+    dict: A dictionary with the name of the relation as key and a list of unsaved objects as value,
+        the tags are the canonical ones.
+    """
+    return {
+        "phones": [
+            Phones(
+                phone=f"+5215{index % 10_000_000_000:010d}",
+                phone_type=rng.choice(("MO", "WO", "HO")),
+            )
+        ],
+        "emails": [Emails(email=f"contact{index}@example.com", email_type="MA")],
+        "address": [Address(address=f"Calle {index}", address_type="MA")],
+        "important_dates": [
+            ImportantDates(
+                important_date=date(1970, 1, 1) + timedelta(days=rng.randrange(20_000)),
+                important_date_type=rng.choice(("BI", "AN")),
+            )
+        ],
+        "related_persons": [
+            RelatedPersons(name=f"Persona {index}", related_person_type="FR")
+        ],
+        "tags": [get_tag(rng.choice(("CU", "FR", "PR")))],
+    }
+
+
+def choose(rng, choices):
+    """
+    Choose a key of a choices dictionary, the first keys are the most frequent.
+
+    Parameters:
+    rng (random.Random): The random generator used to pick the key.
+    choices (dict): The choices of a model field.
+
+    Returns:
+    str: The chosen key, the n-th key is n times less likely than the first one.
+    """
+    keys = list(choices)
+    return rng.choices(
+        keys, weights=[1 / position for position in range(1, len(keys) + 1)]
+    )[0]
+
+
+def build_varied_children(index, rng):
+    """
+    Build the unsaved child objects of a seeded contact with realistic distributions.
+
+    The number of objects of every relation follows CHILD_COUNT_WEIGHTS and their
+    types are chosen from the choices of the models.
+
+    Parameters:
+    index (int): The position of the contact in the seeded dataset.
+    rng (random.Random): The random generator used to pick the values.
+
+    Returns:
+    dict: A dictionary with the name of the relation as key and a list of unsaved objects as value,
+        the tags are the canonical ones.
+    """
+    counts = {
+        relation: rng.choices(range(len(weights)), weights=weights)[0]
+        for relation, weights in CHILD_COUNT_WEIGHTS.items()
+    }
+    return {
+        "phones": [
+            Phones(
+                phone=f"+52{rng.choice((55, 33, 81))}{rng.randrange(10**8):08d}",
+                phone_type=choose(rng, PHONE_TYPE_CHOICES),
+            )
+            for _ in range(counts["phones"])
+        ],
+        "emails": [
+            Emails(
+                email=f"contact{index}.{position}@example.com",
+                email_type=choose(rng, EMAIL_TYPE_CHOICES),
+            )
+            for position in range(counts["emails"])
+        ],
+        "address": [
+            Address(
+                address=f"Calle {rng.randrange(1, 500)} #{rng.randrange(1, 2000)}",
+                address_type=choose(rng, ADDRESS_TYPE_CHOICES),
+            )
+            for _ in range(counts["address"])
+        ],
+        "important_dates": [
+            ImportantDates(
+                important_date=date(1950, 1, 1) + timedelta(days=rng.randrange(22_000)),
+                important_date_type=choose(rng, IMPORTANT_DATE_TYPE_CHOICES),
+            )
+            for _ in range(counts["important_dates"])
+        ],
+        "related_persons": [
+            RelatedPersons(
+                name=f"Persona {rng.randrange(100_000):05d}",
+                related_person_type=choose(rng, RELATED_PERSON_TYPE_CHOICES),
+            )
+            for _ in range(counts["related_persons"])
+        ],
+        "tags": [
+            get_tag(code) for code in rng.sample(list(TAG_CHOICES), counts["tags"])
+        ],
+    }
+
+
+def seed_users(count, contacts, seed=0, password="", batch_size=1000):
+    """
+    Create deterministic active users with verified emails and varied contacts.
+
+    The usernames and the contacts only depend on the seed, so two runs with the same
+    arguments create the same dataset. All the users share the same password, which
+    is hashed once.
+
+    Parameters:
+    count (int): The number of users to create.
+    contacts (int): The number of contacts of every user.
+    seed (int): The seed of the random generator.
+    password (str): The password hash of the users.
+    batch_size (int): The number of contacts written per batch.
+
+    Returns:
+    list: The created users.
+    """
+    rng = random.Random(seed)
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"bn{seed % 100:02d}{index:06d}",
+                email=f"bn{seed}.{index}@bench.local",
+                password=password,
+                is_active=True,
+            )
+            for index in range(count)
+        ],
+        batch_size=batch_size,
+    )
+    EmailAddress.objects.bulk_create(
+        [
+            EmailAddress(user=user, email=user.email, verified=True, primary=True)
+            for user in users
+        ],
+        batch_size=batch_size,
+    )
+    entries = []
+    for position, user in enumerate(users):
+        for index in range(position * contacts, (position + 1) * contacts):
+            entries.append(
+                (
+                    Contacts(
+                        name=f"Nombre {index:07d}",
+                        last_name=f"Apellido {rng.randrange(1000):03d}",
+                        company=rng.choice(("", "", "Industrias Futura SA de CV")),
+                        user=user,
+                    ),
+                    build_varied_children(index, rng),
+                )
+            )
+            if len(entries) >= batch_size:
+                bulk_create_contacts(entries, batch_size=batch_size)
+                entries = []
+    if entries:
+        bulk_create_contacts(entries, batch_size=batch_size)
+    return users
+
+
+def seed_contacts(user, count, seed=0, batch_size=1000):
+    """
+    Create deterministic contacts for a user with one row of every child model.
+
+    Parameters:
+    user (User): The owner of the contacts.
+    count (int): The number of contacts to create.
+    seed (int): The seed of the random generator.
+    batch_size (int): The number of contacts written per batch.
+
+    Returns:
+    int: The number of contacts created.
+    """
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        entries = [
+            (
+                Contacts(
+                    name=f"Nombre {index:07d}",
+                    last_name=f"Apellido {rng.randrange(1000):03d}",
+                    company="Industrias Futura SA de CV",
+                    user=user,
+                ),
+                build_children(index, rng),
+            )
+            for index in range(created, created + size)
+        ]
+        bulk_create_contacts(entries, batch_size=batch_size)
+        created += size
+    return created
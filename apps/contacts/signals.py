@@ -0,0 +1,141 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.address.models import Address
+from apps.contacts.cache import (
+    schedule_version_bump,
+    schedule_version_bump_for_contacts,
+)
+from apps.contacts.models import CONTACT_RELATIONS, Contacts
+from apps.contacts.search import schedule_search_refresh
+from apps.contacts.sync import schedule_touch_contacts
+from apps.emails.models import Emails
+from apps.important_dates.models import ImportantDates
+from apps.phones.models import Phones
+from apps.related_persons.models import RelatedPersons
+
+# Relations whose values are part of the search document
+SEARCH_RELATIONS = ("phones", "emails", "address", "related_persons")
+
+SEARCH_MODELS = (Phones, Emails, Address, RelatedPersons)
+
+_muted = threading.local()
+
+
+@contextmanager
+def muted_child_signals():
+    """
+    Ignore the signals of the child objects in a block.
+
+    Used by the bulk writers that refresh the contacts by themselves, so the deleted
+    child objects do not run a query each.
+    """
+    previous = getattr(_muted, "active", False)
+    _muted.active = True
+    try:
+        yield
+    finally:
+        _muted.active = previous
+
+
+def get_contact_ids(child):
+    """
+    Get the ids of the contacts related to a child object.
+
+    Parameters:
+    child (AbstractModel): A phone, email, address, important date or related person.
+
+    Returns:
+    list: The ids of the contacts that have the child object.
+    """
+    for relation in CONTACT_RELATIONS:
+        field = Contacts._meta.get_field(relation)
+        if isinstance(child, field.related_model):
+            return list(
+                field.remote_field.through.objects.filter(
+                    **{f"{field.m2m_reverse_field_name()}_id": child.id}
+                ).values_list(f"{field.m2m_field_name()}_id", flat=True)
+            )
+    return []
+
+
+@receiver(post_save, sender=Contacts)
+def contact_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_search_refresh([instance.id])
+    schedule_version_bump([instance.user_id])
+
+
+@receiver(post_delete, sender=Contacts)
+def contact_deleted(sender, instance, **kwargs):
+    schedule_version_bump([instance.user_id])
+
+
+@receiver(post_save, sender=Phones)
+@receiver(post_save, sender=Emails)
+@receiver(post_save, sender=Address)
+@receiver(post_save, sender=ImportantDates)
+@receiver(post_save, sender=RelatedPersons)
+def child_saved(sender, instance, created=False, raw=False, **kwargs):
+    # A new child object is not related to any contact yet, m2m_changed handles it
+    if raw or created or getattr(_muted, "active", False):
+        return
+    contact_ids = get_contact_ids(instance)
+    if isinstance(instance, SEARCH_MODELS):
+        schedule_search_refresh(contact_ids)
+    schedule_touch_contacts(contact_ids)
+    schedule_version_bump_for_contacts(contact_ids)
+
+
+@receiver(pre_delete, sender=Phones)
+@receiver(pre_delete, sender=Emails)
+@receiver(pre_delete, sender=Address)
+@receiver(pre_delete, sender=ImportantDates)
+@receiver(pre_delete, sender=RelatedPersons)
+def child_deleted(sender, instance, **kwargs):
+    if getattr(_muted, "active", False):
+        return
+    # The rows of the many to many tables are deleted with the child object
+    contact_ids = get_contact_ids(instance)
+    if isinstance(instance, SEARCH_MODELS):
+        schedule_search_refresh(contact_ids)
+    schedule_touch_contacts(contact_ids)
+    schedule_version_bump_for_contacts(contact_ids)
+
+
+def contact_relation_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    search = sender in SEARCH_THROUGH_MODELS
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            if search:
+                schedule_search_refresh([instance.id])
+            schedule_touch_contacts([instance.id])
+            schedule_version_bump([instance.user_id])
+        return
+
+    if action in ("post_add", "post_remove"):
+        contact_ids = pk_set
+    elif action == "pre_clear":
+        contact_ids = get_contact_ids(instance)
+    else:
+        return
+    if search:
+        schedule_search_refresh(contact_ids)
+    schedule_touch_contacts(contact_ids)
+    schedule_version_bump_for_contacts(contact_ids)
+
+
+SEARCH_THROUGH_MODELS = {
+    getattr(Contacts, relation).through for relation in SEARCH_RELATIONS
+}
+
+for relation in CONTACT_RELATIONS:
+    m2m_changed.connect(
+        contact_relation_changed,
+        sender=getattr(Contacts, relation).through,
+        dispatch_uid=f"contacts_{relation}_changed",
+    )
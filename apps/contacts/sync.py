@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.contacts.models import CONTACT_RELATIONS, Contacts
+from utils.db.transactions import on_commit_batch
+
+SYNC_TOKEN_SALT = "contacts.sync"
+
+SYNC_PAGE_SIZE = 500
+
+SYNC_MAX_PAGE_SIZE = 1000
+
+
+class InvalidSyncToken(Exception):
+    pass
+
+
+def touch_contacts(contact_ids):
+    """
+    Set the updated date of some contacts to the current time.
+
+    The contacts are touched when their related rows change, so a delta sync sends the
+    contact again.
+
+    Parameters:
+    contact_ids (iterable): The ids of the contacts to touch.
+
+    Returns:
+    None
+    """
+    contact_ids = list(contact_ids)
+    if contact_ids:
+        Contacts.objects.filter(id__in=contact_ids).update(updated=timezone.now())
+
+
+def schedule_touch_contacts(contact_ids):
+    """
+    Touch some contacts when the transaction is committed.
+
+    The ids are accumulated until the commit, so the many signals sent while a contact
+    and its relations are saved in a transaction touch the contacts with one UPDATE.
+
+    Parameters:
+    contact_ids (iterable): The ids of the contacts to touch.
+
+    Returns:
+    None
+    """
+    on_commit_batch("touch_contacts", contact_ids, touch_contacts)
+
+
+def dump_sync_token(user, updated, contact_id=None):
+    """
+    Build the signed sync token of a user.
+
+    Parameters:
+    user (User): The owner of the address book.
+    updated (datetime): The updated date of the last change sent.
+    contact_id (UUID): The id of the last change sent, None if all the changes until
+        the date were sent.
+
+    Returns:
+    str: The sync token.
+    """
+    return signing.dumps(
+        {
+            "u": str(user.pk),
+            "t": updated.isoformat(),
+            "i": str(contact_id) if contact_id else None,
+        },
+        salt=SYNC_TOKEN_SALT,
+        compress=True,
+    )
+
+
+def load_sync_token(user, token):
+    """
+    Read a sync token of a user.
+
+    Parameters:
+    user (User): The owner of the address book.
+    token (str): The sync token.
+
+    Returns:
+    tuple: The updated date and the contact id of the last change sent.
+
+    Raises:
+    InvalidSyncToken: If the token was not signed by the server, belongs to another
+        user, is malformed or is older than the retention of the soft deleted
+        contacts, whose deletions may have been purged.
+    """
+    try:
+        data = signing.loads(token, salt=SYNC_TOKEN_SALT)
+        updated = parse_datetime(data["t"])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise InvalidSyncToken(token)
+    if updated is None or data.get("u") != str(user.pk):
+        raise InvalidSyncToken(token)
+    if updated < timezone.now() - timedelta(days=settings.PURGE_RETENTION_DAYS):
+        raise InvalidSyncToken(token)
+    return updated, data.get("i")
+
+
+def get_changes(user, token=None, page_size=SYNC_PAGE_SIZE):
+    """
+    Get the contacts of a user created, updated or deactivated after a sync token.
+
+    The changes are read in (updated, id) order with the contacts_user_updated_idx
+    index, so a page is a range scan and the next page starts right after the last
+    change sent. Without a token all the active contacts are returned.
+
+    Parameters:
+    user (User): The owner of the address book.
+    token (str): The sync token returned by the previous sync.
+    page_size (int): The maximum number of changes to return.
+
+    Returns:
+    dict: The created, updated and deactivated contacts, the new sync token and
+        whether there are more changes.
+
+    Raises:
+    InvalidSyncToken: If the token is not valid.
+    """
+    now = timezone.now()
+    queryset = (
+        Contacts.objects.filter(user=user)
+        .defer("search_document", "search_vector")
+        .order_by("updated", "id")
+    )
+    since = None
+    if token:
+        since, last_id = load_sync_token(user, token)
+        position = Q(updated__gt=since)
+        if last_id:
+            position |= Q(updated=since, id__gt=last_id)
+        queryset = queryset.filter(position)
+    else:
+        queryset = queryset.filter(is_active=True)
+
+    rows = list(queryset[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    active = [contact for contact in rows if contact.is_active]
+    prefetch_related_objects(active, *CONTACT_RELATIONS)
+
+    if has_more:
+        token = dump_sync_token(user, rows[-1].updated, rows[-1].id)
+    else:
+        watermark = now - timedelta(seconds=settings.CONTACTS_SYNC_MARGIN_SECONDS)
+        token = dump_sync_token(user, max(watermark, since) if since else watermark)
+
+    return {
+        "created": [c for c in active if since is None or c.created > since],
+        "updated": [c for c in active if since is not None and c.created <= since],
+        "deleted": [c for c in rows if not c.is_active],
+        "sync_token": token,
+        "has_more": has_more,
+    }
@@ -1,3 +1,192 @@
-from django.test import TestCase
+import io
+from datetime import date
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.tests import LOCMEM_CACHES
+from apps.contacts.imports import (
+    VCARD_MAX_LINE,
+    ImportFormatError,
+    iter_csv_records,
+    iter_vcard_records,
+    parse_date,
+    parse_property,
+)
+from apps.contacts.models import Contacts
+from apps.contacts.seeds import seed_contacts
+from apps.users.models import User
+
+VCARD = """BEGIN:VCARD
+VERSION:3.0
+N:Ruiz;Eva;María;;
+FN:Eva María Ruiz
+ORG:Industrias Futura\\; SA;Ventas
+item1.TEL;TYPE="work,voice":+52 55 1234 5678
+TEL;TYPE=CELL:tel:+525587654321
+EMAIL;TYPE=INTERNET,WORK:eva@example.com
+ADR;TYPE=HOME:;;Calle 1;Ciudad de México;;01000;México
+BDAY:1990-01-31
+X-ANNIVERSARY:20150620
+NOTE:Primera línea\\nsegunda
+  línea doblada
+CATEGORIES:Amigos,PR,Desconocida
+RELATED;TYPE=spouse:Juan
+PHOTO;ENCODING=b:AAAA
+ BBBB
+X-SIP:sip:eva@voip.example.com
+END:VCARD
+BEGIN:VCARD
+VERSION:2.1
+FN:Ana López
+TEL;HOME;FAX:5512345678
+END:VCARD
+"""
+
+
+class VCardParsingTests(SimpleTestCase):
+    def test_cards_are_mapped_onto_contacts(self):
+        first, second = list(iter_vcard_records(io.StringIO(VCARD)))
+
+        self.assertEqual(first["name"], "Eva María")
+        self.assertEqual(first["last_name"], "Ruiz")
+        self.assertEqual(first["company"], "Industrias Futura; SA")
+        self.assertEqual(
+            first["phones"], [("+52 55 1234 5678", "WO"), ("+525587654321", "MO")]
+        )
+        self.assertEqual(first["emails"], [("eva@example.com", "WO")])
+        self.assertEqual(
+            first["address"], [("Calle 1, Ciudad de México, 01000, México", "MA")]
+        )
+        self.assertEqual(
+            first["important_dates"], [("1990-01-31", "BI"), ("20150620", "AN")]
+        )
+        self.assertEqual(first["notes"], "Primera línea\nsegunda línea doblada")
+        self.assertEqual(first["tags"], ["FR", "PR"])
+        self.assertEqual(first["related_persons"], [("Juan", "SP")])
+        self.assertEqual(first["sip"], "eva@voip.example.com")
+
+        # vCard 2.1 types without TYPE= and the name taken from FN
+        self.assertEqual((second["name"], second["last_name"]), ("Ana", "López"))
+        self.assertEqual(second["phones"], [("5512345678", "HF")])
+
+    def test_document_without_cards_is_rejected(self):
+        with self.assertRaises(ImportFormatError):
+            list(iter_vcard_records(io.StringIO("name,last_name\n")))
+
+    def test_long_lines_are_truncated(self):
+        document = "BEGIN:VCARD\nNOTE:" + "a" * (2 * VCARD_MAX_LINE) + "\nEND:VCARD\n"
+
+        (record,) = iter_vcard_records(io.StringIO(document))
+
+        self.assertEqual(len(record["notes"]), VCARD_MAX_LINE - len("NOTE:"))
+
+    def test_colon_inside_a_quoted_parameter(self):
+        self.assertEqual(
+            parse_property('item2.URL;X-LABEL="a:b":https://example.com'),
+            ("URL", {"X-LABEL": {"a:b"}}, "https://example.com"),
+        )
+
+
+class CSVParsingTests(SimpleTestCase):
+    def test_rows_of_the_export_format_are_read(self):
+        document = io.StringIO(
+            "id,name,last_name,company,phones,emails,tags,important_dates\n"
+            ",Eva,Ruiz,,+525512345678:MO; 5587654321,eva@example.com:WO,"
+            "Clientes; FR,1990-01-31:BI\n"
+        )
+
+        (record,) = iter_csv_records(document)
+
+        self.assertEqual((record["name"], record["last_name"]), ("Eva", "Ruiz"))
+        self.assertIsNone(record["company"])
+        self.assertEqual(
+            record["phones"], [("+525512345678", "MO"), ("5587654321", None)]
+        )
+        self.assertEqual(record["emails"], [("eva@example.com", "WO")])
+        self.assertEqual(record["tags"], ["CU", "FR"])
+        self.assertEqual(record["important_dates"], [("1990-01-31", "BI")])
+        self.assertEqual(record["address"], [])
+
+    def test_missing_required_columns_are_rejected(self):
+        with self.assertRaisesMessage(ImportFormatError, "last_name, phones"):
+            next(iter_csv_records(io.StringIO("name,emails\nEva,\n")))
+
+
+class ParseDateTests(SimpleTestCase):
+    def test_formats(self):
+        self.assertEqual(parse_date("1990-01-31"), date(1990, 1, 31))
+        self.assertEqual(parse_date("19900131"), date(1990, 1, 31))
+        self.assertEqual(parse_date("1990-01-31T10:00:00Z"), date(1990, 1, 31))
+        self.assertIsNone(parse_date("--0131"))
+
+
+# The queries are counted without the response cache
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContactListQueriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="lista", email="lista@example.com")
+        seed_contacts(cls.user, 30)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def assert_queries_do_not_grow(self, params):
+        url = reverse("contacts-list")
+        # The first request loads what is cached for the process, e.g. the tags
+        self.client.get(url, {**params, "page_size": 1})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {**params, "page_size": 1})
+        self.assertEqual(response.status_code, 200)
+
+        for page_size in (5, 25):
+            with self.subTest(page_size=page_size):
+                with self.assertNumQueries(len(queries)):
+                    response = self.client.get(url, {**params, "page_size": page_size})
+                self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_page_number_queries_do_not_grow_with_the_page_size(self):
+        self.assert_queries_do_not_grow({})
+
+    def test_cursor_queries_do_not_grow_with_the_page_size(self):
+        self.assert_queries_do_not_grow({"pagination": "cursor"})
+
+
+@override_settings(
+    CACHES={
+        **LOCMEM_CACHES,
+        "contacts": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class ContactCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cache", email="cache@example.com")
+        seed_contacts(cls.user, 3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_write_of_another_process_is_not_served_from_the_cache(self):
+        url = reverse("contacts-list")
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        # A write without signals does not bump the version of this process, like a
+        # write served by another worker
+        Contacts.objects.filter(user=self.user).update(
+            name="Eva", updated=timezone.now()
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            {contact["name"] for contact in response.data["results"]}, {"Eva"}
+        )
@@ -0,0 +1,182 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from apps.contacts.export import RELATION_FIELDS, export_value
+from apps.contacts.models import CONTACT_RELATIONS, SHARED_RELATIONS, Contacts
+from apps.contacts.signals import muted_child_signals
+from apps.tags.cache import resolve_tags
+
+
+def get_values(item, fields):
+    """Get the comparable values of a child object or of a dictionary of data."""
+    if isinstance(item, dict):
+        return tuple(export_value(item[field]) for field in fields)
+    return tuple(export_value(getattr(item, field)) for field in fields)
+
+
+def diff_relation(model, fields, existing, submitted):
+    """
+    Compute the changes needed to turn the children of a relation into the submitted ones.
+
+    The children equal to a submitted item are kept, the children with the same value
+    (the first field) but other attributes are updated, and the rest are deleted or
+    inserted.
+
+    Parameters:
+    model (Model): The model of the children.
+    fields (tuple): The fields of the children, the first one is the value.
+    existing (list): The current children.
+    submitted (list): The validated data of the new children.
+
+    Returns:
+    tuple: The unsaved new children, the modified children and the children to delete.
+    """
+    unmatched = defaultdict(list)
+    for child in existing:
+        unmatched[get_values(child, fields)].append(child)
+
+    pending = []
+    for item in submitted:
+        item = {
+            field: item.get(field, model._meta.get_field(field).get_default())
+            for field in fields
+        }
+        same = unmatched.get(get_values(item, fields))
+        if same:
+            same.pop()
+        else:
+            pending.append(item)
+
+    by_value = defaultdict(list)
+    for children in unmatched.values():
+        for child in children:
+            by_value[get_values(child, fields[:1])].append(child)
+
+    inserts = []
+    updates = []
+    for item in pending:
+        same_value = by_value.get(get_values(item, fields[:1]))
+        if same_value:
+            child = same_value.pop()
+            for field in fields[1:]:
+                setattr(child, field, item[field])
+            updates.append(child)
+        else:
+            inserts.append(model(**item))
+
+    deletes = [child for children in by_value.values() for child in children]
+    return inserts, updates, deletes
+
+
+def apply_relation(contact, relation, inserts, updates, deletes):
+    """
+    Write the changes of a relation with a fixed number of queries.
+
+    The children of the shared relations are canonical rows, the new ones are linked
+    to the contact and the removed ones are only unlinked.
+
+    Parameters:
+    contact (Contacts): The contact being updated.
+    relation (str): The name of the many to many field.
+    inserts (list): The unsaved new children.
+    updates (list): The modified children.
+    deletes (list): The children to remove from the contact.
+
+    Returns:
+    None
+    """
+    field = Contacts._meta.get_field(relation)
+    model = field.related_model
+    through = field.remote_field.through
+    contact_field = field.m2m_field_name()
+    child_field = field.m2m_reverse_field_name()
+    shared = relation in SHARED_RELATIONS
+
+    if inserts:
+        if shared:
+            inserts = resolve_tags(inserts)
+        else:
+            model.objects.bulk_create(inserts)
+        through.objects.bulk_create(
+            [through(**{contact_field: contact, child_field: obj}) for obj in inserts]
+        )
+    if updates:
+        now = timezone.now()
+        for child in updates:
+            child.updated = now
+        model.objects.bulk_update(updates, [*RELATION_FIELDS[relation][1:], "updated"])
+    if deletes:
+        ids = [child.id for child in deletes]
+        through.objects.filter(
+            **{contact_field: contact, f"{child_field}__in": ids}
+        ).delete()
+        if shared:
+            return
+        # A child is only deleted when no other contact has it
+        with muted_child_signals():
+            model.objects.filter(
+                id__in=ids, **{f"{field.related_query_name()}__isnull": True}
+            ).delete()
+
+
+def update_contact(contact, validated_data):
+    """
+    Update a contact and replace the children of the submitted relations.
+
+    The current children of the submitted relations are loaded once, the inserts,
+    updates and deletes of every relation are computed in memory and written in bulk
+    inside a single transaction, so the number of queries does not depend on the
+    number of children. The relations that are not submitted are not modified.
+
+    Parameters:
+    contact (Contacts): The contact to update.
+    validated_data (dict): The validated data of a ContactUpdateSerializer.
+
+    Returns:
+    dict: The modified fields of the contact and the number of created, updated and
+        deleted children of every submitted relation.
+    """
+    data = dict(validated_data)
+    relations = {
+        relation: data.pop(relation)
+        for relation in CONTACT_RELATIONS
+        if relation in data
+    }
+    fields = [name for name, value in data.items() if getattr(contact, name) != value]
+
+    changes = {}
+    with transaction.atomic():
+        prefetch_related_objects([contact], *relations)
+        for relation, submitted in relations.items():
+            model = Contacts._meta.get_field(relation).related_model
+            if relation in SHARED_RELATIONS:
+                # A canonical child can be linked only once to a contact
+                submitted = list(
+                    {
+                        get_values(item, RELATION_FIELDS[relation]): item
+                        for item in submitted
+                    }.values()
+                )
+            existing = list(getattr(contact, relation).all())
+            inserts, updates, deletes = diff_relation(
+                model, RELATION_FIELDS[relation], existing, submitted
+            )
+            apply_relation(contact, relation, inserts, updates, deletes)
+            changes[relation] = {
+                "created": len(inserts),
+                "updated": len(updates),
+                "deleted": len(deletes),
+            }
+        contact._prefetched_objects_cache = {}
+
+        if fields or any(any(counts.values()) for counts in changes.values()):
+            # Saving the contact refreshes its search document, its updated date used
+            # by the delta sync and the version of the cached responses
+            for name in fields:
+                setattr(contact, name, data[name])
+            contact.save(update_fields=[*fields, "updated"])
+
+    return {"fields": fields, "relations": changes}
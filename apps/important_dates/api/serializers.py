@@ -1,6 +1,12 @@
 from rest_framework import serializers
 
-from apps.important_dates.models import ImportantDates
+from apps.important_dates.models import IMPORTANT_DATE_TYPE_CHOICES, ImportantDates
+from apps.important_dates.upcoming import (
+    UPCOMING_DAYS,
+    UPCOMING_MAX_DAYS,
+    UPCOMING_MAX_PAGE_SIZE,
+    UPCOMING_PAGE_SIZE,
+)
 
 
 class ImportantDateSerializer(serializers.ModelSerializer):
@@ -37,3 +43,17 @@ class ImportantDateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ImportantDates
         fields = ("important_date",)
+
+
+class UpcomingDatesQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    days = serializers.IntegerField(
+        min_value=1, max_value=UPCOMING_MAX_DAYS, default=UPCOMING_DAYS
+    )
+    type = serializers.ListField(
+        child=serializers.ChoiceField(choices=IMPORTANT_DATE_TYPE_CHOICES),
+        required=False,
+    )
+    page_size = serializers.IntegerField(
+        min_value=1, max_value=UPCOMING_MAX_PAGE_SIZE, default=UPCOMING_PAGE_SIZE
+    )
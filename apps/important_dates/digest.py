@@ -0,0 +1,226 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from apps.important_dates.models import IMPORTANT_DATE_TYPE_CHOICES
+from apps.important_dates.upcoming import get_next_occurrence, get_upcoming_queryset
+from apps.jobs.checkpoints import get_checkpoint, save_checkpoint
+from apps.jobs.deadlines import Deadline
+from apps.jobs.models import JobCheckpoint
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "digest:important_dates:{day}"
+
+
+def get_digest_users(start, days, types, after=None):
+    """
+    Get the active users with upcoming dates, ordered by id.
+
+    The dates are selected with the important_dates_month_day_idx index and only the
+    distinct user ids are read, so the full rows of the window are never sorted, and
+    the users without upcoming dates are never visited.
+
+    Parameters:
+    start (date): The first day of the window.
+    days (int): The number of days of the window.
+    types (list): The types of dates included in the digest.
+    after (str): The id of the last user already processed.
+
+    Returns:
+    list: The ids of the users.
+    """
+    queryset = get_upcoming_queryset(start, days, types).filter(
+        contacts__user__is_active=True
+    )
+    if after is not None:
+        queryset = queryset.filter(contacts__user_id__gt=after)
+    return sorted(
+        set(queryset.order_by().values_list("contacts__user_id", flat=True).distinct())
+    )
+
+
+def get_digest_rows(start, days, types, user_ids=None):
+    """
+    Build the query of the upcoming dates of some active users, in no particular order.
+
+    Parameters:
+    start (date): The first day of the window.
+    days (int): The number of days of the window.
+    types (list): The types of dates included in the digest.
+    user_ids (list): The ids of the users, all the active users if None.
+
+    Returns:
+    QuerySet: The rows of the user, the contact and the date.
+    """
+    queryset = get_upcoming_queryset(start, days, types).filter(
+        contacts__user__is_active=True
+    )
+    if user_ids is not None:
+        queryset = queryset.filter(contacts__user_id__in=user_ids)
+    return queryset.order_by().values(
+        "contacts__user_id",
+        "contacts__user__username",
+        "contacts__user__email",
+        "contacts__name",
+        "contacts__last_name",
+        "importantdates__important_date",
+        "importantdates__important_date_type",
+    )
+
+
+def build_digest(rows, start):
+    """
+    Build the digest email of a user.
+
+    Parameters:
+    rows (list): The upcoming dates of the user, see get_digest_rows.
+    start (date): The first day of the window.
+
+    Returns:
+    EmailMessage: The digest with the dates ordered by their next anniversary.
+    """
+    entries = []
+    for row in rows:
+        value = row["importantdates__important_date"]
+        occurrence = get_next_occurrence(value, start)
+        entries.append(
+            (
+                occurrence,
+                f"{row['contacts__name']} {row['contacts__last_name']}",
+                IMPORTANT_DATE_TYPE_CHOICES[row["importantdates__important_date_type"]],
+                occurrence.year - value.year,
+            )
+        )
+    entries.sort()
+    lines = [
+        f"- {occurrence:%d/%m}: {kind} de {name} ({years} años)"
+        for occurrence, name, kind, years in entries
+    ]
+    return EmailMessage(
+        subject="Tus fechas importantes de los próximos días",
+        body=f"Hola {rows[0]['contacts__user__username']},\n\n"
+        "Estas son las fechas importantes de tus contactos:\n\n" + "\n".join(lines),
+        to=[rows[0]["contacts__user__email"]],
+    )
+
+
+def send_batch(connection, batch, checkpoint):
+    """
+    Send the digests of a batch of users over an open connection.
+
+    The checkpoint is moved past the batch once it is sent, so a digest is never lost:
+    a run killed while sending sends the batch again. When sending fails the
+    checkpoint is moved to the last user whose digest was sent, so the next run
+    retries the rest of the batch only.
+
+    Parameters:
+    connection: The open email backend.
+    batch (list): The user ids and their digests.
+    checkpoint (str): The name of the checkpoint of the run.
+
+    Returns:
+    int: The number of digests sent.
+
+    Raises:
+    Exception: The error of the email backend.
+    """
+    sent = 0
+    try:
+        for _, message in batch:
+            sent += connection.send_messages([message]) or 0
+    except Exception:
+        if sent:
+            save_checkpoint(checkpoint, {"user": batch[sent - 1][0], "finished": False})
+        metrics.increment("digest_emails", sent, result="sent")
+        metrics.increment("digest_emails", len(batch) - sent, result="failed")
+        raise
+    save_checkpoint(checkpoint, {"user": batch[-1][0], "finished": False})
+    metrics.increment("digest_emails", sent, result="sent")
+    return sent
+
+
+def send_digests(
+    day=None,
+    days=None,
+    types=None,
+    batch_size=None,
+    time_limit=None,
+    connection=None,
+    dry_run=False,
+):
+    """
+    Send one email per active user with the important dates of their contacts.
+
+    This is the entry point of the daily job, see the send_reminder_digests command.
+    The users with upcoming dates are read first, then the dates of every batch of
+    users are grouped in memory, so only the dates of one batch are held at a time,
+    and the digests are sent over a single connection of the email backend. The progress of
+    the day is checkpointed after every batch sent, so a run stopped by the time limit
+    or by an error resumes after the last user served. The defaults come from the
+    DIGEST_* settings.
+
+    Parameters:
+    day (date): The first day of the window, today by default.
+    days (int): The number of days of the window.
+    types (list): The types of dates included in the digest.
+    batch_size (int): The number of users per batch.
+    time_limit (float): Seconds after which no new batch is started.
+    connection: An email backend to reuse, a new one is opened otherwise.
+    dry_run (bool): Build the digests without sending them nor saving the checkpoint.
+
+    Returns:
+    dict: The number of digests sent and whether the whole window was served.
+    """
+    day = day or timezone.localdate()
+    days = days or settings.DIGEST_DAYS
+    types = types or settings.DIGEST_TYPES
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    deadline = Deadline(time_limit)
+    checkpoint = CHECKPOINT_NAME.format(day=day.isoformat())
+
+    position = None if dry_run else get_checkpoint(checkpoint)
+    if position and position["finished"]:
+        return {"sent": 0, "finished": True}
+    last_user = position and position["user"]
+    user_ids = get_digest_users(day, days, types, last_user)
+
+    sent = 0
+    finished = True
+    connection = connection or get_connection()
+    with connection:
+        for first in range(0, len(user_ids), batch_size):
+            if first and deadline.passed():
+                finished = False
+                break
+            chunk = user_ids[first : first + batch_size]
+            rows = defaultdict(list)
+            for row in get_digest_rows(day, days, types, chunk).iterator(
+                chunk_size=2000
+            ):
+                rows[row["contacts__user_id"]].append(row)
+            # The users whose dates were removed since they were read are skipped
+            batch = [
+                (str(user_id), build_digest(rows[user_id], day))
+                for user_id in chunk
+                if rows[user_id]
+            ]
+            if dry_run:
+                sent += len(batch)
+            elif batch:
+                sent += send_batch(connection, batch, checkpoint)
+                last_user = batch[-1][0]
+        if finished and not dry_run:
+            save_checkpoint(checkpoint, {"user": last_user, "finished": True})
+
+    if finished and not dry_run:
+        # The checkpoints of the previous days are not needed any more
+        JobCheckpoint.objects.filter(
+            name__startswith=CHECKPOINT_NAME.format(day="")
+        ).exclude(name=checkpoint).delete()
+    logger.info("Sent %s digests of %s, finished: %s", sent, day, finished)
+    return {"sent": sent, "finished": finished}
@@ -0,0 +1,184 @@
+import time
+from collections import Counter
+from datetime import date
+
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.contacts.models import Contacts
+from apps.important_dates.digest import get_digest_rows, send_digests
+from apps.important_dates.models import ImportantDates
+from apps.users.models import User
+
+# Users, contacts and dates of the benchmark, derived from the position of the row so
+# the dataset is the same on every run
+SEED_SQL = """
+INSERT INTO {users} (
+    id, password, is_superuser, username, email, is_staff, created, updated,
+    is_active
+)
+SELECT
+    md5('user' || i)::uuid, '', false, 'dg' || i, 'dg' || i || '@bench.local',
+    false, now(), now(), i %% 20 <> 0
+FROM generate_series(%(first_user)s, %(last_user)s) AS i;
+
+INSERT INTO {contacts} (
+    id, created, updated, is_active, name, last_name, user_id, search_document
+)
+SELECT
+    md5('contact' || i)::uuid, now(), now(), true, 'Nombre ' || i, 'Apellido',
+    md5('user' || (i / %(contacts)s))::uuid, ''
+FROM generate_series(%(first)s, %(last)s) AS i;
+
+INSERT INTO {dates} (
+    id, created, updated, is_active, important_date, important_date_type
+)
+SELECT
+    md5('date' || i)::uuid, now(), now(), true,
+    date '1950-01-01' + (i::bigint * 7919 %% 25000)::int,
+    (ARRAY['BI', 'AN', 'OT'])[1 + i %% 3]
+FROM generate_series(%(first)s, %(last)s) AS i;
+
+INSERT INTO {through} (contacts_id, importantdates_id)
+SELECT md5('contact' || i)::uuid, md5('date' || i)::uuid
+FROM generate_series(%(first)s, %(last)s) AS i;
+"""
+
+
+class CrashingBackend(BaseEmailBackend):
+    """Email backend that counts the recipients and fails after some messages."""
+
+    def __init__(self, fail_after=None, **kwargs):
+        super().__init__(**kwargs)
+        self.recipients = Counter()
+        self.opened = 0
+        self.fail_after = fail_after
+
+    def open(self):
+        self.opened += 1
+        return True
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if self.fail_after is not None and self.fail_after <= 0:
+                raise ConnectionError("Conexión SMTP interrumpida")
+            self.recipients.update(message.to)
+            if self.fail_after is not None:
+                self.fail_after -= 1
+        return len(email_messages)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el envío del resumen diario de fechas importantes a un millón de "
+        "usuarios, interrumpe el envío a la mitad y falla si al reanudarlo algún "
+        "usuario recibe el correo dos veces, no lo recibe o si se excede el tiempo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument(
+            "--contacts", type=int, default=3, help="Contactos con fecha por usuario"
+        )
+        parser.add_argument("--day", type=date.fromisoformat, default="2025-12-28")
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--budget", type=float, default=600, help="Segundos máximos del envío"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Este comando requiere PostgreSQL")
+
+        # The dataset and the checkpoints are rolled back at the end of the benchmark
+        with transaction.atomic():
+            begin = time.perf_counter()
+            self.seed(options["users"], options["contacts"])
+            self.stdout.write(f"datos sembrados en {time.perf_counter() - begin:.1f}s")
+
+            expected = Counter(
+                {
+                    row["contacts__user__email"]: 1
+                    for row in get_digest_rows(
+                        options["day"], options["days"], ["BI", "AN"]
+                    ).iterator(chunk_size=10_000)
+                }
+            )
+            arguments = {
+                "day": options["day"],
+                "days": options["days"],
+                "types": ["BI", "AN"],
+                "batch_size": options["batch_size"],
+            }
+
+            first = CrashingBackend(fail_after=sum(expected.values()) // 2)
+            begin = time.perf_counter()
+            try:
+                send_digests(connection=first, **arguments)
+            except ConnectionError:
+                pass
+            second = CrashingBackend()
+            result = send_digests(connection=second, **arguments)
+            elapsed = time.perf_counter() - begin
+            again = send_digests(connection=CrashingBackend(), **arguments)
+
+            transaction.set_rollback(True)
+
+        received = first.recipients + second.recipients
+        duplicated = sum(1 for count in received.values() if count > 1)
+        missing = len(expected - received)
+        self.stdout.write(
+            f"users={options['users']} digests={sum(received.values())} "
+            f"time={elapsed:.1f}s rate={sum(received.values()) / elapsed:,.0f}/s "
+            f"connections={first.opened + second.opened} "
+            f"duplicated={duplicated} missing={missing} "
+            f"second_run_of_the_day={again['sent']}"
+        )
+        if duplicated or missing or again["sent"] or not result["finished"]:
+            raise CommandError("El envío reanudado no es exacto")
+        if elapsed > options["budget"]:
+            raise CommandError(
+                f"El envío tardó {elapsed:.1f}s, más de {options['budget']}s"
+            )
+        self.stdout.write(self.style.SUCCESS("Envío exacto dentro del tiempo"))
+
+    def seed(self, users, contacts):
+        """
+        Seed the users and their contacts with one important date each with SQL.
+
+        Parameters:
+        users (int): The number of users, one in twenty is inactive.
+        contacts (int): The number of contacts of every user.
+
+        Returns:
+        None
+        """
+        quote = connection.ops.quote_name
+        statements = SEED_SQL.format(
+            users=quote(User._meta.db_table),
+            contacts=quote(Contacts._meta.db_table),
+            dates=quote(ImportantDates._meta.db_table),
+            through=quote(Contacts.important_dates.through._meta.db_table),
+        ).split(";")
+        step = 100_000
+        with connection.cursor() as cursor:
+            for first_user in range(0, users, step):
+                last_user = min(first_user + step, users)
+                params = {
+                    "first_user": first_user,
+                    "last_user": last_user - 1,
+                    "first": first_user * contacts,
+                    "last": last_user * contacts - 1,
+                    "contacts": contacts,
+                }
+                for statement in filter(str.strip, statements):
+                    cursor.execute(statement, params)
+            for model in (
+                User,
+                Contacts,
+                ImportantDates,
+                Contacts.important_dates.through,
+            ):
+                cursor.execute(f"ANALYZE {quote(model._meta.db_table)}")
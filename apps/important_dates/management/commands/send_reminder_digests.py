@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.important_dates.digest import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía a cada usuario activo un correo con los cumpleaños y aniversarios "
+        "próximos de sus contactos, en lotes sobre una sola conexión de correo. El "
+        "avance del día se guarda después de enviar cada lote, una ejecución "
+        "interrumpida se reanuda después del último usuario servido. Pensado para "
+        "ejecutarse a diario, por ejemplo desde cron: "
+        "0 7 * * * python manage.py send_reminder_digests --time-limit 3000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--day",
+            type=date.fromisoformat,
+            help="Primer día de la ventana en formato AAAA-MM-DD, hoy por defecto",
+        )
+        parser.add_argument("--days", type=int)
+        parser.add_argument("--types", help="Tipos de fecha separados por comas")
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--time-limit",
+            type=float,
+            help="Segundos después de los cuales no se inicia otro lote",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        result = send_digests(
+            day=options["day"],
+            days=options["days"],
+            types=options["types"] and options["types"].split(","),
+            batch_size=options["batch_size"],
+            time_limit=options["time_limit"],
+            dry_run=options["dry_run"],
+        )
+        verb = "por enviar" if options["dry_run"] else "enviados"
+        status = "terminado" if result["finished"] else "pendiente"
+        self.stdout.write(f"correos {verb}={result['sent']} día {status}")
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:54
+
+import django.db.models.expressions
+import django.db.models.functions.datetime
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("important_dates", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="importantdates",
+            index=models.Index(
+                django.db.models.expressions.CombinedExpression(
+                    django.db.models.expressions.CombinedExpression(
+                        django.db.models.functions.datetime.ExtractMonth(
+                            "important_date"
+                        ),
+                        "*",
+                        models.Value(100),
+                    ),
+                    "+",
+                    django.db.models.functions.datetime.ExtractDay("important_date"),
+                ),
+                condition=models.Q(("is_active", True)),
+                name="important_dates_month_day_idx",
+            ),
+        ),
+    ]
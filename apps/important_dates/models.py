@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import ExtractDay, ExtractMonth
 
 from apps.abstracts.models import AbstractModel
 
@@ -12,8 +13,34 @@ IMPORTANT_DATE_TYPE_CHOICES = {
 }
 
 
+def month_day(field="important_date"):
+    """
+    Build the expression of the month and day of a date as the integer MMDD.
+
+    The year is ignored, so the dates of every year that fall in a window of days are
+    a range of values. The queries must use the same expression as the index.
+
+    Parameters:
+    field (str): The path to the date field.
+
+    Returns:
+    Expression: The month multiplied by 100 plus the day.
+    """
+    return ExtractMonth(field) * 100 + ExtractDay(field)
+
+
 class ImportantDates(AbstractModel):
     important_date = models.DateField(auto_now=False, auto_now_add=False)
     important_date_type = models.CharField(
         max_length=2, choices=IMPORTANT_DATE_TYPE_CHOICES, default="BI"
     )
+
+    class Meta:
+        indexes = [
+            # Upcoming dates of a window of days, see apps.important_dates.upcoming
+            models.Index(
+                month_day(),
+                name="important_dates_month_day_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
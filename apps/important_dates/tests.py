@@ -1,3 +1,130 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, TestCase
+
+from apps.contacts.models import Contacts
+from apps.important_dates.digest import send_digests
+from apps.important_dates.models import ImportantDates
+from apps.important_dates.upcoming import get_next_occurrence, get_window_ranges
+from apps.users.models import User
+
+
+class FailingBackend(EmailBackend):
+    """Email backend that fails after sending some messages."""
+
+    def __init__(self, fail_after, error=ConnectionError, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+        self.error = error
+
+    def send_messages(self, messages):
+        if self.fail_after <= 0:
+            raise self.error("Conexión SMTP interrumpida")
+        self.fail_after -= len(messages)
+        return super().send_messages(messages)
+
+
+class WindowRangesTests(SimpleTestCase):
+    def test_window_inside_the_year_is_one_range(self):
+        self.assertEqual(get_window_ranges(date(2025, 6, 10), 30), [(610, 709)])
+
+    def test_window_across_the_end_of_the_year_is_split(self):
+        self.assertEqual(
+            get_window_ranges(date(2025, 12, 20), 30), [(1220, 1231), (101, 118)]
+        )
+
+    def test_window_of_one_day_on_new_year_eve(self):
+        self.assertEqual(get_window_ranges(date(2025, 12, 31), 1), [(1231, 1231)])
+
+    def test_window_from_march_first_of_a_common_year_includes_february_29(self):
+        self.assertEqual(get_window_ranges(date(2025, 3, 1), 7), [(229, 307)])
+
+    def test_window_from_march_first_of_a_leap_year_excludes_february_29(self):
+        self.assertEqual(get_window_ranges(date(2024, 3, 1), 7), [(301, 307)])
+
+    def test_window_ending_on_february_29_of_a_leap_year(self):
+        self.assertEqual(
+            get_window_ranges(date(2027, 12, 31), 61), [(1231, 1231), (101, 229)]
+        )
+
+    def test_window_of_a_whole_year_is_every_day(self):
+        self.assertEqual(get_window_ranges(date(2025, 5, 5), 366), [(101, 1231)])
+
+
+class NextOccurrenceTests(SimpleTestCase):
+    def test_date_later_in_the_year(self):
+        self.assertEqual(
+            get_next_occurrence(date(1990, 8, 15), date(2025, 6, 1)), date(2025, 8, 15)
+        )
+
+    def test_date_already_passed_is_next_year(self):
+        self.assertEqual(
+            get_next_occurrence(date(1990, 1, 5), date(2025, 12, 20)), date(2026, 1, 5)
+        )
+
+    def test_date_of_the_first_day_is_today(self):
+        self.assertEqual(
+            get_next_occurrence(date(1990, 6, 1), date(2025, 6, 1)), date(2025, 6, 1)
+        )
+
+    def test_february_29_is_march_first_of_a_common_year(self):
+        self.assertEqual(
+            get_next_occurrence(date(2000, 2, 29), date(2025, 2, 20)), date(2025, 3, 1)
+        )
+
+    def test_february_29_of_a_leap_year(self):
+        self.assertEqual(
+            get_next_occurrence(date(2000, 2, 29), date(2028, 2, 20)),
+            date(2028, 2, 29),
+        )
+
+    def test_february_29_across_the_end_of_the_year(self):
+        self.assertEqual(
+            get_next_occurrence(date(2000, 2, 29), date(2026, 12, 31)),
+            date(2027, 3, 1),
+        )
+
+
+class SendDigestsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(5):
+            user = User.objects.create(
+                username=f"digest{index}", email=f"digest{index}@example.com"
+            )
+            contact = Contacts.objects.create(
+                name=f"Nombre {index}", last_name="Apellido", user=user
+            )
+            contact.important_dates.add(
+                ImportantDates.objects.create(important_date=date(1990, 6, 3 + index))
+            )
+
+    def send(self, backend):
+        return send_digests(
+            day=date(2025, 6, 1), days=7, types=["BI"], batch_size=2, connection=backend
+        )
+
+    def test_run_interrupted_by_the_backend_resumes_after_the_last_digest_sent(self):
+        with self.assertRaises(ConnectionError):
+            self.send(FailingBackend(fail_after=3))
+        result = self.send(EmailBackend())
+
+        recipients = [recipient for message in mail.outbox for recipient in message.to]
+        self.assertEqual(
+            sorted(recipients), [f"digest{index}@example.com" for index in range(5)]
+        )
+        self.assertEqual(result, {"sent": 2, "finished": True})
+        self.assertEqual(self.send(EmailBackend()), {"sent": 0, "finished": True})
+
+    def test_run_killed_while_sending_loses_no_digest(self):
+        # The exception is not handled, like a process killed in the middle of a batch
+        with self.assertRaises(KeyboardInterrupt):
+            self.send(FailingBackend(fail_after=3, error=KeyboardInterrupt))
+        self.send(EmailBackend())
+
+        recipients = {recipient for message in mail.outbox for recipient in message.to}
+        self.assertEqual(
+            recipients, {f"digest{index}@example.com" for index in range(5)}
+        )
@@ -0,0 +1,155 @@
+import calendar
+from datetime import date, timedelta
+
+from django.db.models import Case, Q, Value, When
+
+from apps.contacts.models import Contacts
+from apps.important_dates.models import month_day
+
+UPCOMING_DAYS = 30
+
+UPCOMING_MAX_DAYS = 366
+
+UPCOMING_PAGE_SIZE = 100
+
+UPCOMING_MAX_PAGE_SIZE = 1000
+
+
+def get_month_day(value):
+    return value.month * 100 + value.day
+
+
+def get_window_ranges(start, days):
+    """
+    Get the ranges of month_day values of the dates that fall in a window of days.
+
+    A window that crosses the end of the year is split in two ranges. The 29th of
+    February is celebrated on the 1st of March of the common years, so a window that
+    starts on that day also includes it.
+
+    Parameters:
+    start (date): The first day of the window.
+    days (int): The number of days of the window, the first day included.
+
+    Returns:
+    list: The inclusive (low, high) ranges of MMDD values.
+    """
+    if days >= 366:
+        return [(101, 1231)]
+    end = start + timedelta(days=days - 1)
+    low = get_month_day(start)
+    if low == 301 and not calendar.isleap(start.year):
+        low = 229
+    high = get_month_day(end)
+    if end.year == start.year:
+        return [(low, high)]
+    return [(low, 1231), (101, high)]
+
+
+def get_next_occurrence(value, start):
+    """
+    Get the first anniversary of a date on or after a day.
+
+    Parameters:
+    value (date): The important date.
+    start (date): The first day of the window.
+
+    Returns:
+    date: The next anniversary, the 1st of March for the 29th of February of a common
+        year.
+    """
+    for year in (start.year, start.year + 1):
+        try:
+            occurrence = value.replace(year=year)
+        except ValueError:
+            occurrence = date(year, 3, 1)
+        if occurrence >= start:
+            return occurrence
+
+
+def get_upcoming_queryset(start, days, types=None):
+    """
+    Build the query of the active dates of the active contacts in a window of days.
+
+    The rows are the links between the contacts and their dates, filtered by the same
+    month_day expression as the important_dates_month_day_idx index and ordered by
+    the next anniversary, the dates after the end of the year go last.
+
+    Parameters:
+    start (date): The first day of the window.
+    days (int): The number of days of the window.
+    types (list): The types of dates to include, all of them if empty.
+
+    Returns:
+    QuerySet: The links of the contacts and the dates, with a month_day annotation.
+    """
+    ranges = get_window_ranges(start, days)
+    condition = Q()
+    for low, high in ranges:
+        condition |= Q(month_day__range=(low, high))
+
+    queryset = (
+        Contacts.important_dates.through.objects.filter(
+            contacts__is_active=True, importantdates__is_active=True
+        )
+        .annotate(month_day=month_day("importantdates__important_date"))
+        .filter(condition)
+    )
+    if types:
+        queryset = queryset.filter(importantdates__important_date_type__in=types)
+    if len(ranges) > 1:
+        queryset = queryset.annotate(
+            wrapped=Case(When(month_day__gte=ranges[0][0], then=Value(0)), default=1)
+        ).order_by("wrapped", "month_day", "id")
+    else:
+        queryset = queryset.order_by("month_day", "id")
+    return queryset
+
+
+def get_upcoming_dates(user, start, days, types=None, limit=UPCOMING_PAGE_SIZE):
+    """
+    Get the upcoming important dates of the contacts of a user.
+
+    Parameters:
+    user (User): The owner of the contacts.
+    start (date): The first day of the window.
+    days (int): The number of days of the window.
+    types (list): The types of dates to include, all of them if empty.
+    limit (int): The maximum number of dates returned.
+
+    Returns:
+    tuple: The upcoming dates, ordered by their next anniversary, and whether there
+        are more dates in the window than the limit.
+    """
+    rows = list(
+        get_upcoming_queryset(start, days, types)
+        .filter(contacts__user=user)
+        .values(
+            "contacts_id",
+            "contacts__name",
+            "contacts__last_name",
+            "importantdates_id",
+            "importantdates__important_date",
+            "importantdates__important_date_type",
+        )[: limit + 1]
+    )
+    upcoming = []
+    for row in rows[:limit]:
+        value = row["importantdates__important_date"]
+        occurrence = get_next_occurrence(value, start)
+        upcoming.append(
+            {
+                "contact": {
+                    "id": row["contacts_id"],
+                    "name": row["contacts__name"],
+                    "last_name": row["contacts__last_name"],
+                },
+                "id": row["importantdates_id"],
+                "important_date": value,
+                "important_date_type": row["importantdates__important_date_type"],
+                "next_date": occurrence,
+                "days_until": (occurrence - start).days,
+                "years": occurrence.year - value.year,
+            }
+        )
+    return upcoming, len(rows) > limit
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from apps.jobs.models import JobCheckpoint
+
+
+class JobCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "position", "updated")
+
+
+admin.site.register(JobCheckpoint, JobCheckpointAdmin)
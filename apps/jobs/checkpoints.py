@@ -0,0 +1,39 @@
+from django.utils import timezone
+
+from apps.jobs.models import JobCheckpoint
+
+
+def get_checkpoint(name):
+    """
+    Get the position saved by the previous run of a job.
+
+    Parameters:
+    name (str): The name of the checkpoint.
+
+    Returns:
+    The saved position, or None if the job must start from the beginning.
+    """
+    return (
+        JobCheckpoint.objects.filter(name=name)
+        .values_list("position", flat=True)
+        .first()
+    )
+
+
+def save_checkpoint(name, position):
+    """
+    Save the position reached by a job.
+
+    Parameters:
+    name (str): The name of the checkpoint.
+    position: A JSON serializable position, None to start the next run from the
+        beginning.
+
+    Returns:
+    None
+    """
+    updated = JobCheckpoint.objects.filter(name=name).update(
+        position=position, updated=timezone.now()
+    )
+    if not updated:
+        JobCheckpoint.objects.create(name=name, position=position)
@@ -0,0 +1,11 @@
+import time
+
+
+class Deadline:
+    """Tell whether the time of a run is over, a run without time limit never ends."""
+
+    def __init__(self, seconds=None):
+        self.end = None if seconds is None else time.monotonic() + seconds
+
+    def passed(self):
+        return self.end is not None and time.monotonic() >= self.end
@@ -0,0 +1,19 @@
+from django.db import models
+
+from apps.abstracts.models import AbstractModel
+
+
+class JobCheckpoint(AbstractModel):
+    """
+    The position reached by a periodic job, so the next run resumes from it.
+
+    Args:
+        name ( str ): the name of the job and of the walked table.
+        position ( json ): the last key processed, null to start from the beginning.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.JSONField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
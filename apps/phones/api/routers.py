@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+
+from apps.phones.api.viewsets import PhoneViewSet
+
+router = DefaultRouter()
+router.register(r"phones", PhoneViewSet, basename="phones")
+urlpatterns = router.urls
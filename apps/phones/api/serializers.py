@@ -5,11 +5,11 @@ from apps.phones.models import Phones
 
 
 class PhoneNumberSerializer(serializers.Serializer):
-    phone = PhoneNumberField(region="MX")
+    phone = PhoneNumberField()
 
 
 class PhonesSerializer(serializers.ModelSerializer):
-    phone = PhoneNumberField(region="MX")
+    phone = PhoneNumberField()
 
     class Meta:
         model = Phones
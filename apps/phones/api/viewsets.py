@@ -0,0 +1,40 @@
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.phones.lookup import lookup_contacts
+from apps.users.api.permissions import CreateUserPermission
+
+
+class PhoneViewSet(viewsets.GenericViewSet):
+    permission_classes = [CreateUserPermission]
+
+    @extend_schema(
+        description="Busca los contactos que tienen un número de teléfono",
+        summary="Phones",
+        parameters=[OpenApiParameter("number", str, required=True)],
+        responses={200: None},
+    )
+    @action(methods=["get"], detail=False)
+    def lookup(self, request):
+        """
+        Find the contacts of the user that own an incoming phone number.
+
+        Args:
+        self: The PhoneViewSet instance.
+        request: The request object with the number in the query parameters.
+
+        Returns:
+        Response: A response containing the matching contacts, exact matches first.
+
+        Raises:
+        N/A
+        """
+        number = request.query_params.get("number", "")
+        if not any(character.isdigit() for character in number):
+            return Response(
+                {"message": "Debe enviar un número de teléfono"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(lookup_contacts(request.user, number))
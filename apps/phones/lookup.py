@@ -0,0 +1,98 @@
+from functools import cache
+
+from django.conf import settings
+from django.db import connection
+from phonenumber_field.phonenumber import PhoneNumber
+from phonenumbers import NumberParseException
+
+from apps.contacts.models import Contacts
+from apps.phones.models import PHONE_SUFFIX_LENGTH, Phones, phone_to_digits
+
+
+def normalize_number(number, region=None):
+    """
+    Get the E.164 digits of an incoming number.
+
+    Numbers that can not be parsed are reduced to their digits, so a number without
+    country code still matches by its suffix.
+
+    Parameters:
+    number (str): The incoming number.
+    region (str): The region used to parse numbers without country code, by default
+        PHONENUMBER_DEFAULT_REGION.
+
+    Returns:
+    str: The digits of the number.
+    """
+    try:
+        phone = PhoneNumber.from_string(
+            number, region=region or settings.PHONENUMBER_DEFAULT_REGION
+        )
+    except NumberParseException:
+        return phone_to_digits(number)
+    if phone.is_valid():
+        return phone_to_digits(phone)
+    return phone_to_digits(number)
+
+
+@cache
+def get_lookup_sql():
+    """
+    Build the SQL of the reverse lookup from the metadata of the models.
+
+    The statement is built once, so a lookup does not pay the cost of compiling an
+    ORM query with two joins on every call.
+
+    Returns:
+    str: The SQL statement with the suffix and the user id as parameters.
+    """
+    field = Contacts._meta.get_field("phones")
+    through = field.remote_field.through._meta
+    contact_column = through.get_field(field.m2m_field_name()).column
+    phone_column = through.get_field(field.m2m_reverse_field_name()).column
+    return (
+        "SELECT contact.id, contact.name, contact.last_name, contact.company, "
+        "phone.phone_digits, phone.phone_type "
+        f"FROM {Phones._meta.db_table} phone "
+        f"INNER JOIN {through.db_table} contact_phone "
+        f"ON contact_phone.{phone_column} = phone.id "
+        f"INNER JOIN {Contacts._meta.db_table} contact "
+        f"ON contact.id = contact_phone.{contact_column} "
+        "WHERE phone.phone_suffix = %s AND contact.user_id = %s "
+        "AND contact.is_active"
+    )
+
+
+def lookup_contacts(user, number):
+    """
+    Find the active contacts of a user that have a phone number.
+
+    The phones are matched by the indexed suffix of their digits, the exact matches
+    of the whole number are returned first.
+
+    Parameters:
+    user (User): The owner of the contacts.
+    number (str): The incoming number.
+
+    Returns:
+    list: A dictionary per contact and matching phone.
+    """
+    digits = normalize_number(number)
+    if not digits:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(get_lookup_sql(), [digits[-PHONE_SUFFIX_LENGTH:], user.id])
+        rows = cursor.fetchall()
+    matches = [
+        {
+            "id": contact_id,
+            "name": name,
+            "last_name": last_name,
+            "company": company,
+            "phone": f"+{phone_digits}",
+            "phone_type": phone_type,
+            "exact": phone_digits == digits,
+        }
+        for contact_id, name, last_name, company, phone_digits, phone_type in rows
+    ]
+    return sorted(matches, key=lambda match: not match["exact"])
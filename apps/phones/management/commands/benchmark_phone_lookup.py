@@ -0,0 +1,99 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.contacts.models import Contacts
+from apps.phones.lookup import lookup_contacts
+from apps.phones.models import Phones
+from apps.users.models import User
+
+BATCH_SIZE = 10_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de la búsqueda inversa de teléfonos sobre una tabla de "
+        "teléfonos sembrada"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--phones", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--lookups", type=int, default=1000)
+        parser.add_argument("--max-p50-ms", type=float, default=1.0)
+
+    def seed(self, users, count):
+        """Create one contact with one phone per row, spread over the users."""
+        through = Contacts.phones.through
+        for start in range(0, count, BATCH_SIZE):
+            size = min(BATCH_SIZE, count - start)
+            contacts = [
+                Contacts(
+                    name=f"Nombre {index}",
+                    last_name="Apellido",
+                    user=users[index % len(users)],
+                )
+                for index in range(start, start + size)
+            ]
+            phones = [
+                Phones(phone=f"+52{5500000000 + index}", phone_type="MO")
+                for index in range(start, start + size)
+            ]
+            Contacts.objects.bulk_create(contacts)
+            Phones.objects.bulk_create(phones)
+            through.objects.bulk_create(
+                [
+                    through(contacts=contact, phones=phone)
+                    for contact, phone in zip(contacts, phones)
+                ]
+            )
+
+    def handle(self, *args, **options):
+        count = options["phones"]
+        rng = random.Random(0)
+
+        # The dataset is rolled back at the end of the benchmark
+        with transaction.atomic():
+            users = [
+                User.objects.create_user(
+                    username=uuid.uuid4().hex[:10],
+                    email=f"{uuid.uuid4().hex}@bench.local",
+                )
+                for _ in range(options["users"])
+            ]
+            self.seed(users, count)
+            with transaction.get_connection().cursor() as cursor:
+                cursor.execute(
+                    "ANALYZE phones_phones, contacts_contacts, contacts_contacts_phones"
+                )
+
+            timings = []
+            for _ in range(options["lookups"]):
+                index = rng.randrange(count)
+                # Half of the numbers are looked up without the country code
+                number = str(5500000000 + index)
+                if rng.random() < 0.5:
+                    number = f"+52{number}"
+                start = time.perf_counter()
+                matches = lookup_contacts(users[index % len(users)], number)
+                timings.append((time.perf_counter() - start) * 1000)
+                if not matches:
+                    raise CommandError(f"No se encontró el número {number}")
+
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p50 = statistics.median(timings)
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(
+            f"phones={count} lookups={len(timings)} "
+            f"p50={p50:.3f}ms p99={p99:.3f}ms max={timings[-1]:.3f}ms"
+        )
+        if p50 > options["max_p50_ms"]:
+            raise CommandError(
+                f"El p50 de la búsqueda ({p50:.3f}ms) supera {options['max_p50_ms']}ms"
+            )
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+
+def fill_lookup_digits(apps, schema_editor):
+    Phones = apps.get_model("phones", "Phones")
+    batch = []
+    for phone in Phones.objects.only("id", "phone").iterator(chunk_size=BATCH_SIZE):
+        digits = "".join(c for c in phone.phone.as_e164 if c.isdigit())
+        phone.phone_digits = digits
+        phone.phone_suffix = digits[-10:]
+        batch.append(phone)
+        if len(batch) == BATCH_SIZE:
+            Phones.objects.bulk_update(batch, ["phone_digits", "phone_suffix"])
+            batch = []
+    Phones.objects.bulk_update(batch, ["phone_digits", "phone_suffix"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("phones", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="phones",
+            name="phone_digits",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=20
+            ),
+        ),
+        migrations.AddField(
+            model_name="phones",
+            name="phone_suffix",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=10
+            ),
+        ),
+        migrations.RunPython(fill_lookup_digits, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="phones",
+            index=models.Index(fields=["phone_suffix"], name="phones_suffix_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="phones",
+            index=models.Index(fields=["phone_digits"], name="phones_digits_idx"),
+        ),
+    ]
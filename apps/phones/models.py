@@ -1,7 +1,7 @@
 from django.db import models
 from phonenumber_field.modelfields import PhoneNumberField
 
-from apps.abstracts.models import AbstractModel
+from apps.abstracts.models import AbstractManager, AbstractModel
 
 # Create your models here.
 
@@ -17,12 +17,74 @@ PHONE_TYPE_CHOICES = {
     "OT": "Otro",
 }
 
+# Number of trailing digits used to match numbers with and without country code
+PHONE_SUFFIX_LENGTH = 10
+
+
+def phone_to_digits(phone):
+    """
+    Get the digits of a phone number in E.164 format without the plus sign.
+
+    Parameters:
+    phone (PhoneNumber | str): The phone number.
+
+    Returns:
+    str: The digits of the phone number, or an empty string if there is no number.
+    """
+    if not phone:
+        return ""
+    value = phone.as_e164 if hasattr(phone, "as_e164") else str(phone)
+    return "".join(character for character in value if character.isdigit())
+
+
+class PhoneManager(AbstractManager):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Fill the lookup digits of the phones before inserting them.
+
+        bulk_create does not call save, so the lookup columns are computed here.
+        """
+        for phone in objs:
+            phone.set_lookup_digits()
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class Phones(AbstractModel):
     phone = PhoneNumberField(blank=False)
     phone_type = models.CharField(
         max_length=2, choices=PHONE_TYPE_CHOICES, default="MO"
     )
+    # Normalized digits for the reverse lookup of incoming numbers
+    phone_digits = models.CharField(
+        max_length=20, blank=True, default="", editable=False
+    )
+    phone_suffix = models.CharField(
+        max_length=PHONE_SUFFIX_LENGTH, blank=True, default="", editable=False
+    )
+    objects = PhoneManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["phone_suffix"], name="phones_suffix_idx"),
+            models.Index(fields=["phone_digits"], name="phones_digits_idx"),
+        ]
+
+    def set_lookup_digits(self):
+        """
+        Compute the normalized digits and the suffix of the phone number.
+
+        Returns:
+        None
+        """
+        self.phone_digits = phone_to_digits(self.phone)
+        self.phone_suffix = self.phone_digits[-PHONE_SUFFIX_LENGTH:]
+
+    def save(self, *args, **kwargs):
+        self.set_lookup_digits()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_digits", "phone_suffix"}
+        super().save(*args, **kwargs)
 
     def str(self):
         return f"<Telefono: {self.phone}, {self.phone_type}>"
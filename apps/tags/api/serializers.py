@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from apps.tags.cache import get_tag
 from apps.tags.models import Tags
 
 
@@ -7,17 +8,19 @@ class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tags
         fields = ("tag",)
+        # The submitted codes are resolved to the canonical tags, they are never
+        # inserted, so an existing code is valid
+        extra_kwargs = {"tag": {"validators": []}}
 
 
 class TagRegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tags
         fields = ("tag",)
+        extra_kwargs = {"tag": {"validators": []}}
 
     def save(self):
-        print(f"Validated data: {self.validated_data} ")
-        new_tag = Tags.objects.create(**self.validated_data)
-        return new_tag
+        return get_tag(self.validated_data["tag"])
 
 
 class TagListSerializer(serializers.ModelSerializer):
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TagsConfig(AppConfig):
     name = "apps.tags"
+
+    def ready(self):
+        from apps.tags import signals  # noqa: F401
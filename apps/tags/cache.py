@@ -0,0 +1,48 @@
+from django.db import transaction
+
+from apps.tags.models import Tags
+
+# Canonical tag of every code, shared by the threads of the process
+_tags = {}
+
+
+def get_tag(code):
+    """
+    Get the canonical tag of a code.
+
+    There is a single row per code shared by all the contacts, it is read from the
+    database once per process. A row created inside a transaction is only cached
+    after the commit, so a rollback never leaves an unknown id in the cache.
+
+    Parameters:
+    code (str): The code of the tag, one of TAG_CHOICES.
+
+    Returns:
+    Tags: The canonical tag.
+    """
+    tag = _tags.get(code)
+    if tag is None:
+        tag, created = Tags.objects.get_or_create(tag=code)
+        if created and transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: _tags.setdefault(code, tag))
+        else:
+            _tags[code] = tag
+    return tag
+
+
+def resolve_tags(items):
+    """
+    Get the canonical tags of some tags, without repeated codes.
+
+    Parameters:
+    items (list): Unsaved tags or dictionaries with the tag key.
+
+    Returns:
+    list: The canonical tags in the order of their first appearance.
+    """
+    codes = [item["tag"] if isinstance(item, dict) else item.tag for item in items]
+    return [get_tag(code) for code in dict.fromkeys(codes)]
+
+
+def clear_tag_cache():
+    _tags.clear()
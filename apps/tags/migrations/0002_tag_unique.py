@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tags", "0001_initial"),
+        # The duplicate tags are merged before the constraint is created
+        ("contacts", "0008_merge_duplicate_tags"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="tags",
+            constraint=models.UniqueConstraint(fields=("tag",), name="tags_tag_unique"),
+        ),
+    ]
@@ -13,4 +13,12 @@ TAG_CHOICES = {
 
 
 class Tags(AbstractModel):
+    """
+    A tag of the contacts. There is one canonical row per code shared by all the
+    contacts, see apps.tags.cache.
+    """
+
     tag = models.CharField(max_length=2, choices=TAG_CHOICES, default="FR")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tag"], name="tags_tag_unique")]
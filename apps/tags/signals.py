@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.tags.cache import clear_tag_cache
+from apps.tags.models import Tags
+
+
+@receiver(post_delete, sender=Tags)
+def tag_deleted(sender, instance, **kwargs):
+    # A deleted canonical tag is created again by the next contact that uses it
+    clear_tag_cache()
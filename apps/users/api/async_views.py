@@ -0,0 +1,25 @@
+from apps.users.api.serializers import UserListSerializer
+from apps.users.api.viewsets import UserViewSet
+from apps.users.models import User
+from utils.views import AsyncReadOnlyView
+
+
+class AsyncUserView(AsyncReadOnlyView):
+    """Async list and detail of the users, with the filters of UserViewSet."""
+
+    serializer_class = UserListSerializer
+    list_serializer_class = UserListSerializer
+    filter_backends = UserViewSet.filter_backends
+    filterset_class = UserViewSet.filterset_class
+    search_fields = UserViewSet.search_fields
+    ordering_fields = UserViewSet.ordering_fields
+    keyset_ordering = UserViewSet.keyset_ordering
+
+    def get_queryset(self):
+        """
+        Get the active users.
+
+        Returns:
+        queryset: The id, username and created date of the active users.
+        """
+        return User.objects.filter(is_active=True).values("id", "username", "created")
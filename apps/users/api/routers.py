@@ -1,7 +1,12 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from apps.users.api.async_views import AsyncUserView
 from apps.users.api.viewsets import UserViewSet
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="users")
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/users/", AsyncUserView.as_view(), name="users-async-list"),
+    path("async/users/<str:pk>/", AsyncUserView.as_view(), name="users-async-detail"),
+]
@@ -1,23 +1,26 @@
 from django.shortcuts import get_object_or_404
 from django_filters import rest_framework
 from drf_spectacular.utils import extend_schema
-from rest_framework import filters, status, viewsets
+from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from apps.abstracts.models import bulk_set_active
 from apps.users.api.serializers import (
     PasswordSerializer,
     UserListSerializer,
     UserSerializer,
     UserUpdateSerializer,
 )
+from apps.users.cache import schedule_forget_active_states
 from utils.filters import UserFilterSet
-from utils.pagination import ExtendedPagination
+from utils.pagination import SelectablePagination
+from utils.views import BulkStateMixin, ReplicaReadMixin
 
 from .permissions import CreateUserPermission
 
 
-class UserViewSet(viewsets.GenericViewSet):
+class UserViewSet(ReplicaReadMixin, BulkStateMixin, viewsets.GenericViewSet):
     serializer_class = UserSerializer
 
     list_serializer_class = UserListSerializer
@@ -29,23 +32,50 @@ class UserViewSet(viewsets.GenericViewSet):
     filterset_class = UserFilterSet
     search_fields = ("email", "username")
     ordering_fields = ("email", "username")
-    pagination_class = ExtendedPagination
+    pagination_class = SelectablePagination
+    keyset_ordering = ("created", "id")
     permission_classes = [CreateUserPermission]
 
+    def get_permissions(self):
+        # Only the staff can deactivate or restore many users at once
+        if self.action in self.bulk_state_actions:
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
+    def get_bulk_state_queryset(self):
+        return self.serializer_class.Meta.model.objects.all()
+
+    def set_active(self, queryset, is_active, validated_data):
+        """
+        Deactivate or restore the selected users.
+
+        Args:
+        queryset (QuerySet): The selected users.
+        is_active (bool): The new state of the users.
+        validated_data (dict): The validated data of the request.
+
+        Returns:
+        dict: The number of updated users.
+        """
+        updated = bulk_set_active(queryset, is_active)
+        # The update does not send signals, the authentication caches the state
+        schedule_forget_active_states(user_id for user_id, in updated)
+        return {"updated": len(updated)}
+
     def get_queryset(self):
         """
         Get the queryset for the UserViewSet.
 
         If the queryset is not already defined, it filters the model objects based on the 'is_active' field
-        and returns a queryset containing only the 'id', 'username', and 'email' fields.
+        and returns a queryset containing only the 'id', 'username' and 'created' fields.
 
         Returns:
-        queryset: A filtered queryset containing 'id', 'username', and 'email' fields of active users.
+        queryset: A filtered queryset containing 'id', 'username' and 'created' fields of active users.
         """
         if self.queryset is None:
             self.queryset = self.serializer_class.Meta.model.objects.filter(
                 is_active=True
-            ).values("id", "username")
+            ).values("id", "username", "created")
             return self.queryset
 
     def get_object(self, pk):
@@ -232,6 +262,8 @@ class UserViewSet(viewsets.GenericViewSet):
             is_active=False
         )
         if user_destroy == 1:
+            # The update does not send signals, the authentication caches the state
+            schedule_forget_active_states([pk])
             return Response(
                 {"message": "Usuario eliminado correctamente!"},
                 status=status.HTTP_200_OK,
@@ -0,0 +1,62 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.users.models import User
+
+ACTIVE_KEY = "users:active:{user_id}"
+
+
+def get_key(user_id):
+    """Get the cache key of the state of a user, the same for any form of the id."""
+    return ACTIVE_KEY.format(user_id=uuid.UUID(str(user_id)))
+
+
+def get_active_state(user_id):
+    """
+    Get whether a user is active, from the cache or from the database.
+
+    The state is cached for USER_STATE_CACHE_TIMEOUT seconds and forgotten when the
+    user changes, so the authentication of the requests does not read the user.
+
+    Parameters:
+    user_id (UUID): The id of the user.
+
+    Returns:
+    bool: Whether the user exists and is active.
+    """
+    key = get_key(user_id)
+    is_active = cache.get(key)
+    if is_active is None:
+        is_active = bool(
+            User.objects.filter(pk=user_id).values_list("is_active", flat=True).first()
+        )
+        cache.set(key, is_active, timeout=settings.USER_STATE_CACHE_TIMEOUT)
+    return is_active
+
+
+def forget_active_states(user_ids):
+    """
+    Remove the cached state of some users.
+
+    Parameters:
+    user_ids (iterable): The ids of the users.
+
+    Returns:
+    None
+    """
+    cache.delete_many([get_key(user_id) for user_id in user_ids])
+
+
+def schedule_forget_active_states(user_ids):
+    """
+    Remove the cached state of some users after the commit.
+
+    Forgetting after the commit avoids caching the old state again while the
+    transaction is still open.
+    """
+    user_ids = set(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: forget_active_states(user_ids))
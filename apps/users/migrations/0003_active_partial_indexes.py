@@ -0,0 +1,26 @@
+# Generated by Django 5.0.4 on 2026-10-18 02:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="user",
+            name="users_created_id_idx",
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["created", "id"],
+                name="users_active_created_idx",
+            ),
+        ),
+    ]
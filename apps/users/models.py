@@ -28,3 +28,11 @@ class User(PermissionsMixin, AbstractBaseUser, AbstractModel):
     class Meta:
         verbose_name = "Usuario"
         verbose_name_plural = "Usuarios"
+        indexes = [
+            # Keyset pagination of the active users
+            models.Index(
+                fields=["created", "id"],
+                name="users_active_created_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.cache import schedule_forget_active_states
+from apps.users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_state(sender, instance, **kwargs):
+    """Forget the cached active state of a saved or deleted user."""
+    schedule_forget_active_states([instance.pk])
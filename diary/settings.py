@@ -10,15 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
-import logging  # package for logging module
 import os
 from datetime import timedelta
 from pathlib import Path
 
 import environ  # package for environment´s variables control
-
-logging.basicConfig(level=logging.DEBUG)  # Assign default level to debug
-logger = logging.getLogger()  # Obtain the logger instance
+from django.core.exceptions import ImproperlyConfigured
 
 env = environ.Env(
     # set casting, default value
@@ -54,6 +51,7 @@ BASE_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 # Local applications
@@ -66,6 +64,8 @@ LOCAL_APPS = [
     "apps.phones",
     "apps.related_persons",
     "apps.tags",
+    "apps.jobs",
+    "apps.authentication",
 ]
 
 # Third persons applications
@@ -88,6 +88,7 @@ INSTALLED_APPS = BASE_APPS + LOCAL_APPS + THIRD_APPS
 
 
 MIDDLEWARE = [
+    "utils.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -122,19 +123,144 @@ WSGI_APPLICATION = "diary.wsgi.application"
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 # Settings for use a PostgresSQL database
 
+# Role of the process: web (WSGI), async (ASGI) or worker (management commands and
+# background jobs), every role has its own size of connection pool
+APP_ROLE = env("APP_ROLE", default="web")
+
+DB_POOL_SIZES = {
+    "web": env.int("DB_POOL_SIZE_WEB", default=10),
+    "async": env.int("DB_POOL_SIZE_ASYNC", default=20),
+    "worker": env.int("DB_POOL_SIZE_WORKER", default=4),
+}
+
+# Connection management of the database:
+# - persistent: every thread keeps its connection for DB_CONN_MAX_AGE seconds
+# - pool: the connections are checked out from a psycopg 3 pool, needs psycopg[pool]
+# - pgbouncer: persistent connections to pgbouncer in transaction pooling mode, the
+#   server side cursors are disabled because they do not survive the transaction
+DB_CONN_MODE = env("DB_CONN_MODE", default="persistent")
+
+if APP_ROLE not in DB_POOL_SIZES:
+    raise ImproperlyConfigured(f"APP_ROLE no válido: {APP_ROLE}")
+if DB_CONN_MODE not in ("persistent", "pool", "pgbouncer"):
+    raise ImproperlyConfigured(f"DB_CONN_MODE no válido: {DB_CONN_MODE}")
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "utils.db.postgresql",
         "NAME": env("DB_NAME"),
         "USER": env("DB_USER"),
         "PASSWORD": env("DB_PASSWORD"),
         "HOST": env("DB_HOST"),
         "PORT": env("DB_PORT"),
+        # The async requests run in a new thread each, so their connections can not
+        # be reused and are closed at the end of the request
+        "CONN_MAX_AGE": (
+            env.int("DB_CONN_MAX_AGE", default=60)
+            if DB_CONN_MODE != "pool" and APP_ROLE != "async"
+            else 0
+        ),
+        "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", default=True),
+        "DISABLE_SERVER_SIDE_CURSORS": DB_CONN_MODE == "pgbouncer",
+        "OPTIONS": {},
     }
 }
 
+if DB_CONN_MODE == "pool":
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": env.int("DB_POOL_MIN_SIZE", default=1),
+        "max_size": DB_POOL_SIZES[APP_ROLE],
+        "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+    }
+
+# Read replicas, as database URLs separated by commas. The safe requests of the
+# contacts and users views read from a healthy replica, a user that wrote reads from
+# the primary during DB_READ_YOUR_WRITES_SECONDS
+DB_REPLICAS = []
+for index, url in enumerate(env.list("DB_REPLICA_URLS", default=[]), start=1):
+    replica = env.db_url_config(url)
+    if replica["ENGINE"] == "django.db.backends.postgresql":
+        replica["ENGINE"] = DATABASES["default"]["ENGINE"]
+        replica["OPTIONS"] = dict(DATABASES["default"]["OPTIONS"])
+    for option in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "DISABLE_SERVER_SIDE_CURSORS"):
+        replica[option] = DATABASES["default"][option]
+    replica["TEST"] = {"MIRROR": "default"}
+    DATABASES[f"replica{index}"] = replica
+    DB_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["utils.db.routers.ReplicaRouter"]
+DB_READ_YOUR_WRITES_SECONDS = env.int("DB_READ_YOUR_WRITES_SECONDS", default=5)
+DB_REPLICA_MAX_LAG = env.float("DB_REPLICA_MAX_LAG", default=5.0)
+DB_REPLICA_CHECK_INTERVAL = env.float("DB_REPLICA_CHECK_INTERVAL", default=5.0)
+
+# Maximum number of async requests using the database at the same time in a process,
+# every async request runs its queries in its own thread and connection
+ASYNC_DB_CONCURRENCY = env.int("ASYNC_DB_CONCURRENCY", default=DB_POOL_SIZES["async"])
+
 SITE_ID = 1
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The backends are chosen with cache URLs, e.g. locmemcache:// or redis://host:6379/1
+# (the redis backend needs the redis package)
+
+# The contact responses are cached in the memory of every process by default, keyed
+# by their ETag so no worker serves a stale response, a shared cache avoids caching
+# them once per process and dummycache:// disables it, see apps.contacts.cache
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+    "contacts": env.cache("CONTACTS_CACHE_URL", default="locmemcache://contacts"),
+}
+
+# Seconds the authentication trusts the cached active state of a user, the state is
+# forgotten when the user changes, see apps.users.cache
+USER_STATE_CACHE_TIMEOUT = env.int("USER_STATE_CACHE_TIMEOUT", default=30)
+
+# Cache of the contact responses, invalidated by the ETag of the response and by the
+# address book version of the user kept in the same cache
+CONTACTS_CACHE_ALIAS = "contacts"
+CONTACTS_CACHE_TIMEOUT = env.int("CONTACTS_CACHE_TIMEOUT", default=300)
+
+# Seconds the last token of a delta sync is moved back, so the rows saved by a
+# transaction still open when it is issued, whose updated date is older, are sent
+# again next time. The changes of a transaction that writes contacts for longer than
+# the margin may never be synced, so it has to exceed the longest one, e.g. a chunk
+# of CONTACT_IMPORT_CHUNK_SIZE contacts of an import
+CONTACTS_SYNC_MARGIN_SECONDS = env.int("CONTACTS_SYNC_MARGIN_SECONDS", default=60)
+
+# Soft deleted contacts are hard deleted by the purge_deleted command after this
+# period, the delta sync tokens older than it are rejected
+PURGE_RETENTION_DAYS = env.int("PURGE_RETENTION_DAYS", default=30)
+# Child rows without a contact are only deleted when they are older than this
+PURGE_ORPHAN_GRACE_HOURS = env.int("PURGE_ORPHAN_GRACE_HOURS", default=24)
+PURGE_BATCH_SIZE = env.int("PURGE_BATCH_SIZE", default=1000)
+
+# Daily digest of the upcoming important dates, see the send_reminder_digests command
+DIGEST_DAYS = env.int("DIGEST_DAYS", default=7)
+DIGEST_TYPES = env.list("DIGEST_TYPES", default=["BI", "AN"])
+# Users whose digests are sent between two checkpoints
+DIGEST_BATCH_SIZE = env.int("DIGEST_BATCH_SIZE", default=500)
+
+# Imports of vCard and CSV documents, see apps.contacts.imports
+CONTACT_IMPORT_CHUNK_SIZE = env.int("CONTACT_IMPORT_CHUNK_SIZE", default=500)
+CONTACT_IMPORT_MAX_ERRORS = env.int("CONTACT_IMPORT_MAX_ERRORS", default=1000)
+CONTACT_IMPORT_MAX_FILE_SIZE = env.int(
+    "CONTACT_IMPORT_MAX_FILE_SIZE", default=200 * 1024 * 1024
+)
+# The imports run in a thread of the web process, otherwise within the request
+CONTACT_IMPORT_IN_BACKGROUND = env.bool("CONTACT_IMPORT_IN_BACKGROUND", default=True)
+
+# Instrumentation of the requests, see utils.middleware.InstrumentationMiddleware
+INSTRUMENTATION_SAMPLE_RATE = env.float("INSTRUMENTATION_SAMPLE_RATE", default=0.05)
+# Times the same query shape runs in one request before it is reported as an N+1
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = env.int(
+    "INSTRUMENTATION_N_PLUS_ONE_THRESHOLD", default=5
+)
+# The timings reveal the cost of the queries, they are only sent on demand
+INSTRUMENTATION_SERVER_TIMING = env.bool("INSTRUMENTATION_SERVER_TIMING", default=DEBUG)
+# Bearer token of the scraper of /metrics, the staff can read them with a session
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -153,6 +279,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The PBKDF2 iterations of the new hashes, the default of Django when unset, see the
+# benchmark_login command to fit them to the login latency SLO
+PASSWORD_HASHER_ITERATIONS = env.int("PASSWORD_HASHER_ITERATIONS", default=None)
+PASSWORD_HASHERS = [
+    "apps.authentication.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+# Latency objective of a successful login in milliseconds
+LOGIN_LATENCY_SLO_MS = env.float("LOGIN_LATENCY_SLO_MS", default=500.0)
+
+# Throttling of the login attempts by address and by username, counted in the default
+# cache, which has to be shared by the workers, see apps.authentication.throttling.
+# The address is taken behind the NUM_PROXIES proxies of REST_FRAMEWORK
+LOGIN_THROTTLE_WINDOW_SECONDS = env.int("LOGIN_THROTTLE_WINDOW_SECONDS", default=60)
+# Attempts allowed per window, 0 for no limit
+LOGIN_THROTTLE_IP_LIMIT = env.int("LOGIN_THROTTLE_IP_LIMIT", default=30)
+LOGIN_THROTTLE_USERNAME_LIMIT = env.int("LOGIN_THROTTLE_USERNAME_LIMIT", default=10)
+# Consecutive failures before the exponential backoff, which starts at the base and
+# doubles on every failure up to the maximum
+LOGIN_BACKOFF_FREE_FAILURES = env.int("LOGIN_BACKOFF_FREE_FAILURES", default=5)
+LOGIN_BACKOFF_BASE_SECONDS = env.float("LOGIN_BACKOFF_BASE_SECONDS", default=1.0)
+LOGIN_BACKOFF_MAX_SECONDS = env.float("LOGIN_BACKOFF_MAX_SECONDS", default=900.0)
+
 AUTH_USER_MODEL = "users.User"
 
 # Internationalization
@@ -166,6 +318,10 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Region of the phone numbers without country code, used by phonenumber_field and by
+# the imports and the caller lookup
+PHONENUMBER_DEFAULT_REGION = env("PHONENUMBER_DEFAULT_REGION", default="MX")
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
@@ -176,7 +332,7 @@ DRF_STANDARDIZED_ERRORS = {"ENABLE_IN_DEBUG_FOR_UNHANDLED_EXCEPTIONS": True}
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.authentication.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_standardized_errors.openapi.AutoSchema",
@@ -191,11 +347,26 @@ SIMPLE_JWT = {
     "UPDATE_LAST_LOGIN": True,
     "SIGNING_KEY": "complexsigningkey",  # generate a key and replace me
     "ALGORITHM": "HS512",
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "apps.authentication.serializers.ClaimsTokenObtainPairSerializer"
+    ),
+    "TOKEN_VERIFY_SERIALIZER": (
+        "apps.authentication.serializers.RevocableTokenVerifySerializer"
+    ),
 }
 
+# Seconds between two loads of the revoked tokens in every worker, the longest delay
+# until a token revoked by a worker is rejected by the others
+TOKEN_REVOCATION_REFRESH_SECONDS = env.float(
+    "TOKEN_REVOCATION_REFRESH_SECONDS", default=5.0
+)
+
 REST_AUTH = {
     "USE_JWT": True,
     "JWT_AUTH_HTTPONLY": False,
+    "JWT_TOKEN_CLAIMS_SERIALIZER": (
+        "apps.authentication.serializers.ClaimsTokenObtainPairSerializer"
+    ),
     # "REGISTER_SERIALIZER": "apps.users.api.serializers.UserRegistrationSerializer",
 }
 
@@ -262,12 +433,12 @@ LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "root": {
-        "level": "DEBUG",
+        "level": env("LOG_LEVEL", default="INFO"),
         # Adding the watchtower handler here causes all loggers in the project that
         # have propagate=True (the default) to send messages to watchtower. If you
         # wish to send only from specific loggers instead, remove "watchtower" here
         # and configure individual loggers below.
-        "handlers": ["console"],
+        "handlers": ["console", "errors"],
     },
     "filters": {
         "require_debug_false": {
@@ -290,6 +461,12 @@ LOGGING = {
             "filters": ["require_debug_true"],
             "class": "logging.StreamHandler",
         },
+        # The warnings and errors of the application outside of DEBUG
+        "errors": {
+            "level": "WARNING",
+            "filters": ["require_debug_false"],
+            "class": "logging.StreamHandler",
+        },
         "django.server": {
             "level": "INFO",
             "class": "logging.StreamHandler",
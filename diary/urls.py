@@ -25,11 +25,14 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from utils.views import metrics_view
+
 urlpatterns = [
     path("api/auth/", include("apps.authentication.urls")),
     path("admin/", admin.site.urls),
     re_path(r"^api/", include("apps.users.api.routers"), name="users"),
     re_path(r"^api/", include("apps.contacts.api.routers"), name="contacts"),
+    re_path(r"^api/", include("apps.phones.api.routers"), name="phones"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     # Optional UI:
     path(
@@ -43,6 +46,7 @@ urlpatterns = [
         name="redoc",
     ),
     path("accounts/", include("allauth.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
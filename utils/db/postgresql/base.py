@@ -0,0 +1,111 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+from utils import metrics
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend with an optional psycopg 3 connection pool and metrics.
+
+    When OPTIONS has a pool dictionary (min_size, max_size, timeout) the connections
+    are checked out from a psycopg_pool.ConnectionPool shared by the threads of the
+    process and returned to it when Django closes them, like the pool option of
+    Django 5.1. Every new connection or checkout is counted in the
+    db_connection_checkouts metric and the time waited in db_connection_wait_seconds.
+    """
+
+    def get_pool_options(self):
+        return self.settings_dict["OPTIONS"].get("pool")
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    @property
+    def pool(self):
+        """
+        Get the pool of connections of the database alias, creating it on first use.
+
+        Returns:
+        ConnectionPool: The pool, or None if the alias does not use a pool.
+
+        Raises:
+        ImproperlyConfigured: If psycopg 3 or psycopg_pool are not installed, or
+            CONN_MAX_AGE is not 0.
+        """
+        options = self.get_pool_options()
+        if not options:
+            return None
+        pool = _pools.get(self.alias)
+        if pool is not None:
+            return pool
+        if not is_psycopg3:
+            raise ImproperlyConfigured("El pool de conexiones requiere psycopg 3")
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise ImproperlyConfigured(
+                "El pool de conexiones requiere el paquete psycopg[pool]"
+            )
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "CONN_MAX_AGE debe ser 0 cuando se usa el pool de conexiones"
+            )
+
+        with _pools_lock:
+            if self.alias not in _pools:
+                _pools[self.alias] = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    check=(
+                        ConnectionPool.check_connection
+                        if self.settings_dict["CONN_HEALTH_CHECKS"]
+                        else None
+                    ),
+                    name=self.alias,
+                    open=True,
+                    **options,
+                )
+        return _pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        start = time.monotonic()
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+        else:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+            connection = pool.getconn()
+        labels = {
+            "alias": self.alias,
+            "role": settings.APP_ROLE,
+            "source": "connect" if pool is None else "pool",
+        }
+        metrics.increment("db_connection_checkouts", **labels)
+        metrics.increment(
+            "db_connection_wait_seconds", time.monotonic() - start, **labels
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+
+    def close_pool(self):
+        """Close the pool of the database alias, the next query opens a new one."""
+        with _pools_lock:
+            pool = _pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
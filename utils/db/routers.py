@@ -0,0 +1,125 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from utils import metrics
+
+PINNED_KEY = "db:pinned:{user_id}"
+
+# Seconds behind the primary of a replica, 0 when it has replayed all the WAL received
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+"""
+
+read_from_replicas = ContextVar("read_from_replicas", default=False)
+
+_health = {}
+
+
+def pin_user(user):
+    """
+    Send the reads of a user to the primary for DB_READ_YOUR_WRITES_SECONDS.
+
+    Called after a write of the user, so the next reads see it even if the replicas
+    did not replay it yet. The pin is stored in the default cache, so it is shared by
+    the processes when the cache is shared.
+    """
+    if user is not None and user.is_authenticated:
+        cache.set(
+            PINNED_KEY.format(user_id=user.pk),
+            True,
+            timeout=settings.DB_READ_YOUR_WRITES_SECONDS,
+        )
+
+
+def is_pinned(user):
+    """Whether the reads of a user must go to the primary."""
+    if user is None or not user.is_authenticated:
+        return False
+    return cache.get(PINNED_KEY.format(user_id=user.pk), False)
+
+
+def get_replica_lag(alias):
+    """
+    Get the replication lag of a database in seconds.
+
+    Parameters:
+    alias (str): The alias of the replica.
+
+    Returns:
+    float: The seconds behind the primary, always 0 for other databases than
+        PostgreSQL.
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(REPLICA_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def is_replica_healthy(alias):
+    """
+    Whether a replica is reachable and its lag is below DB_REPLICA_MAX_LAG.
+
+    The result is reused for DB_REPLICA_CHECK_INTERVAL seconds, so the lag is queried
+    at most once per interval and replica in every thread.
+
+    Parameters:
+    alias (str): The alias of the replica.
+
+    Returns:
+    bool: True if the replica can serve reads.
+    """
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked is not None and now - checked[0] < settings.DB_REPLICA_CHECK_INTERVAL:
+        return checked[1]
+    try:
+        healthy = get_replica_lag(alias) <= settings.DB_REPLICA_MAX_LAG
+    except DatabaseError:
+        healthy = False
+    metrics.increment("db_replica_checks", alias=alias, healthy=healthy)
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+class ReplicaRouter:
+    """
+    Send the reads of the safe requests of some views to the read replicas.
+
+    The reads only go to a replica while read_from_replicas is set, see
+    utils.views.ReplicaReadMixin, and never inside a transaction of the primary. The
+    replica is picked at random among the healthy ones, when none is healthy the read
+    falls back to the primary. The writes always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DB_REPLICAS or not read_from_replicas.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replicas = [
+            alias for alias in settings.DB_REPLICAS if is_replica_healthy(alias)
+        ]
+        if not replicas:
+            metrics.increment("db_replica_fallbacks")
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas have the same data as the primary
+        return True
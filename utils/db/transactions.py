@@ -0,0 +1,40 @@
+import threading
+
+from django.db import transaction
+
+_batches = threading.local()
+
+
+def on_commit_batch(name, items, flush):
+    """
+    Accumulate some items until the transaction is committed and flush them at once.
+
+    The many signals sent while a contact and its relations are saved in a transaction
+    add their items to one batch, flushed by a single commit hook. The batches are
+    bound to the commit hooks of the connection, which are replaced when the
+    transaction is committed or rolled back, so the items of a rolled back
+    transaction are discarded with its hook and never reach the next one. A savepoint
+    rolled back also starts new batches, the items it added to an older batch are
+    still flushed, which only costs a redundant refresh.
+
+    Parameters:
+    name (str): The name of the batch, one per flush function.
+    items (iterable): The items to add to the batch.
+    flush (callable): A function called with the set of items of the batch.
+
+    Returns:
+    None
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        flush(set(items))
+        return
+
+    if getattr(_batches, "hooks", None) is not connection.run_on_commit:
+        _batches.hooks = connection.run_on_commit
+        _batches.pending = {}
+    batch = _batches.pending.get(name)
+    if batch is None:
+        batch = _batches.pending[name] = set()
+        transaction.on_commit(lambda: flush(batch))
+    batch.update(items)
@@ -1,7 +1,10 @@
 from django_filters import rest_framework
+from rest_framework.filters import BaseFilterBackend
 
 from apps.contacts.models import Contacts
+from apps.contacts.search import search_contacts
 from apps.phones.models import Phones
+from apps.tags.models import TAG_CHOICES
 from apps.users.models import User
 
 
@@ -24,6 +27,10 @@ class PhoneFilterSet(rest_framework.FilterSet):
 
 
 class ContactFilterSet(rest_framework.FilterSet):
+    tag = rest_framework.MultipleChoiceFilter(
+        choices=list(TAG_CHOICES.items()), method="filter_tag"
+    )
+
     class Meta:
         model = Contacts
         fields = (
@@ -32,3 +39,42 @@ class ContactFilterSet(rest_framework.FilterSet):
             "phones",
             "user",
         )
+
+    def filter_tag(self, queryset, name, value):
+        """
+        Keep the contacts with any of the tags.
+
+        The codes are looked up read only, so a read of a replica never creates a
+        missing canonical tag, and the contacts are matched with the indexes of the
+        many to many table.
+        """
+        if not value:
+            return queryset
+        links = Contacts.tags.through.objects.filter(tags__tag__in=value)
+        return queryset.filter(id__in=links.values("contacts_id"))
+
+
+class ContactFullTextSearchFilter(BaseFilterBackend):
+    """
+    Search the contacts with the full text and trigram indexes of the search document.
+
+    The results are ranked, every word matches as a prefix and misspelled words match
+    by trigram similarity.
+    """
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "")
+        return search_contacts(queryset, text)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Búsqueda de texto completo ordenada por relevancia",
+                "schema": {"type": "string"},
+            }
+        ]
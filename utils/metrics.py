@@ -0,0 +1,127 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+
+
+def increment(name, value=1, **labels):
+    """
+    Add a value to a counter of the process.
+
+    Args:
+    name (str): The name of the counter.
+    value (int | float): The value to add.
+    **labels (dict): The labels that identify the series of the counter.
+
+    Returns:
+    None
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def observe(name, value, buckets, **labels):
+    """
+    Add an observation to a histogram of the process.
+
+    Args:
+    name (str): The name of the histogram.
+    value (int | float): The observed value.
+    buckets (tuple): The sorted upper bounds of the buckets, the same on every call
+        for the same name.
+    **labels (dict): The labels that identify the series of the histogram.
+
+    Returns:
+    None
+    """
+    key = (name, tuple(sorted(labels.items())))
+    position = bisect_left(buckets, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                "buckets": tuple(buckets),
+                "counts": [0] * (len(buckets) + 1),
+                "sum": 0.0,
+            }
+        histogram["counts"][position] += 1
+        histogram["sum"] += value
+
+
+def snapshot():
+    """
+    Get the current value of every counter.
+
+    Returns:
+    dict: The counters by name, every counter is a list of its series with the
+        labels and the value.
+    """
+    with _lock:
+        items = list(_counters.items())
+    counters = defaultdict(list)
+    for (name, labels), value in sorted(items):
+        counters[name].append({"labels": dict(labels), "value": value})
+    return dict(counters)
+
+
+def format_value(value):
+    """Format a value in the Prometheus text format without losing precision."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_labels(labels, **extra):
+    """Format the labels of a series in the Prometheus text format."""
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def render_prometheus():
+    """
+    Render the counters and the histograms in the Prometheus text format.
+
+    The values belong to this process only, every worker of the server has to be
+    scraped on its own.
+
+    Returns:
+    str: The exposition of every series.
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (key, {**value, "counts": list(value["counts"])})
+            for key, value in _histograms.items()
+        )
+    lines = []
+    current = None
+    for (name, labels), value in counters:
+        if name != current:
+            current = name
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+    for (name, labels), histogram in histograms:
+        if name != current:
+            current = name
+            lines.append(f"# TYPE {name} histogram")
+        total = 0
+        for bound, count in zip(histogram["buckets"], histogram["counts"]):
+            total += count
+            lines.append(
+                f"{name}_bucket{format_labels(labels, le=format_value(bound))} {total}"
+            )
+        total += histogram["counts"][-1]
+        lines.append(f"{name}_bucket{format_labels(labels, le='+Inf')} {total}")
+        lines.append(
+            f"{name}_sum{format_labels(labels)} {format_value(histogram['sum'])}"
+        )
+        lines.append(f"{name}_count{format_labels(labels)} {total}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,238 @@
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# The profile of the request being served, the context is copied to the threads where
+# the async views run their queries
+_profile = ContextVar("instrumentation_profile", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Literals and lists of placeholders that do not change the shape of a query
+_SHAPE_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s|%\(\w+\)s"), "?"),
+    (re.compile(r"\?(?:\s*,\s*\?)+"), "?"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def get_query_shape(sql):
+    """
+    Get the shape of a query, the SQL without its literals nor its parameters.
+
+    Args:
+    sql (str): The SQL sent to the database.
+
+    Returns:
+    str: The SQL with every literal and every list of values replaced by ?.
+    """
+    for pattern, replacement in _SHAPE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class RequestProfile:
+    """
+    The database cost of a request, filled by the execute wrapper of the connections.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.started = time.perf_counter()
+        self.render_started = None
+        self.render_time = 0.0
+
+    def get_repeated_shapes(self):
+        """Get the shapes executed more times than the N+1 threshold."""
+        threshold = settings.INSTRUMENTATION_N_PLUS_ONE_THRESHOLD
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper that adds the query to the profile of the current request.
+
+    The queries outside of a profiled request are executed without any other work.
+    """
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    begin = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - begin
+        profile.queries += 1
+        profile.shapes[get_query_shape(sql)] += 1
+
+
+def install_wrapper(sender=None, connection=None, **kwargs):
+    """Install record_query in the execute wrappers of a connection, only once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class InstrumentationMiddleware:
+    """
+    Record the database cost, the latency and the size of a sample of the requests.
+
+    A share of the requests, see INSTRUMENTATION_SAMPLE_RATE, is profiled by the
+    execute wrapper of the database connections, which counts and times the queries
+    and groups them by shape. The numbers are recorded in utils.metrics by view
+    name, exposed in the Prometheus format by utils.views.metrics_view, and sent back
+    in the Server-Timing header when INSTRUMENTATION_SERVER_TIMING is on. A shape
+    executed INSTRUMENTATION_N_PLUS_ONE_THRESHOLD times or more in one request is
+    reported as an N+1 pattern. The requests not sampled are only counted.
+
+    The serialization time is the rendering of the DRF responses, the views that
+    build their own response serialize inside the view.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # The connections are per thread, every new one gets the wrapper when it opens
+        connection_created.connect(install_wrapper, dispatch_uid="instrumentation")
+        for alias in connections:
+            install_wrapper(connection=connections[alias])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            response = self.get_response(request)
+            self.count(request, response)
+            return response
+        profile = request.instrumentation = RequestProfile()
+        token = _profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        self.record(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            response = await self.get_response(request)
+            self.count(request, response)
+            return response
+        profile = request.instrumentation = RequestProfile()
+        token = _profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        self.record(request, response, profile)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, "instrumentation", None)
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda response: self.rendered(profile))
+        return response
+
+    @staticmethod
+    def rendered(profile):
+        profile.render_time = time.perf_counter() - profile.render_started
+
+    @staticmethod
+    def is_sampled():
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    @staticmethod
+    def get_view_name(request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match is not None else "unresolved"
+
+    def count(self, request, response):
+        metrics.increment(
+            "http_requests",
+            view=self.get_view_name(request),
+            method=request.method,
+            status=response.status_code,
+        )
+
+    def record(self, request, response, profile):
+        """
+        Record the metrics of a profiled request and add its Server-Timing header.
+
+        Args:
+        request: The request object.
+        response: The response of the view.
+        profile (RequestProfile): The database cost of the request.
+
+        Returns:
+        None
+        """
+        total = time.perf_counter() - profile.started
+        view = self.get_view_name(request)
+        self.count(request, response)
+        metrics.increment("http_requests_sampled", view=view)
+        metrics.observe(
+            "http_request_duration_seconds", total, DURATION_BUCKETS, view=view
+        )
+        metrics.observe("http_db_queries", profile.queries, QUERY_BUCKETS, view=view)
+        metrics.observe(
+            "http_db_duration_seconds", profile.db_time, DURATION_BUCKETS, view=view
+        )
+        metrics.observe(
+            "http_serialization_duration_seconds",
+            profile.render_time,
+            DURATION_BUCKETS,
+            view=view,
+        )
+        size = None if response.streaming else len(response.content)
+        if size is not None:
+            metrics.observe("http_response_size_bytes", size, SIZE_BUCKETS, view=view)
+
+        repeated = profile.get_repeated_shapes()
+        if repeated:
+            metrics.increment("http_n_plus_one_requests", view=view)
+            for shape, count in repeated:
+                logger.warning(
+                    "Possible N+1 in %s %s (%s): %s queries with the shape %s",
+                    request.method,
+                    request.path,
+                    view,
+                    count,
+                    shape[:500],
+                )
+
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            timings = [
+                f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"',
+                f"serialize;dur={profile.render_time * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+            if repeated:
+                timings.append(f'n1;desc="{len(repeated)} repeated shapes"')
+            response.headers["Server-Timing"] = ", ".join(timings)
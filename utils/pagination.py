@@ -1,9 +1,21 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class ExtendedPagination(PageNumberPagination):
     page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
 
     def get_paginated_response(self, data):
         return Response(
@@ -11,9 +23,299 @@ class ExtendedPagination(PageNumberPagination):
                 "count": self.page.paginator.count,
                 "num_pages": self.page.paginator.num_pages,
                 "page_number": self.page.number,
-                "page_size": self.page_size,
+                "page_size": self.page.paginator.per_page,
                 "next_link": self.get_next_link(),
                 "previous_link": self.get_previous_link(),
                 "results": data,
             }
         )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that filters on the values of the last row instead of using OFFSET.
+
+    The rows are ordered by the fields of the view's keyset_ordering (or by ordering),
+    the last field must be unique. The cursor stores the values of those fields for the
+    first or last row of the page, so every page is a range scan over a composite index
+    and costs the same at any depth. The COUNT(*) can be skipped with skip_count=true.
+
+    The keyset is the only order of the pages, so the ordering query parameter is
+    rejected and the results of a search are not ordered by relevance.
+    """
+
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    skip_count_query_param = "skip_count"
+    ordering = ("created", "id")
+    invalid_cursor_message = "Cursor inválido"
+    ordering_not_allowed_message = (
+        "La paginación por cursor no admite otro orden que el de la paginación"
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Get the rows of the page after (or before) the cursor of the request.
+
+        Args:
+        queryset (QuerySet): The filtered queryset of the view.
+        request: The request object.
+        view: The view that is paginating.
+
+        Returns:
+        list: The rows of the page.
+
+        Raises:
+        NotFound: If the cursor of the request can not be decoded.
+        ValidationError: If the request asks for another ordering.
+        """
+        self.setup(request, view, queryset.model)
+        self.count = queryset.count() if self.with_count else None
+        return self.set_page(list(self.get_page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Get the rows of the page after (or before) the cursor with the async ORM.
+
+        Args:
+        queryset (QuerySet): The filtered queryset of the view.
+        request: The request object.
+        view: The view that is paginating.
+
+        Returns:
+        list: The rows of the page.
+
+        Raises:
+        NotFound: If the cursor of the request can not be decoded.
+        ValidationError: If the request asks for another ordering.
+        """
+        self.setup(request, view, queryset.model)
+        self.count = await queryset.acount() if self.with_count else None
+        page_queryset = self.get_page_queryset(queryset)
+        return self.set_page(
+            [
+                row
+                async for row in page_queryset.aiterator(chunk_size=self.page_size + 1)
+            ]
+        )
+
+    def setup(self, request, view, model):
+        ordering_param = api_settings.ORDERING_PARAM
+        if request.query_params.get(ordering_param):
+            raise ValidationError({ordering_param: [self.ordering_not_allowed_message]})
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, "keyset_ordering", self.ordering))
+        self.cursor = self.decode_cursor(request, model)
+        self.with_count = request.query_params.get(self.skip_count_query_param) not in (
+            "1",
+            "true",
+        )
+
+    def get_page_queryset(self, queryset):
+        """Order the queryset by the keyset and keep the rows after the cursor."""
+        reverse = self.cursor is not None and self.cursor["r"]
+        queryset = queryset.order_by(
+            *(f"-{field}" if reverse else field for field in self.ordering)
+        )
+        if self.cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(self.cursor["v"], reverse))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, rows):
+        """Keep the rows of the page and whether there are pages around it."""
+        reverse = self.cursor is not None and self.cursor["r"]
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def keyset_filter(self, values, reverse):
+        """
+        Build the condition (f1, f2, ..., fn) > (v1, v2, ..., vn) over the ordering fields.
+
+        The bound on the first field is repeated on its own so the database can start
+        a range scan on the composite index.
+
+        Args:
+        values (list): The values of the ordering fields stored in the cursor.
+        reverse (bool): Whether the rows before the cursor are requested.
+
+        Returns:
+        Q: The condition that selects the rows after (or before) the cursor.
+        """
+        lookup = "lt" if reverse else "gt"
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = dict(zip(self.ordering[:index], values[:index]))
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[index]})
+        return Q(**{f"{self.ordering[0]}__{lookup}e": values[0]}) & condition
+
+    def get_row_values(self, row):
+        if isinstance(row, dict):
+            return [row[field] for field in self.ordering]
+        return [getattr(row, field) for field in self.ordering]
+
+    def encode_cursor(self, row, reverse):
+        # DjangoJSONEncoder keeps milliseconds only, a truncated date would select the
+        # last row of the page again
+        values = [
+            (
+                value.isoformat()
+                if isinstance(value, (datetime.datetime, datetime.time))
+                else value
+            )
+            for value in self.get_row_values(row)
+        ]
+        payload = json.dumps({"v": values, "r": reverse}, cls=DjangoJSONEncoder)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """
+        Decode the cursor of the request and convert its values to the field types.
+
+        Args:
+        request: The request object.
+        model (Model): The model of the paginated queryset.
+
+        Returns:
+        dict: The values of the ordering fields and whether the rows before them are
+            requested, None without a cursor.
+
+        Raises:
+        NotFound: If the cursor can not be decoded or a value is not valid for its
+            field, a forged cursor never reaches the database.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = cursor["v"]
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            cursor["v"] = [
+                self.to_python(model, field, value)
+                for field, value in zip(self.ordering, values)
+            ]
+            cursor["r"] = bool(cursor["r"])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    @staticmethod
+    def to_python(model, field, value):
+        """Convert a value of the cursor with its field, rejecting the missing ones."""
+        if value is None or isinstance(value, (dict, list)):
+            raise ValueError
+        value = model._meta.get_field(field).to_python(value)
+        if value is None:
+            raise ValueError
+        return value
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        response = {
+            "page_size": self.page_size,
+            "next_link": self.get_next_link(),
+            "previous_link": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return response
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class SelectablePagination(BasePagination):
+    """
+    Let the client choose the pagination with the pagination query parameter.
+
+    The page number pagination is the default, pagination=cursor selects the keyset
+    pagination.
+    """
+
+    pagination_query_param = "pagination"
+    pagination_classes = {
+        "page": ExtendedPagination,
+        "cursor": KeysetPagination,
+    }
+    default_pagination = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = request.query_params.get(
+            self.pagination_query_param, self.default_pagination
+        )
+        pagination_class = self.pagination_classes.get(
+            mode, self.pagination_classes[self.default_pagination]
+        )
+        self.paginator = pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "page para la paginación por número de página, cursor para la "
+                    "paginación por cursor. Con cursor las páginas siguen el orden de "
+                    "la paginación: no se admite ordering y los resultados de una "
+                    "búsqueda no se ordenan por relevancia"
+                ),
+                "schema": {"type": "string", "enum": list(self.pagination_classes)},
+            },
+            *ExtendedPagination().get_schema_operation_parameters(view),
+            {
+                "name": KeysetPagination.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor de la paginación por cursor",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": KeysetPagination.skip_count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Omite el total de la paginación por cursor",
+                "schema": {"type": "boolean"},
+            },
+        ]
@@ -0,0 +1,21 @@
+from rest_framework import serializers
+
+# Maximum number of ids of a bulk soft delete or restore, larger sets use a filter
+BULK_STATE_MAX_IDS = 50_000
+
+
+class BulkStateSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=BULK_STATE_MAX_IDS,
+        required=False,
+    )
+    filter = serializers.DictField(allow_empty=False, required=False)
+
+    def validate(self, data):
+        if ("ids" in data) == ("filter" in data):
+            raise serializers.ValidationError(
+                "Debe enviar una lista de ids o un filtro"
+            )
+        return data
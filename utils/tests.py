@@ -0,0 +1,106 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.contacts.models import Contacts
+from apps.users.models import User
+from utils.db.transactions import on_commit_batch
+from utils.pagination import KeysetPagination
+
+
+def build_request(params):
+    return Request(APIRequestFactory().get("/api/contacts/", params))
+
+
+def encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class KeysetCursorTests(SimpleTestCase):
+    def setUp(self):
+        self.paginator = KeysetPagination()
+        self.paginator.ordering = ("name", "last_name", "id")
+
+    def decode(self, cursor):
+        return self.paginator.decode_cursor(build_request({"cursor": cursor}), Contacts)
+
+    def test_encoded_cursor_decodes_to_the_values_of_the_row(self):
+        contact = Contacts(id=uuid.uuid4(), name="Eva", last_name="Ruiz")
+        self.paginator.request = build_request({"pagination": "cursor"})
+
+        url = self.paginator.encode_cursor(contact, reverse=True)
+
+        query = parse_qs(urlparse(url).query)
+        self.assertEqual(query["pagination"], ["cursor"])
+        cursor = self.decode(query["cursor"][0])
+        self.assertEqual(cursor["v"], ["Eva", "Ruiz", contact.id])
+        self.assertIs(cursor["r"], True)
+
+    def test_dates_keep_their_microseconds(self):
+        user = User(
+            id=uuid.uuid4(),
+            created=datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+        )
+        self.paginator.ordering = ("created", "id")
+        self.paginator.request = build_request({"pagination": "cursor"})
+
+        url = self.paginator.encode_cursor(user, reverse=False)
+
+        cursor = self.paginator.decode_cursor(
+            build_request({"cursor": parse_qs(urlparse(url).query)["cursor"][0]}),
+            User,
+        )
+        self.assertEqual(cursor["v"], [user.created, user.id])
+
+    def test_missing_cursor_is_none(self):
+        self.assertIsNone(self.paginator.decode_cursor(build_request({}), Contacts))
+
+    def test_forged_cursors_are_not_found(self):
+        cursors = {
+            "not base64": "%%%",
+            "not json": base64.urlsafe_b64encode(b"{").decode(),
+            "missing values": encode({"r": False}),
+            "missing direction": encode({"v": ["Eva", "Ruiz", str(uuid.uuid4())]}),
+            "values not a list": encode({"v": "abc", "r": False}),
+            "too few values": encode({"v": ["Eva", "x"], "r": False}),
+            "invalid uuid": encode({"v": ["Eva", "Ruiz", "nope"], "r": False}),
+            "object value": encode({"v": [{"a": 1}, "Ruiz", str(uuid.uuid4())]}),
+            "null value": encode({"v": ["Eva", None, str(uuid.uuid4())], "r": False}),
+        }
+        for case, cursor in cursors.items():
+            with self.subTest(case), self.assertRaises(NotFound):
+                self.decode(cursor)
+
+    def test_ordering_is_rejected(self):
+        request = build_request({"pagination": "cursor", "ordering": "name"})
+
+        with self.assertRaises(ValidationError):
+            self.paginator.setup(request, None, Contacts)
+
+
+class OnCommitBatchTests(TestCase):
+    def test_items_of_a_transaction_are_flushed_once(self):
+        flushed = []
+        with self.captureOnCommitCallbacks(execute=True):
+            on_commit_batch("test", [1, 2], flushed.append)
+            on_commit_batch("test", [2, 3], flushed.append)
+
+        self.assertEqual(flushed, [{1, 2, 3}])
+
+    def test_items_of_a_rolled_back_block_do_not_leak(self):
+        flushed = []
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                on_commit_batch("test", [1], flushed.append)
+                raise ValueError
+            on_commit_batch("test", [2], flushed.append)
+
+        self.assertEqual(flushed, [{2}])
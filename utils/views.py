@@ -0,0 +1,282 @@
+import asyncio
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views import View
+from rest_framework import exceptions, permissions, status
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from apps.abstracts.models import bulk_set_active
+from utils import metrics
+from utils.db.routers import is_pinned, pin_user, read_from_replicas
+from utils.pagination import KeysetPagination
+from utils.serializers import BulkStateSerializer
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_db_semaphore():
+    """
+    Get the semaphore that limits the async requests using the database.
+
+    Without a limit every concurrent request opens its own connection and a burst of
+    requests exhausts the connections of the server, the extra requests wait on the
+    event loop instead. There is one semaphore per event loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(settings.ASYNC_DB_CONCURRENCY)
+    return semaphore
+
+
+class ReplicaReadMixin:
+    """
+    Read from the replicas during the safe requests of a DRF view.
+
+    The reads of the requests with a safe method go to the replicas unless the user
+    wrote recently, the other requests pin the user to the primary, see
+    utils.db.routers.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS and not is_pinned(request.user):
+            self.replica_token = read_from_replicas.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "replica_token", None)
+        if token is not None:
+            read_from_replicas.reset(token)
+            self.replica_token = None
+        if request.method not in permissions.SAFE_METHODS:
+            pin_user(getattr(request, "user", None))
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class BulkStateMixin:
+    """
+    Add the bulk-delete and bulk-restore actions to a DRF view.
+
+    The objects are selected by a list of ids or by the filters of the filterset_class
+    of the view, and their state is changed with a single UPDATE ... RETURNING instead
+    of loading and saving every object.
+    """
+
+    bulk_state_serializer_class = BulkStateSerializer
+    bulk_state_actions = ("bulk_delete", "bulk_restore")
+
+    def get_serializer_class(self):
+        if getattr(self, "action", None) in self.bulk_state_actions:
+            return self.bulk_state_serializer_class
+        return super().get_serializer_class()
+
+    def get_bulk_state_queryset(self):
+        """Get the objects that the user can soft delete and restore."""
+        raise NotImplementedError
+
+    def set_active(self, queryset, is_active, validated_data):
+        """
+        Change the state of the selected objects.
+
+        Args:
+        queryset (QuerySet): The selected objects.
+        is_active (bool): The new state.
+        validated_data (dict): The validated data of the request.
+
+        Returns:
+        dict: The number of updated objects.
+        """
+        return {"updated": len(bulk_set_active(queryset, is_active))}
+
+    @action(methods=["post"], detail=False, url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """Soft delete the objects selected by ids or by a filter."""
+        return self.change_active_state(request, False, "Eliminación masiva terminada")
+
+    @action(methods=["post"], detail=False, url_path="bulk-restore")
+    def bulk_restore(self, request):
+        """Restore the soft deleted objects selected by ids or by a filter."""
+        return self.change_active_state(request, True, "Restauración masiva terminada")
+
+    def change_active_state(self, request, is_active, message):
+        """
+        Select the objects of a bulk request and change their state.
+
+        Args:
+        request: The request object with the ids or the filter.
+        is_active (bool): The new state of the objects.
+        message (str): The message of the successful response.
+
+        Returns:
+        Response: A response with the number of updated objects, or the errors of the
+            request.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"message": "Hay errores en la petición!", "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+        queryset = self.get_bulk_state_queryset()
+        if "ids" in data:
+            queryset = queryset.filter(pk__in=data["ids"])
+        else:
+            filterset = self.filterset_class(
+                data=data["filter"], queryset=queryset, request=request
+            )
+            # An unknown filter would be ignored and select every object
+            errors = {
+                name: ["Filtro desconocido"]
+                for name in data["filter"]
+                if name not in filterset.filters
+            }
+            if errors or not filterset.is_valid():
+                return Response(
+                    {
+                        "message": "El filtro no es válido",
+                        "errors": errors or filterset.errors,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            queryset = filterset.qs
+
+        counts = self.set_active(queryset, is_active, data)
+        return Response({"message": message, **counts}, status=status.HTTP_200_OK)
+
+
+class AsyncReadOnlyView(View):
+    """
+    List and detail endpoint that reads the database with the async ORM.
+
+    The DRF views are synchronous, so under ASGI every request holds a thread while it
+    waits on the database. This view authenticates the request with the DRF
+    authentication classes and applies the filter backends like a DRF view, but it
+    reads the rows with acount, aiterator and aget, so the event loop keeps serving
+    other requests meanwhile. Only the keyset pagination is supported, the page number
+    pagination needs OFFSET.
+    """
+
+    serializer_class = None
+    list_serializer_class = None
+    filter_backends = []
+    pagination_class = KeysetPagination
+    keyset_ordering = ("created", "id")
+    http_method_names = ["get", "options"]
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def error(self, message, status_code):
+        return JsonResponse({"message": message}, status=status_code)
+
+    async def authenticate(self, request):
+        """
+        Authenticate the request with the authentication classes of DRF.
+
+        Args:
+        request (Request): The DRF request that wraps the Django request.
+
+        Returns:
+        User: The authenticated user, or None if no class authenticated the request.
+
+        Raises:
+        APIException: If the credentials are not valid.
+        """
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            result = await sync_to_async(authentication_class().authenticate)(request)
+            if result is not None:
+                return result[0]
+        return None
+
+    async def get(self, request, pk=None):
+        """
+        Get a page of objects, or one object when the primary key is given.
+
+        Args:
+        self: The AsyncReadOnlyView instance.
+        request: The request object.
+        pk (str): The primary key of the object to retrieve.
+
+        Returns:
+        JsonResponse: A response containing the page or the object.
+
+        Raises:
+        N/A
+        """
+        request = Request(request)
+        async with get_db_semaphore():
+            try:
+                user = await self.authenticate(request)
+            except exceptions.APIException as error:
+                return self.error(error.detail, error.status_code)
+            if user is None or not user.is_active:
+                return self.error(
+                    "Las credenciales de autenticación no se proveyeron.",
+                    status.HTTP_401_UNAUTHORIZED,
+                )
+            request.user = user
+            self.request = request
+
+            if pk is not None:
+                return await self.retrieve(pk)
+            return await self.list()
+
+    async def list(self):
+        try:
+            queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+            paginator = self.pagination_class()
+            page = await paginator.apaginate_queryset(queryset, self.request, self)
+        except exceptions.APIException as error:
+            return self.error(error.detail, error.status_code)
+        serializer = self.list_serializer_class(page, many=True)
+        return JsonResponse(
+            paginator.get_paginated_data(serializer.data), encoder=DjangoJSONEncoder
+        )
+
+    async def retrieve(self, pk):
+        try:
+            instance = await self.get_queryset().aget(pk=pk)
+        except (ObjectDoesNotExist, ValidationError):
+            return self.error("No encontrado.", status.HTTP_404_NOT_FOUND)
+        serializer = self.serializer_class(instance)
+        return JsonResponse(serializer.data, encoder=DjangoJSONEncoder)
+
+
+def metrics_view(request):
+    """
+    Expose the metrics of the process in the Prometheus text format.
+
+    The scraper authenticates with the METRICS_TOKEN setting as a bearer token, the
+    staff users can also read them with their session.
+
+    Args:
+    request: The request object.
+
+    Returns:
+    HttpResponse: The counters and histograms of utils.metrics.
+    """
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    authorized = bool(token) and scheme.lower() == "bearer"
+    if not (authorized and constant_time_compare(credentials, token)) and not (
+        request.user.is_authenticated and request.user.is_staff
+    ):
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(
+        metrics.render_prometheus(), content_type="text/plain; version=0.0.4"
+    )